@@ -0,0 +1,113 @@
+"""Add status taxonomy
+
+Revision ID: 5c2f8e1a9b47
+Revises: 37b1460de24d
+Create Date: 2026-10-18 09:15:12.483215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2f8e1a9b47"
+down_revision: Union[str, None] = "37b1460de24d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The category set that was hard-coded until now, published as version 1
+INITIAL_STATUS_CATEGORIES = {
+    "Exception": [
+        "Cancelled",
+        "Carrier Delays",
+        "Claims Issued",
+        "Customs/Tax Delays",
+        "Delayed",
+        "Incorrect Info",
+        "Loss/Returns",
+        "Natural Causes",
+        "Other Delays",
+        "Returned",
+        "Traffic Delays",
+    ],
+    "Info": [None],
+    "Transit": [
+        None,
+        "Customs/Tax Delays",
+        "Delayed",
+        "Delivered",
+        "Documents Handover",
+        "Incorrect Info",
+        "Onboard at Departure Terminal",
+        "Other Delays",
+        "Pick Up Confirmed",
+    ],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    versions = op.create_table(
+        "status_taxonomy_versions",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("version"),
+    )
+    entries = op.create_table(
+        "status_taxonomy_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("status_type", sa.String(), nullable=False),
+        sa.Column("substatus_type", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["version"], ["status_taxonomy_versions.version"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_status_taxonomy_entries_version"),
+        "status_taxonomy_entries",
+        ["version"],
+        unique=False,
+    )
+
+    op.bulk_insert(versions, [{"version": 1}])
+    op.bulk_insert(
+        entries,
+        [
+            {
+                "version": 1,
+                "position": position,
+                "status_type": status_type,
+                "substatus_type": substatus_type,
+            }
+            for position, (status_type, substatus_type) in enumerate(
+                (status_type, substatus_type)
+                for status_type, substatus_types in INITIAL_STATUS_CATEGORIES.items()
+                for substatus_type in substatus_types
+            )
+        ],
+    )
+    # Later versions continue from the seeded one
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('status_taxonomy_versions', 'version'), 1)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_status_taxonomy_entries_version"),
+        table_name="status_taxonomy_entries",
+    )
+    op.drop_table("status_taxonomy_entries")
+    op.drop_table("status_taxonomy_versions")
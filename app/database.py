@@ -1,13 +1,52 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Defaults to DATABASE_URL with the asyncpg driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+# Test connections before handing them out, so restarts of Postgres or idle
+# timeouts of a proxy surface as a reconnect instead of a failed request
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+# Seconds after which a pooled connection is replaced, -1 to keep it forever
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+
+
+def get_pool_options() -> dict:
+    """Connection pool settings shared by the sync and async engines."""
+    return {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+    }
+
+
+def get_async_database_url(database_url: str) -> URL:
+    return make_url(database_url).set(drivername="postgresql+asyncpg")
+
+
+# The sync engine serves Alembic, Celery tasks and the services that run in
+# worker threads; request handlers use the async engine
+engine = create_engine(DATABASE_URL, **get_pool_options())
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL or get_async_database_url(DATABASE_URL), **get_pool_options()
+)
+# Objects stay usable after commit without another round trip to reload them
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def get_db():
     db = Session()
@@ -15,3 +54,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
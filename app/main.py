@@ -1,13 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from app.database import Base, engine
+from app.database import Base, async_engine, engine
+from app.redis import redis_client
+from app.services.status_classification.factory import LLMStatusClassifierFactory
 
 from .routers import status, arithmetic, user
 
 # Initialize database
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled LLM provider, Redis and Postgres connections on shutdown
+    await LLMStatusClassifierFactory.shutdown()
+    if redis_client is not None:
+        await redis_client.aclose()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -14,12 +14,58 @@ class StatusClassificationRequest(BaseModel):
         )
 
 
-class StatusClassificationResponse(BaseModel):
+class StatusClassification(BaseModel):
     status_name: str
     status_type: str
     substatus_type: Optional[str] = None
 
 
+class StatusClassificationResponse(StatusClassification):
+    # Which path handled the status: "rules", "cache", "database" or "llm", or
+    # "default" when the model left it out and it fell back to ("Transit", None)
+    source: Optional[str] = None
+    # Similarity score of classifiers that provide one, e.g. the local model
+    confidence: Optional[float] = None
+
+
+class StatusClassificationStreamItem(StatusClassificationResponse):
+    # Position of the status in the request, as results arrive out of order
+    index: int
+
+
 class StatusClassificationAPIResponse(BaseModel):
     classified_statuses: List[StatusClassificationResponse]
     tokens_used: Dict[str, int]
+    cache_stats: Optional[Dict[str, int]] = None
+
+
+class StatusTaxonomyUpdate(BaseModel):
+    # Status types mapped to their valid substatus types, where None means none
+    status_categories: Dict[str, conlist(Optional[str], min_length=1)]
+
+    @field_validator("status_categories")
+    @classmethod
+    def require_default_pair(cls, value):
+        # Prompts, rules and the local model fall back to ("Transit", None)
+        if None not in value.get("Transit", []):
+            raise ValueError("the taxonomy must contain the ('Transit', None) pair")
+        return value
+
+
+class StatusTaxonomyResponse(StatusTaxonomyUpdate):
+    # None while the built-in default taxonomy is in use
+    version: Optional[int] = None
+
+
+class StatusClassificationJobResponse(BaseModel):
+    job_id: str
+    llm: str
+    # "online" jobs call the LLM chunk by chunk, "batch" jobs use its Batch API
+    mode: str = "online"
+    batch_id: Optional[str] = None
+    state: str
+    total_statuses: int
+    processed_statuses: int
+    total_chunks: int
+    completed_chunks: int
+    failed_chunks: int
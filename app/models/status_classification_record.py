@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class StatusClassificationRecord(Base):
+    __tablename__ = "status_classifications"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # sha256 of the classification cache key: model, taxonomy and status
+    hash: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+    status: Mapped[str] = mapped_column(String)
+    status_type: Mapped[str] = mapped_column(String)
+    substatus_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    model: Mapped[str] = mapped_column(String)
+    # Fingerprint of the category set, see `get_status_categories_hash`
+    taxonomy_hash: Mapped[str] = mapped_column(String(16))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"StatusClassificationRecord(status={self.status!r}, model={self.model!r}, "
+            f"status_type={self.status_type!r}, substatus_type={self.substatus_type!r})"
+        )
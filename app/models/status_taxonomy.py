@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class StatusTaxonomyVersion(Base):
+    __tablename__ = "status_taxonomy_versions"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    def __repr__(self) -> str:
+        return f"StatusTaxonomyVersion(version={self.version!r})"
+
+
+class StatusTaxonomyEntry(Base):
+    __tablename__ = "status_taxonomy_entries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(
+        ForeignKey("status_taxonomy_versions.version", ondelete="CASCADE"),
+        index=True,
+    )
+    # Keeps the order of status types and substatus types as published
+    position: Mapped[int] = mapped_column(Integer)
+    status_type: Mapped[str] = mapped_column(String)
+    substatus_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"StatusTaxonomyEntry(version={self.version!r}, "
+            f"status_type={self.status_type!r}, substatus_type={self.substatus_type!r})"
+        )
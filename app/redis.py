@@ -0,0 +1,10 @@
+import os
+import redis
+from redis import asyncio as aioredis
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Shared Redis clients, or None when Redis is not configured. The async client
+# is for request handlers, the sync one for Celery tasks and threadpool code.
+redis_client = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+sync_redis_client = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
@@ -1,40 +1,40 @@
-from fastapi import APIRouter, HTTPException
+import json
+import math
+from typing import AsyncIterator
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.models.status_classification import (
     StatusClassificationRequest,
     StatusClassificationAPIResponse,
+    StatusClassificationJobResponse,
+    StatusTaxonomyResponse,
+    StatusTaxonomyUpdate,
+)
+from app.services.status_classification.batch_api import (
+    UnsupportedBatchLLMError,
+    get_batch_provider,
 )
 from app.services.status_classification.factory import (
     LLMStatusClassifierFactory,
     UnsupportedLLMError,
 )
-
-STATUS_CATEGORIES_DICT = {
-    "Exception": [
-        "Cancelled",
-        "Carrier Delays",
-        "Claims Issued",
-        "Customs/Tax Delays",
-        "Delayed",
-        "Incorrect Info",
-        "Loss/Returns",
-        "Natural Causes",
-        "Other Delays",
-        "Returned",
-        "Traffic Delays",
-    ],
-    "Info": [None],
-    "Transit": [
-        None,
-        "Customs/Tax Delays",
-        "Delayed",
-        "Delivered",
-        "Documents Handover",
-        "Incorrect Info",
-        "Onboard at Departure Terminal",
-        "Other Delays",
-        "Pick Up Confirmed",
-    ],
-}
+from app.services.status_classification.jobs import (
+    STATUS_JOB_CHUNK_SIZE,
+    STATUS_JOB_MAX_STATUSES,
+    JobStoreUnavailableError,
+    job_store,
+)
+from app.services.status_classification.resilience import (
+    ProviderRateLimitedError,
+    ProviderUnavailableError,
+)
+from app.services.status_classification.service import (
+    status_classification_service,
+)
+from app.services.status_classification.taxonomy import taxonomy_store
+from app.services.streaming import iter_request_lines
+from app.tasks import classify_status_chunk, submit_status_batch
 
 router = APIRouter()
 
@@ -43,6 +43,8 @@ router = APIRouter()
 async def classify_statuses(request: StatusClassificationRequest):
     """
     Classifies a list of status descriptions into predefined status types and substatus types.
+    Statuses matched by a local rule or previously classified statuses are answered without
+    the LLM, and only the remaining ones are sent to it.
 
         Args:
             request (StatusClassificationRequest): A request object containing a list of status descriptions.
@@ -50,8 +52,14 @@ async def classify_statuses(request: StatusClassificationRequest):
         Returns:
             dict: A response containing:
                 - classified_statuses (List[StatusClassificationResponse]): A list of classified statuses with
-                  their status type and substatus type.
+                  their status type, substatus type and the path (rules, cache or llm) that handled them.
                 - tokens_used (Dict[str, int]): A dictionary showing token usage details.
+                - cache_stats (Dict[str, int]): Number of statuses served from the cache (hits),
+                  shared with an identical in-flight request (coalesced) and sent to the LLM (misses).
+
+        Raises:
+            HTTPException: If the LLM is not supported (400), the provider's rate limit is
+            reached (429) or the provider is failing and its circuit breaker is open (503).
 
         Example:
             Request:
@@ -64,32 +72,290 @@ async def classify_statuses(request: StatusClassificationRequest):
                 "classified_statuses": [
                     {
                         "status_name": "shipment has been cancelled",
-                        "status_type": "Exception", "substatus_type": "Cancelled"
+                        "status_type": "Exception", "substatus_type": "Cancelled",
+                        "source": "rules"
                     },
                     {
                         "status_name": "package is in transit",
-                        "status_type": "Transit", "substatus_type": null
+                        "status_type": "Transit", "substatus_type": null,
+                        "source": "llm"
                     }
                 ],
                 "tokens_used": {
                     "prompt_tokens": 15,
                     "completion_tokens": 10,
                     "total_tokens": 25
+                },
+                "cache_stats": {
+                    "hits": 0,
+                    "coalesced": 0,
+                    "misses": 1
                 }
             }
     """
 
     try:
-        classifier = LLMStatusClassifierFactory.get_classifier(request.llm)
-
-        classified_statuses, tokens_used = classifier.classify(
-            request.statuses, status_categories_dict=STATUS_CATEGORIES_DICT
+        return await status_classification_service.classify(
+            request.statuses,
+            llm=request.llm,
+            status_categories_dict=await taxonomy_store.aget(),
         )
     except UnsupportedLLMError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ProviderRateLimitedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except ProviderUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    return StatusClassificationAPIResponse(
-        classified_statuses=classified_statuses, tokens_used=tokens_used
+
+def _format_stream_event(event: str, data: dict, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps(data) + "\n"
+
+
+@router.post("/classify/stream")
+async def classify_statuses_stream(
+    request: StatusClassificationRequest, http_request: Request
+):
+    """
+    Streaming variant of `/classify` that sends each classified status as soon as it is ready.
+
+    Results arrive out of order, so each one carries the `index` of its status in the request.
+    Clients sending `Accept: text/event-stream` get server-sent events (`result` per status,
+    then `summary`); everyone else gets JSON lines, where the last line holds `tokens_used`
+    and `cache_stats`. A failure after the stream started is sent as an `error` event or line.
+
+        Args:
+            request (StatusClassificationRequest): A request object containing a list of status descriptions.
+
+        Raises:
+            HTTPException: If the LLM is not supported (400).
+
+        Example:
+            Response (JSON lines):
+            {"status_name": "shipment has been cancelled", "status_type": "Exception", "substatus_type": "Cancelled", "source": "rules", "confidence": null, "index": 0}
+            {"status_name": "package is in transit", "status_type": "Transit", "substatus_type": null, "source": "llm", "confidence": null, "index": 1}
+            {"tokens_used": {"prompt_tokens": 15, "completion_tokens": 10, "total_tokens": 25}, "cache_stats": {"hits": 0, "coalesced": 0, "misses": 1}}
+    """
+    try:
+        LLMStatusClassifierFactory.get_classifier(request.llm)
+    except UnsupportedLLMError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    status_categories_dict = await taxonomy_store.aget()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for item in status_classification_service.classify_stream(
+                request.statuses,
+                llm=request.llm,
+                status_categories_dict=status_categories_dict,
+            ):
+                if isinstance(item, dict):
+                    yield _format_stream_event("summary", item, sse)
+                else:
+                    yield _format_stream_event("result", item.model_dump(), sse)
+        except Exception as e:
+            yield _format_stream_event("error", {"error": str(e)}, sse)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
     )
+
+
+@router.get("/taxonomy", response_model=StatusTaxonomyResponse)
+def read_status_taxonomy():
+    """
+    Retrieve the status taxonomy that classifications are currently made against.
+
+        Returns:
+            StatusTaxonomyResponse: The taxonomy version and its status categories.
+    """
+    status_categories = taxonomy_store.get()
+    return {"version": taxonomy_store.version, "status_categories": status_categories}
+
+
+@router.put("/taxonomy", response_model=StatusTaxonomyResponse)
+def update_status_taxonomy(taxonomy: StatusTaxonomyUpdate):
+    """
+    Publish a new version of the status taxonomy.
+
+    Other workers pick the new version up within `STATUS_TAXONOMY_REFRESH_SECONDS`.
+    Cached classifications and prompts of the previous version are not reused.
+
+        Args:
+            taxonomy (StatusTaxonomyUpdate): Status types mapped to their valid substatus types.
+
+        Returns:
+            StatusTaxonomyResponse: The published version and its status categories.
+    """
+    version = taxonomy_store.publish(taxonomy.status_categories)
+    return {"version": version, "status_categories": taxonomy.status_categories}
+
+
+def _parse_status_line(line: bytes) -> str:
+    value = json.loads(line.decode())
+    if isinstance(value, dict):
+        value = value.get("status", value.get("status_name"))
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("expected a string or an object with a 'status' string")
+    return value
+
+
+@router.post("/jobs", response_model=StatusClassificationJobResponse, status_code=202)
+async def create_classification_job(
+    request: Request, llm: str = "ft-gpt", mode: str = "online"
+):
+    """
+    Submit a bulk classification job from a JSON lines body.
+
+    Each line is either a JSON string or an object with a `status` key. The statuses
+    are split into chunks that Celery workers classify in parallel.
+
+    In "batch" mode the chunks are instead sent in a single request to the Batch API
+    of the provider, which is cheaper and not rate limited like live calls, but may
+    take up to a day. Celery polls the batch and stores its results for the job.
+
+        Args:
+            llm (str, optional): The LLM to classify with. Defaults to "ft-gpt".
+            mode (str, optional): "online" or "batch". Defaults to "online".
+
+        Returns:
+            StatusClassificationJobResponse: The job id and its initial progress.
+
+        Raises:
+            HTTPException: If the LLM or mode is not supported or a line is invalid
+            (400), the upload has too many statuses (413) or Redis is not configured
+            (503).
+    """
+    llm = llm.lower().strip() or "ft-gpt"
+    mode = mode.lower().strip() or "online"
+
+    try:
+        if mode == "batch":
+            get_batch_provider(llm)
+        elif mode == "online":
+            LLMStatusClassifierFactory.get_classifier(llm)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown job mode '{mode}'")
+        job_id = await run_in_threadpool(job_store.create_job, llm, mode)
+    except (UnsupportedLLMError, UnsupportedBatchLLMError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobStoreUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def fail(status_code: int, detail: str):
+        await run_in_threadpool(job_store.fail_upload, job_id, detail)
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    async def dispatch(chunk_index: int, offset: int, chunk: list[str]):
+        if mode == "batch":
+            # Kept until the whole upload can be submitted as one batch
+            await run_in_threadpool(
+                job_store.save_chunk_input, job_id, chunk_index, offset, chunk
+            )
+        else:
+            await run_in_threadpool(
+                classify_status_chunk.delay, job_id, chunk_index, offset, chunk, llm
+            )
+
+    chunk = []
+    total_statuses = 0
+    total_chunks = 0
+
+    async for line_number, line in iter_request_lines(request):
+        try:
+            chunk.append(_parse_status_line(line))
+        except ValueError as e:
+            await fail(400, f"Invalid status on line {line_number}: {e}")
+
+        total_statuses += 1
+        if total_statuses > STATUS_JOB_MAX_STATUSES:
+            await fail(413, f"A job accepts at most {STATUS_JOB_MAX_STATUSES} statuses")
+
+        if len(chunk) == STATUS_JOB_CHUNK_SIZE:
+            await dispatch(total_chunks, total_statuses - len(chunk), chunk)
+            chunk = []
+            total_chunks += 1
+
+    if chunk:
+        await dispatch(total_chunks, total_statuses - len(chunk), chunk)
+        total_chunks += 1
+
+    if not total_statuses:
+        await fail(400, "The upload does not contain any statuses")
+
+    await run_in_threadpool(
+        job_store.finish_upload, job_id, total_chunks, total_statuses
+    )
+    if mode == "batch":
+        await run_in_threadpool(submit_status_batch.delay, job_id)
+    return await run_in_threadpool(job_store.get_job, job_id)
+
+
+def _get_job_or_404(job_id: str) -> dict:
+    try:
+        job = job_store.get_job(job_id)
+    except JobStoreUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=StatusClassificationJobResponse)
+def read_classification_job(job_id: str):
+    """
+    Retrieve the progress of a bulk classification job.
+
+        Args:
+            job_id (str): The id returned when the job was submitted.
+
+        Returns:
+            StatusClassificationJobResponse: The job state and chunk/status counters.
+
+        Raises:
+            HTTPException: If the job is not found (404).
+    """
+    return _get_job_or_404(job_id)
+
+
+@router.get("/jobs/{job_id}/results")
+def read_classification_job_results(job_id: str):
+    """
+    Stream the results of a bulk classification job as JSON lines.
+
+    Every line is a classified status with its `index` in the upload. Chunks that
+    are still running are skipped and chunks that failed are reported as a line
+    with the chunk number and its `error`.
+
+        Args:
+            job_id (str): The id returned when the job was submitted.
+
+        Returns:
+            StreamingResponse: The results in upload order, one JSON object per line.
+
+        Raises:
+            HTTPException: If the job is not found (404).
+    """
+    job = _get_job_or_404(job_id)
+
+    def generate():
+        for result in job_store.iter_results(job_id, job["total_chunks"]):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
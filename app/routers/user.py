@@ -1,19 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_
-from typing import Optional
-from sqlalchemy.orm import Session
-from app.database import get_db
+import csv
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from typing import AsyncIterator, Dict, List, Literal, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.schemas.user import (
+    UserCreate,
+    UserImportResponse,
+    UserResponse,
+    UserUpdate,
+)
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.services.streaming import iter_request_lines
+from app.services.user_bulk import import_users, iter_user_export
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 
 @router.get("/search", response_model=UserResponse)
-def get_user_by_username_or_email(
+async def get_user_by_username_or_email(
     username: Optional[str] = Query(default=None),
     email: Optional[str] = Query(default=None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Search for a user by username or email."""
     user = None
@@ -25,10 +40,12 @@ def get_user_by_username_or_email(
         )
 
     if username:
-        user = db.query(User).filter(User.username == username).first()
+        user = await user_cache.get(
+            "username", username, _loader(db, User.username == username)
+        )
 
     if not user and email:
-        user = db.query(User).filter(User.email == email).first()
+        user = await user_cache.get("email", email, _loader(db, User.email == email))
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -36,8 +53,129 @@ def get_user_by_username_or_email(
     return user
 
 
+@router.get("/cache/stats")
+async def get_user_cache_stats():
+    """
+    Hits, coalesced lookups and misses of the user cache in this process since it
+    started, and the share of lookups served without a query.
+    """
+    return user_cache.get_stats()
+
+
+@router.get("/export")
+async def export_users(format: Literal["csv", "ndjson"] = "ndjson"):
+    """
+    Stream every user, in id order, without loading the whole table in memory.
+
+        Args:
+            format (str, optional): "csv" (with a header row) or "ndjson". Defaults to
+            "ndjson".
+
+        Returns:
+            StreamingResponse: One user per line.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_user_export(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users_from_upload(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bulk import users from a CSV (`text/csv`, with a `username,email` header row) or
+    JSON lines (`application/x-ndjson`) body.
+
+    The rows are streamed into Postgres with COPY and merged into the users table in a
+    single statement. Rows that are invalid, repeat a username or email of an earlier
+    row, or clash with an existing user are skipped and reported by line number.
+
+        Returns:
+            UserImportResponse: The number of rows read and imported, and the errors.
+
+        Raises:
+            HTTPException: If the CSV header is missing a column (400) or the content
+            type is not supported (415).
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        parse_row = _csv_row_parser()
+    elif "json" in content_type:
+        parse_row = _parse_json_row
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Upload users as text/csv or application/x-ndjson",
+        )
+
+    errors: List[Dict] = []
+
+    async def rows() -> AsyncIterator[tuple[int, str, str]]:
+        async for line_number, line in iter_request_lines(request):
+            try:
+                row = parse_row(line.decode().rstrip("\r"))
+                if row is None:
+                    continue
+                user = UserCreate.model_validate(row)
+            except ValidationError as e:
+                errors.append({"line": line_number, "error": _format_errors(e)})
+                continue
+            except ValueError as e:
+                errors.append({"line": line_number, "error": str(e)})
+                continue
+            yield line_number, user.username, user.email
+
+    copied, merge_errors = await import_users(db, rows())
+    await db.commit()
+
+    return {
+        "total_rows": copied + len(errors),
+        "imported": copied - len(merge_errors),
+        "errors": sorted(errors + merge_errors, key=lambda error: error["line"]),
+    }
+
+
+def _csv_row_parser():
+    header = None
+
+    def parse_row(line: str) -> Optional[Dict]:
+        nonlocal header
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            if not {"username", "email"} <= set(header):
+                raise HTTPException(
+                    status_code=400,
+                    detail="The CSV header must have 'username' and 'email' columns",
+                )
+            return None
+        if len(values) != len(header):
+            raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+        return dict(zip(header, values))
+
+    return parse_row
+
+
+def _parse_json_row(line: str) -> Dict:
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("expected an object with 'username' and 'email'")
+    return row
+
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+async def read_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a user by their unique ID.
 
@@ -50,29 +188,107 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
         Raises:
             HTTPException: If the user is not found (404).
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await user_cache.get("id", user_id, _loader(db, User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+def _to_cache_entry(user: User) -> Dict:
+    return UserResponse.model_validate(user, from_attributes=True).model_dump()
+
+
+def _loader(db: AsyncSession, condition):
+    """Load the user matching `condition` on a cache miss."""
+
+    async def load() -> Optional[Dict]:
+        # Columns rather than entities, so that a second load in the same
+        # session reads the row again instead of the identity map's copy
+        result = await db.execute(
+            select(User.id, User.username, User.email).where(condition)
+        )
+        user = result.mappings().first()
+        return dict(user) if user else None
+
+    return load
+
+
+# Sort keys of GET /users, each backed by a unique index so that a page can
+# seek straight to the row after the cursor
+USER_SORT_COLUMNS = {"id": User.id, "username": User.username, "email": User.email}
+# Type of the `after` value in the cursors of each sort key
+USER_SORT_TYPES = {"id": int, "username": str, "email": str}
+
+
 @router.get("/", response_model=list[UserResponse])
-def read_users(offset: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+async def read_users(
+    response: Response,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=10, ge=1),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "username", "email"] = "id",
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Retrieve a list of users with optional pagination.
 
+    Pages are sorted by `sort`. The `X-Next-Cursor` response header holds the cursor of
+    the next page while there is one. Passing it back as `cursor` seeks to that page
+    through the index of the sort key, so every page is as fast as the first, unlike
+    deep offsets.
+
         Args:
             offset (int, optional): Number of records to skip. Defaults to 0.
             limit (int, optional): Maximum number of records to return. Defaults to 10.
+            cursor (str, optional): The `X-Next-Cursor` of the previous page.
+            sort (str, optional): "id", "username" or "email". Defaults to "id".
 
         Returns:
             list[UserResponse]: A list of user records.
+
+        Raises:
+            HTTPException: If the cursor is invalid, was issued for another sort key,
+            or is combined with an offset (400).
     """
-    return db.query(User).offset(offset).limit(limit).all()
+    column = USER_SORT_COLUMNS[sort]
+    query = select(User).order_by(column).limit(limit + 1)
+
+    if cursor is not None:
+        if offset:
+            raise HTTPException(
+                status_code=400, detail="Use either 'cursor' or 'offset', not both"
+            )
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after = position.get("after")
+        # bool is an int too, but never a valid id, and ids are 32-bit integers
+        if (
+            position.get("sort") != sort
+            or type(after) is not USER_SORT_TYPES[sort]
+            or (sort == "id" and not -(2**31) <= after < 2**31)
+        ):
+            raise HTTPException(
+                status_code=400, detail=f"The cursor is not for sort '{sort}'"
+            )
+        query = query.where(column > after)
+    else:
+        query = query.offset(offset)
+
+    users = (await db.scalars(query)).all()
+
+    # The extra row only tells whether there is a next page
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            {"sort": sort, "after": getattr(users[-1], sort)}
+        )
+    return users
 
 
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user with a unique username and email.
 
@@ -85,23 +301,26 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         Raises:
             HTTPException: If a user with the same username or email already exists (400).
     """
-    existing_user = (
-        db.query(User)
-        .filter(or_(User.username == user.username, User.email == user.email))
-        .first()
+    # A single statement, so concurrent creates of the same user cannot both
+    # pass a separate existence check
+    new_user = await db.scalar(
+        insert(User)
+        .values(username=user.username, email=user.email)
+        .on_conflict_do_nothing()
+        .returning(User)
     )
-    if existing_user:
+    if new_user is None:
         raise HTTPException(status_code=400, detail="Username/Email already exists")
 
-    new_user = User(username=user.username, email=user.email)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await user_cache.set(_to_cache_entry(new_user))
     return new_user
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
-def partial_update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+async def partial_update_user(
+    user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_async_db)
+):
     """
     Partially update a user's attributes (username and/or email).
 
@@ -113,24 +332,20 @@ def partial_update_user(user_id: int, user: UserUpdate, db: Session = Depends(ge
             UserResponse: The updated user record.
 
         Raises:
-            HTTPException: If the user is not found (404).
+            HTTPException: If the user is not found (404) or the new username or email
+            belongs to another user (409).
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    values = user.model_dump(exclude_none=True)
+    if not values:
+        return await read_user(user_id, db)
 
-    if user.username is not None:
-        db_user.username = user.username
-    if user.email is not None:
-        db_user.email = user.email
-
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await _update_user(db, user_id, values)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user: UserCreate, db: Session = Depends(get_db)):
+async def update_user(
+    user_id: int, user: UserCreate, db: AsyncSession = Depends(get_async_db)
+):
     """
     Fully update a user's details.
 
@@ -142,21 +357,34 @@ def update_user(user_id: int, user: UserCreate, db: Session = Depends(get_db)):
         UserResponse: The updated user record.
 
     Raises:
-        HTTPException: If the user is not found (404).
+        HTTPException: If the user is not found (404) or the new username or email
+        belongs to another user (409).
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    return await _update_user(db, user_id, user.model_dump())
+
+
+async def _update_user(db: AsyncSession, user_id: int, values: Dict) -> User:
+    """Update and return a user in one UPDATE ... RETURNING statement."""
+    try:
+        db_user = await db.scalar(
+            update(User).where(User.id == user_id).values(**values).returning(User)
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Username/Email already exists")
+
+    if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db_user.username = user.username
-    db_user.email = user.email
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    # Refreshed rather than dropped, so the next read is still a hit. Keys of
+    # the old username or email are left to miss
+    await user_cache.set(_to_cache_entry(db_user))
     return db_user
 
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a user by their ID.
 
@@ -169,10 +397,16 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the user is not found (404).
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
+    deleted = (
+        await db.execute(
+            delete(User)
+            .where(User.id == user_id)
+            .returning(User.id, User.username, User.email)
+        )
+    ).one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.delete(db_user)
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(deleted._asdict())
     return {"message": "User deleted successfully"}
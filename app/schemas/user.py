@@ -1,10 +1,20 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import AfterValidator, BaseModel
+from typing import Annotated, Optional
+
+
+def reject_nul(value: str) -> str:
+    # Postgres text cannot store NUL, so it would fail the whole statement
+    if "\x00" in value:
+        raise ValueError("must not contain NUL characters")
+    return value
+
+
+Text = Annotated[str, AfterValidator(reject_nul)]
 
 
 class UserBase(BaseModel):
-    username: str
-    email: str
+    username: Text
+    email: Text
 
 
 class UserCreate(UserBase):
@@ -12,9 +22,21 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(BaseModel):
-    username: Optional[str] = None
-    email: Optional[str] = None
+    username: Optional[Text] = None
+    email: Optional[Text] = None
 
 
 class UserResponse(UserBase):
     id: int
+
+
+class UserImportError(BaseModel):
+    line: int
+    error: str
+
+
+class UserImportResponse(BaseModel):
+    total_rows: int
+    imported: int
+    # Rows that were not imported, in upload order
+    errors: list[UserImportError]
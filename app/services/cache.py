@@ -0,0 +1,144 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from redis import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    Async cache with an in-process LRU tier in front of an optional Redis tier.
+
+    Values must be JSON serializable. Redis failures are logged and treated as
+    misses so that the cache never takes the request path down with it.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        ttl: int,
+        redis_client=None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.redis = redis_client
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the cached values of the given keys, skipping misses."""
+        found = {}
+        remote_keys = []
+
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote_keys.append(key)
+
+        if not remote_keys or self.redis is None:
+            return found
+
+        try:
+            values = await self.redis.mget(
+                [self._redis_key(key) for key in remote_keys]
+            )
+        except RedisError:
+            logger.warning("Redis read failed for %s", self.namespace, exc_info=True)
+            return found
+
+        for key, raw_value in zip(remote_keys, values):
+            if raw_value is None:
+                continue
+            value = json.loads(raw_value)
+            # Promote Redis hits to the local tier
+            self.local.set(key, value)
+            found[key] = value
+
+        return found
+
+    async def set_many(self, mapping: Dict[str, Any]) -> None:
+        for key, value in mapping.items():
+            self.local.set(key, value)
+
+        if not mapping or self.redis is None:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Redis write failed for %s", self.namespace, exc_info=True)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+
+        if not keys or self.redis is None:
+            return
+
+        try:
+            await self.redis.delete(*(self._redis_key(key) for key in keys))
+        except RedisError:
+            logger.warning("Redis delete failed for %s", self.namespace, exc_info=True)
+
+    def clear_local(self) -> None:
+        self.local.clear()
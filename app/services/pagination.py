@@ -0,0 +1,29 @@
+import json
+import base64
+import binascii
+from typing import Any, Dict
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor was not issued by this API."""
+
+    def __init__(self):
+        super().__init__("Invalid pagination cursor")
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Opaque, URL-safe token for the position of the last row of a page."""
+    payload = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError()
+
+    if not isinstance(position, dict):
+        raise InvalidCursorError()
+    return position
@@ -1,5 +1,30 @@
+import os
+import json
+import math
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional
+from app.services.cache import LRUCache
+from app.services.status_classification.cache import normalize_status
+from app.services.status_classification.chunking import (
+    STATUS_CHUNK_MAX_CONCURRENCY,
+    STATUS_CHUNK_MAX_RETRIES,
+    split_by_token_budget,
+)
+from app.services.status_classification.categories import get_status_categories_hash
+
+PROMPT_CACHE_MAXSIZE = int(os.getenv("PROMPT_CACHE_MAXSIZE", "64"))
+
+# Static request parts per (classifier, category set), shared by all instances.
+# They never expire; a new category set simply gets a new entry
+static_request_cache = LRUCache(maxsize=PROMPT_CACHE_MAXSIZE, ttl=math.inf)
+
+# Answer for statuses that cannot be classified accurately
+DEFAULT_STATUS_PAIR = ("Transit", None)
+
+logger = logging.getLogger(__name__)
 
 
 class LLMStatusClassifier(ABC):
@@ -7,29 +32,294 @@ class LLMStatusClassifier(ABC):
     Abstract base class for LLM classifiers.
     """
 
+    # Whether one call can classify many statuses, so that statuses of
+    # concurrent requests can be micro-batched into a single call
+    supports_batching: bool = False
+
+    # Output token limit of one call, which bounds how many statuses fit in it
+    max_output_tokens: Optional[int] = None
+
     @abstractmethod
     def classify(
         self, statuses: List[str]
     ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
         pass
 
-    def _generate_primary_user_prompt(self, status: str) -> str:
-        return f"Classify this status delimited by triple backticks ```{status}```"
+    @abstractmethod
+    async def aclassify(
+        self, statuses: List[str]
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        """Async counterpart of `classify` that must not block the event loop."""
+        pass
+
+    async def aclassify_stream(
+        self, statuses: List[str], **kwargs
+    ) -> AsyncIterator[tuple[Optional[int], Optional[Dict], Dict[str, int]]]:
+        """
+        Yield `(index, classified_status, tokens_used)` as soon as each status is
+        classified, where `tokens_used` is the usage added since the last yield.
+        An index of None carries token usage only.
+
+        Classifiers that answer all statuses in one call yield everything once
+        that call returns; per-status classifiers override this to yield each
+        result as it completes.
+        """
+        classified_statuses, tokens_used = await self.aclassify(statuses, **kwargs)
+        aligned = align_classified_statuses(statuses, classified_statuses)
+
+        yield None, None, tokens_used
+        for i, item in enumerate(aligned):
+            if item is not None:
+                yield i, item, {}
+
+    async def aclose(self) -> None:
+        """Release the connection pools held by the classifier."""
+        pass
+
+    def _classify_in_chunks(
+        self,
+        statuses: List[str],
+        classify_chunk: Callable[..., tuple[List, Dict[str, int]]],
+        **kwargs,
+    ) -> tuple[List[Dict], Dict[str, int]]:
+        """
+        Classify statuses in chunks that fit `max_output_tokens`, concurrently,
+        and send statuses the model left out once more. Results keep the input
+        order; statuses that are still missing are left out for the caller to
+        report (the service answers them with the default pair).
+        """
+        chunks = split_by_token_budget(statuses, self.max_output_tokens)
+        results = [None] * len(statuses)
+        tokens_used = {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(STATUS_CHUNK_MAX_CONCURRENCY, len(chunks)) or 1
+        ) as executor:
+            for attempt in range(STATUS_CHUNK_MAX_RETRIES + 1):
+                outcomes = executor.map(
+                    lambda chunk: (
+                        chunk,
+                        *classify_chunk([statuses[i] for i in chunk], **kwargs),
+                    ),
+                    chunks,
+                )
+                chunks = self.__collect_chunks(statuses, outcomes, results, tokens_used)
+                if not chunks:
+                    break
+
+        return self.__finish_chunks(statuses, results), tokens_used
+
+    async def _aclassify_in_chunks(
+        self,
+        statuses: List[str],
+        aclassify_chunk: Callable[..., Awaitable[tuple[List, Dict[str, int]]]],
+        **kwargs,
+    ) -> tuple[List[Dict], Dict[str, int]]:
+        """Async counterpart of `_classify_in_chunks`."""
+        chunks = split_by_token_budget(statuses, self.max_output_tokens)
+        results = [None] * len(statuses)
+        tokens_used = {}
+        semaphore = asyncio.Semaphore(STATUS_CHUNK_MAX_CONCURRENCY)
+
+        async def classify_chunk(chunk: List[int]):
+            async with semaphore:
+                return chunk, *await aclassify_chunk(
+                    [statuses[i] for i in chunk], **kwargs
+                )
+
+        for attempt in range(STATUS_CHUNK_MAX_RETRIES + 1):
+            outcomes = await asyncio.gather(*map(classify_chunk, chunks))
+            chunks = self.__collect_chunks(statuses, outcomes, results, tokens_used)
+            if not chunks:
+                break
+
+        return self.__finish_chunks(statuses, results), tokens_used
+
+    def __collect_chunks(
+        self,
+        statuses: List[str],
+        outcomes,
+        results: List[Optional[Dict]],
+        tokens_used: Dict[str, int],
+    ) -> List[List[int]]:
+        """Store chunk results in place and return the chunks to send again."""
+        missing = []
+        for chunk, classified_statuses, chunk_tokens in outcomes:
+            for name, value in chunk_tokens.items():
+                tokens_used[name] = tokens_used.get(name, 0) + value
+
+            aligned = align_classified_statuses(
+                [statuses[i] for i in chunk], classified_statuses
+            )
+            for i, item in zip(chunk, aligned):
+                if item is None:
+                    missing.append(i)
+                else:
+                    results[i] = item
+
+        return [
+            [missing[j] for j in chunk]
+            for chunk in split_by_token_budget(
+                [statuses[i] for i in missing], self.max_output_tokens
+            )
+        ]
+
+    def __finish_chunks(
+        self, statuses: List[str], results: List[Optional[Dict]]
+    ) -> List[Dict]:
+        missing = [status for status, item in zip(statuses, results) if item is None]
+        if missing:
+            logger.warning(
+                "%s left out %d statuses after retrying: %s",
+                type(self).__name__,
+                len(missing),
+                missing,
+            )
+        return [item for item in results if item is not None]
+
+    def _get_static_request(
+        self,
+        status_categories_dict: Dict[str, List[Optional[str]]],
+        build: Callable[[Dict[str, List[Optional[str]]]], Dict],
+    ) -> Dict:
+        """
+        Return the request parts that only depend on the category set (system
+        prompt, tool schema, model settings), calling `build` the first time a
+        category set is seen. The result is shared between calls and must not be
+        mutated; copy it into the per-call request instead.
+        """
+        key = f"{type(self).__name__}:{get_status_categories_hash(status_categories_dict)}"
+        static_request = static_request_cache.get(key)
+        if static_request is None:
+            static_request = build(status_categories_dict)
+            static_request_cache.set(key, static_request)
+
+        return static_request
+
+    def _generate_primary_user_prompt(self, statuses: List[str]) -> str:
+        # JSON strings keep statuses with newlines or quotes on a single line
+        numbered_statuses = "\n".join(
+            f"{i}. {json.dumps(status)}" for i, status in enumerate(statuses)
+        )
+        return f"Classify these numbered statuses delimited by triple backticks ```\n{numbered_statuses}\n```"
 
     def _generate_system_prompt(self, status_categories_dict) -> str:
+        status_pairs = get_status_pairs(status_categories_dict)
+        pair_codes = "\n".join(
+            f"{code}: {status_type} / {substatus_type or 'null'}"
+            for code, (status_type, substatus_type) in enumerate(status_pairs)
+        )
+        default_pair = (
+            f"code {status_pairs.index(DEFAULT_STATUS_PAIR)}"
+            if DEFAULT_STATUS_PAIR in status_pairs
+            else "the closest pair"
+        )
+
         return f"""
-               Classify the given status (or statuses) into a status type and substatus type based on the
-               following category dictionary delimited by triple backticks:
-               ```{status_categories_dict}```
-
-               - The keys from the category dictionary are status types, and their values are their only
-               valid substatus types.
-               - The status type must not be `null`. If a status cannot be classified into any specific
-               status type, return `Transit` as the status type.
-               - If the chosen status type has `null` substatus_type, the substatus type of the given status
-               may be `null` only if no better match exists or the status is too ambiguous.
-               - Only return valid combinations of status type and substatus type from the given dictionary.
-               - If the status is too ambiguous to classify accurately, return `Transit` as the `status_type`
-               and `null` for the `substatus_type`.
+               Classify each numbered status into a pair of status type and substatus type. The only
+               valid pairs are listed below as `code: status type / substatus type`, delimited by
+               triple backticks:
+               ```
+               {pair_codes}
+               ```
+
+               - For every status, return its number as `i` and the code of its pair as `c`. Do not
+               repeat the status text.
+               - Only use the codes listed above.
+               - A pair with a `null` substatus type may be used only if no better match exists or the
+               status is too ambiguous.
+               - If a status cannot be classified accurately, use {default_pair}.
                - You must return a result for each status. Do not omit or clean any statuses.
                """
+
+    def _get_pair_codes_schema(self, status_categories_dict) -> Dict:
+        """JSON schema of the compact output: one status index and pair code per status."""
+        return {
+            "type": "object",
+            "properties": {
+                "classified_statuses": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "i": {
+                                "type": "integer",
+                                "description": "Number of the status",
+                            },
+                            "c": {
+                                "type": "integer",
+                                "description": "Code of the status type and substatus type pair",
+                                "enum": list(
+                                    range(len(get_status_pairs(status_categories_dict)))
+                                ),
+                            },
+                        },
+                        "required": ["i", "c"],
+                    },
+                }
+            },
+            "required": ["classified_statuses"],
+        }
+
+    def _decode_pair_codes(
+        self, statuses: List[str], items: List[Dict], status_categories_dict
+    ) -> List[Optional[Dict]]:
+        """
+        Map `{"i": index, "c": code}` items back to the statuses sent, in order.
+        Statuses without a valid index and code are returned as None, so that
+        they are sent again.
+        """
+        status_pairs = get_status_pairs(status_categories_dict)
+        results = [None] * len(statuses)
+
+        for item in items:
+            index, code = item.get("i"), item.get("c")
+            if (
+                isinstance(index, int)
+                and isinstance(code, int)
+                and 0 <= index < len(statuses)
+                and 0 <= code < len(status_pairs)
+                and results[index] is None
+            ):
+                status_type, substatus_type = status_pairs[code]
+                results[index] = {
+                    "status_name": statuses[index],
+                    "status_type": status_type,
+                    "substatus_type": substatus_type,
+                }
+
+        return results
+
+
+def get_status_pairs(
+    status_categories_dict: Dict[str, List[Optional[str]]],
+) -> List[tuple[str, Optional[str]]]:
+    """Valid (status type, substatus type) pairs, whose positions are their codes."""
+    return [
+        (status_type, substatus_type)
+        for status_type, substatus_types in status_categories_dict.items()
+        for substatus_type in substatus_types
+    ]
+
+
+def align_classified_statuses(
+    statuses: List[str], classified_statuses: List
+) -> List[Optional[Dict]]:
+    """
+    Line the classifier output up with the statuses that were sent, returning
+    None for statuses the model left out.
+    """
+    classified_statuses = [
+        item.model_dump() if hasattr(item, "model_dump") else item
+        for item in classified_statuses
+    ]
+
+    if len(classified_statuses) == len(statuses):
+        return classified_statuses
+
+    # The model dropped or added items, so fall back to the echoed names
+    by_name = {
+        normalize_status(item.get("status_name") or ""): item
+        for item in classified_statuses
+    }
+    return [by_name.get(normalize_status(status)) for status in statuses]
@@ -0,0 +1,313 @@
+import os
+import json
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+from openai.types.chat import ChatCompletion
+from app.services.status_classification.cache import build_cache_key
+from app.services.status_classification.categories import (
+    get_status_categories_hash,
+)
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.jobs import (
+    StatusClassificationJobStore,
+    fill_job_chunk_results,
+    get_pending_statuses,
+    job_store,
+    match_job_chunk_rules,
+)
+from app.services.status_classification.results import (
+    StatusClassificationResultStore,
+    result_store,
+)
+
+# Seconds between two checks of a submitted batch
+STATUS_BATCH_POLL_SECONDS = int(os.getenv("STATUS_BATCH_POLL_SECONDS", "60"))
+# Batches cost about half of live calls in exchange for answers within a day
+STATUS_BATCH_COMPLETION_WINDOW = "24h"
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedBatchLLMError(Exception):
+    """Raised when batch mode is requested for an LLM without a Batch API."""
+
+    def __init__(self, llm: str):
+        self.llm = llm
+        super().__init__(
+            f"LLM '{llm}' does not support batch mode. "
+            f"Please use one of: {', '.join(BATCH_PROVIDERS)}."
+        )
+
+
+def to_jsonl(lines: List[Dict]) -> bytes:
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+
+class BatchProvider(ABC):
+    """
+    Submits classification requests to the Batch API of a provider and reads
+    the results back. Requests are built and responses parsed by the live
+    classifier, so both modes share prompts and schemas.
+    """
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+    @abstractmethod
+    def build_line(
+        self, custom_id: str, statuses: List[str], status_categories_dict
+    ) -> Dict:
+        """One request of the batch in the provider's JSONL format."""
+
+    @abstractmethod
+    def submit(self, lines: List[Dict]) -> str:
+        """Submit the requests and return the batch id."""
+
+    @abstractmethod
+    def get_state(self, batch_id: str) -> str:
+        """Return "running", "ended" (results can be read) or "failed"."""
+
+    @abstractmethod
+    def iter_results(
+        self, batch_id: str
+    ) -> Iterator[tuple[str, Optional[object], Optional[str]]]:
+        """Yield `(custom_id, response, error)` for every finished request."""
+
+
+class OpenAIBatchProvider(BatchProvider):
+    endpoint = "/v1/chat/completions"
+
+    def build_line(
+        self, custom_id: str, statuses: List[str], status_categories_dict
+    ) -> Dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": self.endpoint,
+            "body": self.classifier.build_batch_request(
+                statuses, status_categories_dict=status_categories_dict
+            ),
+        }
+
+    def submit(self, lines: List[Dict]) -> str:
+        input_file = self.classifier.client.files.create(
+            file=("statuses.jsonl", to_jsonl(lines)), purpose="batch"
+        )
+        batch = self.classifier.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.endpoint,
+            completion_window=STATUS_BATCH_COMPLETION_WINDOW,
+        )
+        return batch.id
+
+    def get_state(self, batch_id: str) -> str:
+        status = self.classifier.client.batches.retrieve(batch_id).status
+        # Expired and cancelled batches still have results for what finished
+        if status in ("completed", "expired", "cancelled"):
+            return "ended"
+        if status == "failed":
+            return "failed"
+        return "running"
+
+    def iter_results(
+        self, batch_id: str
+    ) -> Iterator[tuple[str, Optional[ChatCompletion], Optional[str]]]:
+        batch = self.classifier.client.batches.retrieve(batch_id)
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+
+            content = self.classifier.client.files.content(file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") == 200:
+                    yield (
+                        result["custom_id"],
+                        ChatCompletion.model_validate(response["body"]),
+                        None,
+                    )
+                else:
+                    error = result.get("error") or response.get("body", {}).get("error")
+                    yield result["custom_id"], None, str(error)
+
+
+class AnthropicBatchProvider(BatchProvider):
+    def build_line(
+        self, custom_id: str, statuses: List[str], status_categories_dict
+    ) -> Dict:
+        return {
+            "custom_id": custom_id,
+            "params": self.classifier.build_batch_request(
+                statuses, status_categories_dict=status_categories_dict
+            ),
+        }
+
+    def submit(self, lines: List[Dict]) -> str:
+        batch = self.classifier.client.messages.batches.create(requests=lines)
+        return batch.id
+
+    def get_state(self, batch_id: str) -> str:
+        batch = self.classifier.client.messages.batches.retrieve(batch_id)
+        return "ended" if batch.processing_status == "ended" else "running"
+
+    def iter_results(
+        self, batch_id: str
+    ) -> Iterator[tuple[str, Optional[object], Optional[str]]]:
+        for entry in self.classifier.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message, None
+            else:
+                error = getattr(entry.result, "error", None) or entry.result.type
+                yield entry.custom_id, None, str(error)
+
+
+BATCH_PROVIDERS = {"gpt": OpenAIBatchProvider, "claude": AnthropicBatchProvider}
+
+
+def get_batch_provider(llm: str) -> BatchProvider:
+    llm = llm.lower()
+    if llm not in BATCH_PROVIDERS:
+        raise UnsupportedBatchLLMError(llm)
+    return BATCH_PROVIDERS[llm](LLMStatusClassifierFactory.get_classifier(llm))
+
+
+def submit_job_batch(
+    job_id: str,
+    status_categories_dict: Dict[str, List[Optional[str]]],
+    store: StatusClassificationJobStore = job_store,
+) -> Optional[str]:
+    """
+    Send the uploaded chunks of a batch mode job to the provider in a single
+    batch, one request per chunk. Chunks answered entirely by the rules are
+    stored right away. Returns the batch id, or None if nothing had to be sent.
+    """
+    job = store.get_job(job_id)
+    provider = get_batch_provider(job["llm"])
+
+    lines = []
+    for chunk_index in range(job["total_chunks"]):
+        chunk = store.get_chunk_input(job_id, chunk_index)
+        results, pending = match_job_chunk_rules(
+            chunk["statuses"], status_categories_dict
+        )
+        if not pending:
+            store.save_chunk_result(
+                job_id, chunk_index, _with_index(chunk["offset"], results)
+            )
+            continue
+
+        lines.append(
+            provider.build_line(
+                str(chunk_index),
+                get_pending_statuses(chunk["statuses"], pending),
+                status_categories_dict,
+            )
+        )
+
+    if not lines:
+        return None
+
+    batch_id = provider.submit(lines)
+    store.save_batch(
+        job_id,
+        {
+            "batch_id": batch_id,
+            "chunks": [int(line["custom_id"]) for line in lines],
+            "status_categories_dict": status_categories_dict,
+        },
+    )
+    logger.info(
+        "Submitted batch %s with %d chunks of job %s", batch_id, len(lines), job_id
+    )
+    return batch_id
+
+
+def collect_job_batch(
+    job_id: str,
+    store: StatusClassificationJobStore = job_store,
+    results_store: Optional[StatusClassificationResultStore] = result_store,
+) -> Optional[int]:
+    """
+    Store the results of the provider batch of a job once it has ended, and
+    return the number of statuses stored. Returns None while it is running.
+
+    LLM results are also written to the result store, so that later live
+    requests for the same statuses are answered without calling the model.
+    """
+    job = store.get_job(job_id)
+    batch = store.get_batch(job_id)
+    provider = get_batch_provider(job["llm"])
+    status_categories_dict = batch["status_categories_dict"]
+
+    state = provider.get_state(batch["batch_id"])
+    if state == "running":
+        return None
+
+    unanswered = set(batch["chunks"])
+    stored = 0
+    if state == "ended":
+        for custom_id, response, error in provider.iter_results(batch["batch_id"]):
+            chunk_index = int(custom_id)
+            if chunk_index not in unanswered:
+                continue
+            unanswered.discard(chunk_index)
+
+            if error is not None:
+                store.save_chunk_error(job_id, chunk_index, error)
+                continue
+
+            chunk = store.get_chunk_input(job_id, chunk_index)
+            statuses = chunk["statuses"]
+            results, pending = match_job_chunk_rules(statuses, status_categories_dict)
+            classified_statuses, _ = provider.classifier.parse_batch_response(
+                response,
+                get_pending_statuses(statuses, pending),
+                status_categories_dict=status_categories_dict,
+            )
+            fill_job_chunk_results(statuses, results, pending, classified_statuses)
+
+            # A retried poll finds the chunks it stored before it failed
+            if store.save_chunk_result(
+                job_id, chunk_index, _with_index(chunk["offset"], results)
+            ):
+                stored += len(results)
+            if results_store is not None:
+                _store_llm_results(
+                    results_store, results, job["llm"], status_categories_dict
+                )
+
+    for chunk_index in sorted(unanswered):
+        store.save_chunk_error(job_id, chunk_index, f"Batch {state} without a result")
+
+    return stored
+
+
+def _with_index(offset: int, results: List[Dict]) -> List[Dict]:
+    return [{"index": offset + i, **result} for i, result in enumerate(results)]
+
+
+def _store_llm_results(
+    results_store: StatusClassificationResultStore,
+    results: List[Dict],
+    llm: str,
+    status_categories_dict: Dict[str, List[Optional[str]]],
+) -> None:
+    categories_hash = get_status_categories_hash(status_categories_dict)
+    classified = {}
+    statuses = {}
+    for result in results:
+        if result.get("source") != "llm":
+            continue
+        key = build_cache_key(result["status_name"], llm, categories_hash)
+        classified[key] = result
+        statuses[key] = result["status_name"]
+
+    # Celery tasks run outside of an event loop
+    asyncio.run(results_store.set_many(classified, statuses, llm, categories_hash))
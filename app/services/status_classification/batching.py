@@ -0,0 +1,94 @@
+import os
+import asyncio
+from typing import Dict, List, Optional, Set
+from app.services.status_classification.base import (
+    LLMStatusClassifier,
+    align_classified_statuses,
+)
+
+STATUS_MICRO_BATCH_WAIT_MS = float(os.getenv("STATUS_MICRO_BATCH_WAIT_MS", "5"))
+STATUS_MICRO_BATCH_MAX_SIZE = int(os.getenv("STATUS_MICRO_BATCH_MAX_SIZE", "50"))
+
+
+class MicroBatcher:
+    """
+    Collects the statuses of concurrent callers for up to `max_wait` seconds,
+    or until `max_size` statuses are pending, and classifies them in a single
+    upstream call. The system prompt is then paid once per batch instead of
+    once per request.
+
+    Token usage of a batch is split between its callers in proportion to the
+    number of statuses each of them sent.
+    """
+
+    def __init__(
+        self,
+        classifier: LLMStatusClassifier,
+        status_categories_dict: Dict[str, List[Optional[str]]],
+        max_wait: float = STATUS_MICRO_BATCH_WAIT_MS / 1000,
+        max_size: int = STATUS_MICRO_BATCH_MAX_SIZE,
+    ):
+        self.classifier = classifier
+        self.status_categories_dict = status_categories_dict
+        self.max_wait = max_wait
+        self.max_size = max_size
+        self._pending: List[tuple[List[str], asyncio.Future]] = []
+        self._pending_size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def aclassify(
+        self, statuses: List[str]
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((statuses, future))
+        self._pending_size += len(statuses)
+
+        if self._pending_size >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._pending_size = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[tuple[List[str], asyncio.Future]]) -> None:
+        statuses = [status for part, _ in batch for status in part]
+
+        try:
+            classified_statuses, tokens_used = await self.classifier.aclassify(
+                statuses, status_categories_dict=self.status_categories_dict
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        aligned = align_classified_statuses(statuses, classified_statuses)
+        offset = 0
+        for part, future in batch:
+            part_results = aligned[offset : offset + len(part)]
+            offset += len(part)
+            if future.done():
+                continue
+
+            share = len(part) / len(statuses)
+            future.set_result(
+                (
+                    [result for result in part_results if result is not None],
+                    {key: round(value * share) for key, value in tokens_used.items()},
+                )
+            )
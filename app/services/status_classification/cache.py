@@ -0,0 +1,28 @@
+import os
+import re
+import hashlib
+from app.redis import redis_client
+from app.services.cache import TwoTierCache
+
+STATUS_CACHE_MAXSIZE = int(os.getenv("STATUS_CACHE_MAXSIZE", "10000"))
+STATUS_CACHE_TTL = int(os.getenv("STATUS_CACHE_TTL", "86400"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_status(status: str) -> str:
+    """Case and whitespace insensitive form of a status used for cache lookups."""
+    return _WHITESPACE_RE.sub(" ", status).strip().lower()
+
+
+def build_cache_key(status: str, llm: str, status_categories_hash: str) -> str:
+    status_hash = hashlib.sha256(normalize_status(status).encode()).hexdigest()
+    return f"{llm}:{status_categories_hash}:{status_hash}"
+
+
+classification_cache = TwoTierCache(
+    namespace="status_classification",
+    maxsize=STATUS_CACHE_MAXSIZE,
+    ttl=STATUS_CACHE_TTL,
+    redis_client=redis_client,
+)
@@ -0,0 +1,100 @@
+import os
+from typing import Dict, List, Optional
+from app.services.status_classification.base import (
+    LLMStatusClassifier,
+    align_classified_statuses,
+)
+from app.services.status_classification.local import LocalModelNotTrainedError
+
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.6"))
+
+
+class CascadeStatusClassifier(LLMStatusClassifier):
+    """
+    Labels every status with a cheap in-process classifier first and sends
+    only the statuses below the confidence threshold to the LLM, in a single
+    call. Statuses answered locally are marked with `source="local"`.
+    """
+
+    def __init__(
+        self,
+        local_classifier: LLMStatusClassifier,
+        llm_classifier: LLMStatusClassifier,
+        threshold: float = CASCADE_CONFIDENCE_THRESHOLD,
+    ):
+        self.local_classifier = local_classifier
+        self.llm_classifier = llm_classifier
+        self.threshold = threshold
+
+    def classify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        try:
+            local_results, _ = self.local_classifier.classify(statuses, **kwargs)
+        except LocalModelNotTrainedError:
+            local_results = []
+
+        uncertain = self.__get_uncertain_indices(statuses, local_results)
+        llm_results, tokens_used = [], {}
+        if uncertain:
+            llm_results, tokens_used = self.llm_classifier.classify(
+                [statuses[i] for i in uncertain], **kwargs
+            )
+
+        return (
+            self.__merge_results(statuses, local_results, uncertain, llm_results),
+            tokens_used,
+        )
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        try:
+            local_results, _ = await self.local_classifier.aclassify(statuses, **kwargs)
+        except LocalModelNotTrainedError:
+            local_results = []
+
+        uncertain = self.__get_uncertain_indices(statuses, local_results)
+        llm_results, tokens_used = [], {}
+        if uncertain:
+            llm_results, tokens_used = await self.llm_classifier.aclassify(
+                [statuses[i] for i in uncertain], **kwargs
+            )
+
+        return (
+            self.__merge_results(statuses, local_results, uncertain, llm_results),
+            tokens_used,
+        )
+
+    def __get_uncertain_indices(
+        self, statuses: List[str], local_results: List[Dict]
+    ) -> List[int]:
+        if not local_results:
+            return list(range(len(statuses)))
+
+        return [
+            i
+            for i, result in enumerate(local_results)
+            if (result.get("confidence") or 0) < self.threshold
+        ]
+
+    def __merge_results(
+        self,
+        statuses: List[str],
+        local_results: List[Dict],
+        uncertain: List[int],
+        llm_results: List,
+    ) -> List[Dict[str, Optional[str]]]:
+        merged = [
+            {**result, "source": "local"} if result else None
+            for result in local_results or [None] * len(statuses)
+        ]
+
+        aligned = align_classified_statuses(
+            [statuses[i] for i in uncertain], llm_results
+        )
+        for i, result in zip(uncertain, aligned):
+            merged[i] = result
+
+        # Statuses the LLM left out are dropped, as they are without the cascade
+        return [result for result in merged if result is not None]
@@ -0,0 +1,42 @@
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+# Built-in taxonomy, used until a version is published to the database
+STATUS_CATEGORIES_DICT = {
+    "Exception": [
+        "Cancelled",
+        "Carrier Delays",
+        "Claims Issued",
+        "Customs/Tax Delays",
+        "Delayed",
+        "Incorrect Info",
+        "Loss/Returns",
+        "Natural Causes",
+        "Other Delays",
+        "Returned",
+        "Traffic Delays",
+    ],
+    "Info": [None],
+    "Transit": [
+        None,
+        "Customs/Tax Delays",
+        "Delayed",
+        "Delivered",
+        "Documents Handover",
+        "Incorrect Info",
+        "Onboard at Departure Terminal",
+        "Other Delays",
+        "Pick Up Confirmed",
+    ],
+}
+
+
+def get_status_categories_hash(
+    status_categories_dict: Dict[str, List[Optional[str]]],
+) -> str:
+    """Stable fingerprint of a category set, used to scope cached results."""
+    # Order matters: prompts number the pairs in dict order, so the same keys in
+    # another order give other pair codes and must not share a cached prompt
+    serialized = json.dumps(status_categories_dict)
+    return hashlib.sha256(serialized.encode()).hexdigest()[:16]
@@ -0,0 +1,75 @@
+import os
+import logging
+from functools import lru_cache
+from typing import List
+import tiktoken
+
+# Share of a model's max output tokens that the statuses of one chunk may use
+STATUS_CHUNK_OUTPUT_BUDGET = float(os.getenv("STATUS_CHUNK_OUTPUT_BUDGET", "0.8"))
+STATUS_CHUNK_MAX_CONCURRENCY = int(os.getenv("STATUS_CHUNK_MAX_CONCURRENCY", "4"))
+# Times statuses left out of a model response are sent again
+STATUS_CHUNK_MAX_RETRIES = int(os.getenv("STATUS_CHUNK_MAX_RETRIES", "1"))
+# Tokens of status text sent in one chunk. The output no longer grows with the
+# length of the statuses, so this keeps long statuses from making huge prompts
+STATUS_CHUNK_MAX_INPUT_TOKENS = int(os.getenv("STATUS_CHUNK_MAX_INPUT_TOKENS", "20000"))
+
+# Tokens of one `{"i": index, "c": code}` item in the output
+OUTPUT_TOKENS_PER_STATUS = 12
+# Tokens of the number and quotes around each status in the prompt
+INPUT_TOKENS_PER_STATUS = 4
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """
+    The o200k tokenizer, or None if it cannot be loaded. tiktoken downloads
+    encodings on first use, so set TIKTOKEN_CACHE_DIR to a pre-populated
+    directory on hosts without internet access.
+    """
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("Could not load the tokenizer, estimating tokens from length")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        # About three characters per token, a little pessimistic on purpose
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_by_token_budget(
+    statuses: List[str],
+    max_output_tokens: int,
+    max_input_tokens: int = STATUS_CHUNK_MAX_INPUT_TOKENS,
+) -> List[List[int]]:
+    """
+    Split statuses, in order, into the fewest chunks whose classified output
+    is expected to fit in `max_output_tokens` and whose status text fits in
+    `max_input_tokens`. Returns the indices per chunk.
+    """
+    output_budget = max_output_tokens * STATUS_CHUNK_OUTPUT_BUDGET
+    chunks = []
+    chunk = []
+    input_tokens = 0
+
+    for i, status in enumerate(statuses):
+        status_tokens = count_tokens(status) + INPUT_TOKENS_PER_STATUS
+        if chunk and (
+            (len(chunk) + 1) * OUTPUT_TOKENS_PER_STATUS > output_budget
+            or input_tokens + status_tokens > max_input_tokens
+        ):
+            chunks.append(chunk)
+            chunk = []
+            input_tokens = 0
+        chunk.append(i)
+        input_tokens += status_tokens
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -1,86 +1,164 @@
 import os
-from typing import List, Dict
-from anthropic import Anthropic
+from typing import List, Dict, Optional
+from anthropic import Anthropic, AsyncAnthropic
 from app.services.status_classification.base import LLMStatusClassifier
+from app.services.status_classification.http_clients import (
+    build_http_client,
+    build_async_http_client,
+)
+from app.services.status_classification.resilience import get_provider_resilience
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
 
 class ClaudeStatusClassifier(LLMStatusClassifier):
+    supports_batching = True
+    max_output_tokens = 8_000
+
     def __init__(self):
-        self.client = Anthropic(api_key=ANTHROPIC_API_KEY)
+        # Retries are left to the shared resilience policy of the provider
+        self.client = Anthropic(
+            api_key=ANTHROPIC_API_KEY, http_client=build_http_client(), max_retries=0
+        )
+        self.async_client = AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            http_client=build_async_http_client(),
+            max_retries=0,
+        )
+        self.resilience = get_provider_resilience("anthropic")
 
     def classify(
         self, statuses: List[str], **kwargs
     ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return self._classify_in_chunks(statuses, self.__classify_chunk, **kwargs)
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return await self._aclassify_in_chunks(
+            statuses, self.__aclassify_chunk, **kwargs
+        )
+
+    def __classify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+
+        response = self.resilience.call(
+            self.client.messages.create,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=self.__count_tokens,
+        )
+
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def __aclassify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+
+        response = await self.resilience.acall(
+            self.async_client.messages.create,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=self.__count_tokens,
+        )
 
-        response = self.client.messages.create(
-            model="claude-3-5-haiku-20241022",
-            system=self._generate_system_prompt(kwargs["status_categories_dict"]),
-            messages=[
+        return self.__parse_response(response, statuses, **kwargs)
+
+    def build_batch_request(self, statuses: List[str], **kwargs) -> Dict:
+        """Request of one chunk in the Batch API, the same as a live call."""
+        return self.__build_request(statuses, **kwargs)
+
+    def parse_batch_response(
+        self, response, statuses: List[str], **kwargs
+    ) -> tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.close()
+
+    def __build_request(self, statuses: List[str], **kwargs) -> Dict:
+        static_request = self._get_static_request(
+            kwargs["status_categories_dict"], self.__build_static_request
+        )
+
+        return {
+            **static_request,
+            "messages": [
                 {
                     "role": "user",
                     "content": self._generate_primary_user_prompt(statuses),
                 },
             ],
-            tools=self.__get_function_schema(),
-            temperature=0.0,
-            max_tokens=8_000,
-        )
+        }
+
+    def __build_static_request(self, status_categories_dict) -> Dict:
+        return {
+            "model": "claude-3-5-haiku-20241022",
+            # The system prompt and tool schema are identical on every call, so
+            # cache them; tools come first in the cached prefix, then the system.
+            # Claude 3.5 Haiku only caches prefixes of 2048 tokens or more, which
+            # the default taxonomy (about 520 tokens) does not reach. Until a
+            # taxonomy does, the breakpoints are ignored and the cache_*_tokens
+            # usage stays 0
+            "system": [
+                {
+                    "type": "text",
+                    "text": self._generate_system_prompt(status_categories_dict),
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "tools": self.__get_function_schema(status_categories_dict),
+            "temperature": 0.0,
+            "max_tokens": self.max_output_tokens,
+        }
 
-        classified_statuses = []
+    def __parse_response(
+        self, response, statuses: List[str], **kwargs
+    ) -> tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+        pair_codes = []
 
-        # Extract classified_statuses from function definition
+        # Extract the pair codes from function definition
         for content_block in response.content:
             if content_block.type == "tool_use":
-                classified_statuses = content_block.input["classified_statuses"]
+                pair_codes = content_block.input["classified_statuses"]
                 break
 
-        # Extract token usage from response
+        classified_statuses = self._decode_pair_codes(
+            statuses, pair_codes, kwargs["status_categories_dict"]
+        )
+
+        # Extract token usage from response. Cached prompt tokens are billed
+        # separately from `input_tokens`, so they are added to the total
+        cache_creation_input_tokens = response.usage.cache_creation_input_tokens or 0
+        cache_read_input_tokens = response.usage.cache_read_input_tokens or 0
         tokens_used = {
             "input_tokens": response.usage.input_tokens,
             "output_tokens": response.usage.output_tokens,
-            "total_tokens": response.usage.input_tokens + response.usage.output_tokens,
+            "cache_creation_input_tokens": cache_creation_input_tokens,
+            "cache_read_input_tokens": cache_read_input_tokens,
+            "total_tokens": response.usage.input_tokens
+            + response.usage.output_tokens
+            + cache_creation_input_tokens
+            + cache_read_input_tokens,
         }
 
         return classified_statuses, tokens_used
 
-    def __get_function_schema(self) -> List[Dict]:
+    def __count_tokens(self, response) -> int:
+        # Cache reads do not count towards Anthropic's input token rate limit
+        return (
+            response.usage.input_tokens
+            + (response.usage.cache_creation_input_tokens or 0)
+            + response.usage.output_tokens
+        )
+
+    def __get_function_schema(self, status_categories_dict) -> List[Dict]:
         return [
             {
                 "name": "classify_statuses",
-                "description": "Get an array of statuses classified by status type and substatus type",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "classified_statuses": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "status_name": {
-                                        "type": "string",
-                                        "description": "Name of status",
-                                    },
-                                    "status_type": {
-                                        "type": "string",
-                                        "description": "Status type of status",
-                                    },
-                                    "substatus_type": {
-                                        "type": "string",
-                                        "description": "Substatus type of status",
-                                    },
-                                },
-                                "required": [
-                                    "status_name",
-                                    "status_type",
-                                ],
-                            },
-                        }
-                    },
-                },
+                "description": "Get the pair code of each numbered status",
+                "input_schema": self._get_pair_codes_schema(status_categories_dict),
+                # Cache breakpoint covering the tool definitions
+                "cache_control": {"type": "ephemeral"},
             }
         ]
-
-    def _generate_primary_user_prompt(self, statuses: List[str]) -> str:
-        return f"Classify these statuses delimited by triple backticks ```{statuses}```"
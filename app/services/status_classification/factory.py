@@ -1,7 +1,16 @@
+import threading
+from typing import Dict
+from app.services.status_classification.base import LLMStatusClassifier
+from app.services.status_classification.cascade import CascadeStatusClassifier
 from app.services.status_classification.ft_gpt import FTGPTStatusClassifier
 from app.services.status_classification.gpt import GPTStatusClassifier
 from app.services.status_classification.claude import ClaudeStatusClassifier
 from app.services.status_classification.gemini import GeminiStatusClassifier
+from app.services.status_classification.local import LocalStatusClassifier
+from app.services.status_classification.routing import (
+    ROUTING_PROVIDERS,
+    RoutingStatusClassifier,
+)
 
 
 class UnsupportedLLMError(Exception):
@@ -15,9 +24,68 @@ class UnsupportedLLMError(Exception):
 
 
 class LLMStatusClassifierFactory:
-    @staticmethod
-    def get_classifier(llm: str):
+    """
+    Hands out one long-lived classifier per LLM key so that every request reuses
+    the same provider clients and their keep-alive connection pools.
+    """
+
+    _classifiers: Dict[str, LLMStatusClassifier] = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_classifier(cls, llm: str) -> LLMStatusClassifier:
         llm = llm.lower()
+        classifier = cls._classifiers.get(llm)
+        if classifier is not None:
+            return classifier
+
+        with cls._lock:
+            if llm not in cls._classifiers:
+                cls._classifiers[llm] = cls._create_classifier(llm)
+            return cls._classifiers[llm]
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close the connection pools of every classifier created so far."""
+        with cls._lock:
+            classifiers = list(cls._classifiers.values())
+            cls._classifiers.clear()
+
+        for classifier in classifiers:
+            await classifier.aclose()
+
+    @classmethod
+    def clear(cls) -> None:
+        """Forget the cached classifiers without closing them (e.g. after a fork)."""
+        with cls._lock:
+            cls._classifiers.clear()
+
+    @classmethod
+    def _create_classifier(cls, llm: str) -> LLMStatusClassifier:
+        # "cascade-<llm>" answers confident statuses with the local model and
+        # sends the rest to <llm>
+        if llm.startswith("cascade-"):
+            backend = llm.removeprefix("cascade-")
+            if backend == "local" or backend.startswith("cascade-"):
+                raise UnsupportedLLMError(llm)
+            return CascadeStatusClassifier(
+                cls.get_classifier("local"), cls.get_classifier(backend)
+            )
+
+        # "routed" sends each request to the currently fastest of the
+        # ROUTING_PROVIDERS and hedges slow calls to the next one
+        if llm == "routed":
+            return RoutingStatusClassifier(
+                {
+                    name: cls.get_classifier(name)
+                    for name in (
+                        provider.strip().lower()
+                        for provider in ROUTING_PROVIDERS.split(",")
+                    )
+                    if name and name != "routed"
+                }
+            )
+
         if llm == "ft-gpt":
             return FTGPTStatusClassifier()
         if llm == "gpt":
@@ -26,5 +94,7 @@ class LLMStatusClassifierFactory:
             return ClaudeStatusClassifier()
         elif llm == "gemini":
             return GeminiStatusClassifier()
+        elif llm == "local":
+            return LocalStatusClassifier()
         else:
             raise UnsupportedLLMError(llm)
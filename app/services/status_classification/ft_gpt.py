@@ -1,54 +1,177 @@
 import os
 import json
-from typing import List, Dict
-from openai import OpenAI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Optional
+from openai import OpenAI, AsyncOpenAI
 from app.services.status_classification.base import LLMStatusClassifier
+from app.services.status_classification.gpt import (
+    get_cached_prompt_tokens,
+    get_total_tokens,
+)
+from app.services.status_classification.http_clients import (
+    build_http_client,
+    build_async_http_client,
+)
+from app.services.status_classification.resilience import get_provider_resilience
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+FT_GPT_MAX_CONCURRENCY = int(os.getenv("FT_GPT_MAX_CONCURRENCY", "8"))
 
 
 class FTGPTStatusClassifier(LLMStatusClassifier):
-    def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, max_concurrency: int = FT_GPT_MAX_CONCURRENCY):
+        # Retries are left to the shared resilience policy of the provider
+        self.client = OpenAI(
+            api_key=OPENAI_API_KEY, http_client=build_http_client(), max_retries=0
+        )
+        self.async_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY, http_client=build_async_http_client(), max_retries=0
+        )
+        self.resilience = get_provider_resilience("openai")
+        self.max_concurrency = max(1, max_concurrency)
 
     def classify(
         self, statuses: List[str], **kwargs
     ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
 
-        classified_statuses = []
-        input_tokens = 0
-        output_tokens = 0
-        total_tokens = 0
-
-        for status in statuses:
-            classified_status, response_usage = self._classify_single_status(
-                status, **kwargs
+        # The fine-tuned model classifies one status per call, so the calls are
+        # fanned out over a bounded thread pool. `map` keeps the input order.
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_concurrency, len(statuses)))
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda status: self._classify_single_status(status, **kwargs),
+                    statuses,
+                )
             )
 
-            classified_statuses.append(classified_status)
-            input_tokens += response_usage.prompt_tokens
-            output_tokens += response_usage.completion_tokens
-            total_tokens += response_usage.total_tokens
+        return self.__merge_results(results)
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def classify_with_limit(status: str):
+            async with semaphore:
+                return await self._aclassify_single_status(status, **kwargs)
+
+        # `gather` returns results in the order of the given statuses.
+        results = await asyncio.gather(
+            *(classify_with_limit(status) for status in statuses)
+        )
 
+        return self.__merge_results(results)
+
+    async def aclassify_stream(
+        self, statuses: List[str], **kwargs
+    ) -> AsyncIterator[tuple[Optional[int], Optional[Dict], Dict[str, int]]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def classify_at(index: int, status: str):
+            async with semaphore:
+                return index, await self._aclassify_single_status(status, **kwargs)
+
+        tasks = [
+            asyncio.ensure_future(classify_at(i, status))
+            for i, status in enumerate(statuses)
+        ]
+        try:
+            # Yield each status as soon as its own call returns
+            for next_done in asyncio.as_completed(tasks):
+                index, (classified_status, response_usage) = await next_done
+                yield index, classified_status, self.__get_tokens_used(response_usage)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.close()
+
+    def __merge_results(self, results) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        classified_statuses = []
         tokens_used = {
-            "prompt_tokens": input_tokens,
-            "completion_tokens": output_tokens,
-            "total_tokens": total_tokens,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "cached_tokens": 0,
         }
 
+        for classified_status, response_usage in results:
+            classified_statuses.append(classified_status)
+            for name, value in self.__get_tokens_used(response_usage).items():
+                tokens_used[name] += value
+
         return classified_statuses, tokens_used
 
+    def __get_tokens_used(self, response_usage) -> Dict[str, int]:
+        return {
+            "prompt_tokens": response_usage.prompt_tokens,
+            "completion_tokens": response_usage.completion_tokens,
+            "total_tokens": response_usage.total_tokens,
+            "cached_tokens": get_cached_prompt_tokens(response_usage),
+        }
+
     def _classify_single_status(
         self, status: str, **kwargs
     ) -> tuple[Dict[str, str], Dict[str, int]]:
-        response = self.client.chat.completions.create(
-            model=os.getenv("OPENAI_FINE_TUNED_MODEL"),
-            messages=self.__generate_messages(status, **kwargs),
-            tools=self.__get_function_schema(),
-            temperature=0.0,
-            max_tokens=10_000,
+        response = self.resilience.call(
+            self.client.chat.completions.create,
+            self.__build_request(status, **kwargs),
+            count_tokens=get_total_tokens,
         )
 
+        return self.__parse_response(response)
+
+    async def _aclassify_single_status(
+        self, status: str, **kwargs
+    ) -> tuple[Dict[str, str], Dict[str, int]]:
+        response = await self.resilience.acall(
+            self.async_client.chat.completions.create,
+            self.__build_request(status, **kwargs),
+            count_tokens=get_total_tokens,
+        )
+
+        return self.__parse_response(response)
+
+    def __build_request(self, status: str, **kwargs) -> Dict:
+        static_request = self._get_static_request(
+            kwargs["status_categories_dict"], self.__build_static_request
+        )
+
+        return {
+            **static_request,
+            "model": os.getenv("OPENAI_FINE_TUNED_MODEL"),
+            "messages": [
+                *static_request["messages"],
+                {
+                    "role": "user",
+                    "content": self._generate_user_prompt(status),
+                },
+            ],
+        }
+
+    def __build_static_request(self, status_categories_dict) -> Dict:
+        # Keep the static system prompt first so OpenAI's prefix cache applies
+        # once the prompt reaches its 1024 token minimum
+        return {
+            "messages": (
+                {
+                    "role": "system",
+                    "content": self._generate_system_prompt(
+                        self.__generate_status_pairs(status_categories_dict)
+                    ),
+                },
+            ),
+            "tools": self.__get_function_schema(),
+            "temperature": 0.0,
+            "max_tokens": 10_000,
+        }
+
+    def __parse_response(self, response) -> tuple[Dict[str, str], Dict[str, int]]:
         # Extract classified_statuses from function definition
         classified_status = json.loads(
             response.choices[0].message.tool_calls[0].function.arguments
@@ -88,25 +211,6 @@ class FTGPTStatusClassifier(LLMStatusClassifier):
             }
         ]
 
-    def __generate_messages(self, status: str, **kwargs) -> List[Dict[str, str]]:
-        messages = [
-            {
-                "role": "system",
-                "content": self._generate_system_prompt(
-                    self.__generate_status_pairs(kwargs["status_categories_dict"])
-                ),
-            },
-        ]
-
-        messages.append(
-            {
-                "role": "user",
-                "content": self._generate_user_prompt(status),
-            }
-        )
-
-        return messages
-
     def _generate_system_prompt(
         self, status_pairs: List[tuple[str, str | None]]
     ) -> str:
@@ -1,33 +1,107 @@
 import os
-from typing import List, Dict
+import json
+from typing import List, Dict, Optional
 from google import genai
 from google.genai import types
 from app.services.status_classification.base import LLMStatusClassifier
-from app.models.status_classification import StatusClassificationResponse
+from app.services.status_classification.http_clients import (
+    get_http_limits,
+    LLM_HTTP_TIMEOUT,
+)
+from app.services.status_classification.resilience import get_provider_resilience
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 
 class GeminiStatusClassifier(LLMStatusClassifier):
+    supports_batching = True
+    max_output_tokens = 8_000
+
     def __init__(self):
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
+        self.client = genai.Client(
+            api_key=GEMINI_API_KEY,
+            http_options=types.HttpOptions(
+                # The SDK expects the timeout in milliseconds
+                timeout=int(LLM_HTTP_TIMEOUT * 1000),
+                client_args={"limits": get_http_limits()},
+                async_client_args={"limits": get_http_limits()},
+            ),
+        )
+        self.resilience = get_provider_resilience("gemini")
 
     def classify(
         self, statuses: List[str], **kwargs
     ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return self._classify_in_chunks(statuses, self.__classify_chunk, **kwargs)
 
-        response = self.client.models.generate_content(
-            model="gemini-2.0-flash-lite",
-            contents=self.__generate_contents(statuses),
-            config=types.GenerateContentConfig(
-                system_instruction=self._generate_system_prompt(
-                    kwargs["status_categories_dict"]
-                ),
-                max_output_tokens=8_000,
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return await self._aclassify_in_chunks(
+            statuses, self.__aclassify_chunk, **kwargs
+        )
+
+    def __classify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+
+        response = self.resilience.call(
+            self.client.models.generate_content,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=self.__count_tokens,
+        )
+
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def __aclassify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+
+        # `client.aio` exposes the same API backed by the SDK's async transport
+        response = await self.resilience.acall(
+            self.client.aio.models.generate_content,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=self.__count_tokens,
+        )
+
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.client.aio.aclose()
+
+    def __build_request(self, statuses: List[str], **kwargs) -> Dict:
+        static_request = self._get_static_request(
+            kwargs["status_categories_dict"], self.__build_static_request
+        )
+
+        # The static system instruction precedes the statuses, so repeated
+        # calls share a prefix. Gemini only caches it implicitly on 2.5 models
+        # and from 1024 tokens, so with this model `cached_content_token_count`
+        # stays 0
+        return {**static_request, "contents": self.__generate_contents(statuses)}
+
+    def __build_static_request(self, status_categories_dict) -> Dict:
+        return {
+            "model": "gemini-2.0-flash-lite",
+            "config": types.GenerateContentConfig(
+                system_instruction=self._generate_system_prompt(status_categories_dict),
+                max_output_tokens=self.max_output_tokens,
                 temperature=0.0,
                 response_mime_type="application/json",
-                response_schema=list[StatusClassificationResponse],
+                response_json_schema=self._get_pair_codes_schema(
+                    status_categories_dict
+                ),
             ),
+        }
+
+    def __parse_response(
+        self, response, statuses: List[str], **kwargs
+    ) -> tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+        classified_statuses = self._decode_pair_codes(
+            statuses,
+            json.loads(response.text)["classified_statuses"],
+            kwargs["status_categories_dict"],
         )
 
         # Extract token usage from response
@@ -35,9 +109,15 @@ class GeminiStatusClassifier(LLMStatusClassifier):
             "prompt_token_count": response.usage_metadata.prompt_token_count,
             "candidates_token_count": response.usage_metadata.candidates_token_count,
             "total_token_count": response.usage_metadata.total_token_count,
+            # Prompt tokens served from Gemini's implicit prefix cache
+            "cached_content_token_count": response.usage_metadata.cached_content_token_count
+            or 0,
         }
 
-        return response.parsed, tokens_used
+        return classified_statuses, tokens_used
+
+    def __count_tokens(self, response) -> int:
+        return response.usage_metadata.total_token_count
 
     def __generate_contents(self, statuses: List[str]) -> List[str]:
-        return [self._generate_primary_user_prompt(status) for status in statuses]
+        return [self._generate_primary_user_prompt(statuses)]
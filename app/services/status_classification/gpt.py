@@ -1,100 +1,159 @@
 import os
 import json
-from typing import List, Dict
-from openai import OpenAI
+from typing import List, Dict, Optional
+from openai import OpenAI, AsyncOpenAI
 from app.services.status_classification.base import LLMStatusClassifier
+from app.services.status_classification.http_clients import (
+    build_http_client,
+    build_async_http_client,
+)
+from app.services.status_classification.resilience import get_provider_resilience
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
+def get_cached_prompt_tokens(usage) -> int:
+    """Number of prompt tokens OpenAI served from its prompt prefix cache."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def get_total_tokens(response) -> int:
+    return response.usage.total_tokens
+
+
 class GPTStatusClassifier(LLMStatusClassifier):
+    supports_batching = True
+    max_output_tokens = 10_000
+
     def __init__(self):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        # Retries are left to the shared resilience policy of the provider
+        self.client = OpenAI(
+            api_key=OPENAI_API_KEY, http_client=build_http_client(), max_retries=0
+        )
+        self.async_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY, http_client=build_async_http_client(), max_retries=0
+        )
+        self.resilience = get_provider_resilience("openai")
 
     def classify(
         self, statuses: List[str], **kwargs
     ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return self._classify_in_chunks(statuses, self.__classify_chunk, **kwargs)
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        return await self._aclassify_in_chunks(
+            statuses, self.__aclassify_chunk, **kwargs
+        )
+
+    def __classify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+
+        response = self.resilience.call(
+            self.client.chat.completions.create,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=get_total_tokens,
+        )
+
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def __aclassify_chunk(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=self.__generate_messages(statuses, **kwargs),
-            tools=self.__get_function_schema(),
-            temperature=0.0,
-            max_tokens=10_000,
+        response = await self.resilience.acall(
+            self.async_client.chat.completions.create,
+            self.__build_request(statuses, **kwargs),
+            count_tokens=get_total_tokens,
         )
 
-        # Extract classified_statuses from function definition
-        classified_statuses = json.loads(
-            response.choices[0].message.tool_calls[0].function.arguments
-        )["classified_statuses"]
+        return self.__parse_response(response, statuses, **kwargs)
+
+    def build_batch_request(self, statuses: List[str], **kwargs) -> Dict:
+        """Request of one chunk in the Batch API, the same as a live call."""
+        return self.__build_request(statuses, **kwargs)
+
+    def parse_batch_response(
+        self, response, statuses: List[str], **kwargs
+    ) -> tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+        return self.__parse_response(response, statuses, **kwargs)
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.close()
+
+    def __build_request(self, statuses: List[str], **kwargs) -> Dict:
+        static_request = self._get_static_request(
+            kwargs["status_categories_dict"], self.__build_static_request
+        )
+
+        return {
+            **static_request,
+            "messages": [
+                *static_request["messages"],
+                *self.__generate_messages(statuses),
+            ],
+        }
+
+    def __build_static_request(self, status_categories_dict) -> Dict:
+        # OpenAI caches the longest prompt prefix it has seen recently, so the
+        # static system prompt goes first and the statuses last. Prefixes are
+        # only cached from 1024 tokens, more than the default taxonomy's prompt
+        # (about 520), so `cached_tokens` stays 0 until the taxonomy grows
+        return {
+            "model": "gpt-4o-mini",
+            "messages": (
+                {
+                    "role": "system",
+                    "content": self._generate_system_prompt(status_categories_dict),
+                },
+            ),
+            "tools": self.__get_function_schema(status_categories_dict),
+            "temperature": 0.0,
+            "max_tokens": self.max_output_tokens,
+        }
+
+    def __parse_response(
+        self, response, statuses: List[str], **kwargs
+    ) -> tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+        # Extract the pair codes from function arguments
+        classified_statuses = self._decode_pair_codes(
+            statuses,
+            json.loads(response.choices[0].message.tool_calls[0].function.arguments)[
+                "classified_statuses"
+            ],
+            kwargs["status_categories_dict"],
+        )
 
         # Extract token usage from response
         tokens_used = {
             "prompt_tokens": response.usage.prompt_tokens,
             "completion_tokens": response.usage.completion_tokens,
             "total_tokens": response.usage.total_tokens,
+            "cached_tokens": get_cached_prompt_tokens(response.usage),
         }
 
         return classified_statuses, tokens_used
 
-    def __get_function_schema(self) -> List[Dict]:
+    def __get_function_schema(self, status_categories_dict) -> List[Dict]:
         return [
             {
                 "type": "function",
                 "function": {
                     "name": "classify_statuses",
-                    "description": "Get an array of statuses classified by status type and substatus type",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "classified_statuses": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "status_name": {
-                                            "type": "string",
-                                            "description": "Name of status",
-                                        },
-                                        "status_type": {
-                                            "type": "string",
-                                            "description": "Status type of status",
-                                        },
-                                        "substatus_type": {
-                                            "type": "string",
-                                            "description": "Substatus type of status",
-                                        },
-                                    },
-                                    "required": [
-                                        "status_name",
-                                        "status_type",
-                                    ],
-                                },
-                            }
-                        },
-                    },
+                    "description": "Get the pair code of each numbered status",
+                    "parameters": self._get_pair_codes_schema(status_categories_dict),
                 },
             }
         ]
 
-    def __generate_messages(
-        self, statuses: List[str], **kwargs
-    ) -> List[Dict[str, str]]:
-        messages = [
+    def __generate_messages(self, statuses: List[str]) -> List[Dict[str, str]]:
+        return [
             {
-                "role": "system",
-                "content": self._generate_system_prompt(
-                    kwargs["status_categories_dict"]
-                ),
-            },
+                "role": "user",
+                "content": self._generate_primary_user_prompt(statuses),
+            }
         ]
-
-        for status in statuses:
-            messages.append(
-                {
-                    "role": "user",
-                    "content": self._generate_primary_user_prompt(status),
-                }
-            )
-
-        return messages
@@ -0,0 +1,31 @@
+import os
+import httpx
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+
+
+def get_http_limits() -> httpx.Limits:
+    """Connection pool limits shared by every LLM provider client."""
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_HTTP_TIMEOUT, connect=LLM_HTTP_CONNECT_TIMEOUT)
+
+
+def build_http_client() -> httpx.Client:
+    return httpx.Client(limits=get_http_limits(), timeout=get_http_timeout())
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(limits=get_http_limits(), timeout=get_http_timeout())
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+from app.redis import sync_redis_client
+from app.services.status_classification.base import align_classified_statuses
+from app.services.status_classification.cache import normalize_status
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.rules import status_rule_engine
+
+STATUS_JOB_CHUNK_SIZE = int(os.getenv("STATUS_JOB_CHUNK_SIZE", "100"))
+STATUS_JOB_MAX_STATUSES = int(os.getenv("STATUS_JOB_MAX_STATUSES", "500000"))
+STATUS_JOB_TTL = int(os.getenv("STATUS_JOB_TTL", str(7 * 24 * 3600)))
+
+# Stores a chunk outcome and bumps the job counters only if the chunk has none
+# yet, so retried tasks cannot count a chunk twice.
+# KEYS: chunk, job. ARGV: outcome, ttl, chunk counter, processed statuses
+SAVE_CHUNK_SCRIPT = """
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "EX", ARGV[2]) then
+    redis.call("HINCRBY", KEYS[2], ARGV[3], 1)
+    redis.call("HINCRBY", KEYS[2], "processed_statuses", ARGV[4])
+    return 1
+end
+return 0
+"""
+
+
+class JobStoreUnavailableError(Exception):
+    """Raised when bulk jobs are used without a configured Redis."""
+
+    def __init__(self):
+        super().__init__("Bulk classification jobs require REDIS_URL to be set.")
+
+
+class StatusClassificationJobStore:
+    """
+    Keeps the progress and the per-chunk results of bulk classification jobs
+    in Redis, where every Celery worker can update them.
+
+    A job is a hash at `status_job:<id>` and each finished chunk is a JSON list
+    at `status_job:<id>:chunk:<index>`. Jobs in batch mode also keep their
+    uploaded chunks at `status_job:<id>:input:<index>` and their provider batch
+    at `status_job:<id>:batch` until the batch has ended.
+    """
+
+    def __init__(self, redis_client, ttl: int = STATUS_JOB_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+
+    def _client(self):
+        if self.redis is None:
+            raise JobStoreUnavailableError()
+        return self.redis
+
+    def _job_key(self, job_id: str) -> str:
+        return f"status_job:{job_id}"
+
+    def _chunk_key(self, job_id: str, chunk_index: int) -> str:
+        return f"status_job:{job_id}:chunk:{chunk_index}"
+
+    def _input_key(self, job_id: str, chunk_index: int) -> str:
+        return f"status_job:{job_id}:input:{chunk_index}"
+
+    def _batch_key(self, job_id: str) -> str:
+        return f"status_job:{job_id}:batch"
+
+    def create_job(self, llm: str, mode: str = "online") -> str:
+        job_id = uuid.uuid4().hex
+        key = self._job_key(job_id)
+        pipe = self._client().pipeline()
+        pipe.hset(
+            key,
+            mapping={
+                "llm": llm,
+                "mode": mode,
+                "state": "receiving",
+                "created_at": int(time.time()),
+                "total_statuses": 0,
+                "total_chunks": 0,
+                "processed_statuses": 0,
+                "completed_chunks": 0,
+                "failed_chunks": 0,
+            },
+        )
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+        return job_id
+
+    def finish_upload(self, job_id: str, total_chunks: int, total_statuses: int):
+        """Mark the upload as complete once every chunk has been dispatched."""
+        self._client().hset(
+            self._job_key(job_id),
+            mapping={
+                "state": "running",
+                "total_chunks": total_chunks,
+                "total_statuses": total_statuses,
+            },
+        )
+
+    def get_state(self, job_id: str) -> Optional[str]:
+        state = self._client().hget(self._job_key(job_id), "state")
+        return state.decode() if state is not None else None
+
+    def fail_upload(self, job_id: str, error: str):
+        self._client().hset(
+            self._job_key(job_id), mapping={"state": "failed", "error": error}
+        )
+
+    def save_chunk_input(
+        self, job_id: str, chunk_index: int, offset: int, statuses: List[str]
+    ) -> None:
+        """Keep an uploaded chunk until it is sent in a provider batch."""
+        self._client().set(
+            self._input_key(job_id, chunk_index),
+            json.dumps({"offset": offset, "statuses": statuses}),
+            ex=self.ttl,
+        )
+
+    def get_chunk_input(self, job_id: str, chunk_index: int) -> Optional[Dict]:
+        raw_input = self._client().get(self._input_key(job_id, chunk_index))
+        return json.loads(raw_input) if raw_input is not None else None
+
+    def save_batch(self, job_id: str, batch: Dict) -> None:
+        """
+        Remember the provider batch of a job, with the chunks it contains and
+        the categories its pair codes refer to.
+        """
+        pipe = self._client().pipeline()
+        pipe.set(self._batch_key(job_id), json.dumps(batch), ex=self.ttl)
+        pipe.hset(self._job_key(job_id), "batch_id", batch["batch_id"])
+        pipe.execute()
+
+    def get_batch(self, job_id: str) -> Optional[Dict]:
+        raw_batch = self._client().get(self._batch_key(job_id))
+        return json.loads(raw_batch) if raw_batch is not None else None
+
+    def save_chunk_result(
+        self, job_id: str, chunk_index: int, results: List[Dict]
+    ) -> bool:
+        """Store the results of a chunk, unless it already has an outcome."""
+        return self.__save_chunk(
+            job_id, chunk_index, results, "completed_chunks", len(results)
+        )
+
+    def save_chunk_error(self, job_id: str, chunk_index: int, error: str) -> bool:
+        """Store the error of a chunk, unless it already has an outcome."""
+        return self.__save_chunk(
+            job_id, chunk_index, {"error": error}, "failed_chunks", 0
+        )
+
+    def __save_chunk(
+        self, job_id: str, chunk_index: int, outcome, counter: str, processed: int
+    ) -> bool:
+        save_chunk = self._client().register_script(SAVE_CHUNK_SCRIPT)
+        saved = save_chunk(
+            keys=[self._chunk_key(job_id, chunk_index), self._job_key(job_id)],
+            args=[json.dumps(outcome), self.ttl, counter, processed],
+        )
+        return bool(saved)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        raw_job = self._client().hgetall(self._job_key(job_id))
+        if not raw_job:
+            return None
+
+        job = {key.decode(): value.decode() for key, value in raw_job.items()}
+        for field in (
+            "created_at",
+            "total_statuses",
+            "total_chunks",
+            "processed_statuses",
+            "completed_chunks",
+            "failed_chunks",
+        ):
+            job[field] = int(job[field])
+
+        finished_chunks = job["completed_chunks"] + job["failed_chunks"]
+        if job["state"] == "running" and finished_chunks >= job["total_chunks"]:
+            job["state"] = "completed" if not job["failed_chunks"] else "partial"
+
+        return {"job_id": job_id, **job}
+
+    def iter_results(self, job_id: str, total_chunks: int) -> Iterator[Dict]:
+        """
+        Yield the classified statuses of every finished chunk in input order,
+        tagged with their position in the upload.
+        """
+        for chunk_index in range(total_chunks):
+            raw_chunk = self._client().get(self._chunk_key(job_id, chunk_index))
+            if raw_chunk is None:
+                continue
+
+            chunk = json.loads(raw_chunk)
+            if isinstance(chunk, dict):
+                yield {"chunk": chunk_index, **chunk}
+                continue
+
+            for result in chunk:
+                yield result
+
+
+def classify_job_chunk(
+    statuses: List[str],
+    llm: str,
+    status_categories_dict: Dict[str, List[Optional[str]]],
+) -> List[Dict]:
+    """
+    Classify one chunk of a bulk job: rule matches are answered locally and
+    each distinct remaining status is sent to the LLM once. Statuses the model
+    leaves out are returned with an `error` instead of a classification.
+    """
+    results, pending = match_job_chunk_rules(statuses, status_categories_dict)
+
+    if pending:
+        classifier = LLMStatusClassifierFactory.get_classifier(llm)
+        classified_statuses, _ = classifier.classify(
+            get_pending_statuses(statuses, pending),
+            status_categories_dict=status_categories_dict,
+        )
+        fill_job_chunk_results(statuses, results, pending, classified_statuses)
+
+    return results
+
+
+def match_job_chunk_rules(
+    statuses: List[str], status_categories_dict: Dict[str, List[Optional[str]]]
+) -> tuple[List[Optional[Dict]], Dict[str, List[int]]]:
+    """
+    Answer the rule matches of a chunk. Returns the results, with None for the
+    rest, and the positions of each distinct remaining status.
+    """
+    results: List[Optional[Dict]] = [None] * len(statuses)
+    pending: Dict[str, List[int]] = {}
+
+    for i, status in enumerate(statuses):
+        normalized = normalize_status(status)
+        ruled = status_rule_engine.match(normalized, status_categories_dict)
+        if ruled:
+            results[i] = {"status_name": status, **ruled, "source": "rules"}
+        else:
+            pending.setdefault(normalized, []).append(i)
+
+    return results, pending
+
+
+def get_pending_statuses(
+    statuses: List[str], pending: Dict[str, List[int]]
+) -> List[str]:
+    """The distinct statuses of a chunk to send to the LLM, in `pending` order."""
+    return [statuses[indices[0]] for indices in pending.values()]
+
+
+def fill_job_chunk_results(
+    statuses: List[str],
+    results: List[Optional[Dict]],
+    pending: Dict[str, List[int]],
+    classified_statuses: List,
+) -> None:
+    """Copy the LLM results of the pending statuses into `results`, in place."""
+    aligned = align_classified_statuses(
+        get_pending_statuses(statuses, pending), classified_statuses
+    )
+
+    for indices, item in zip(pending.values(), aligned):
+        for i in indices:
+            if item is None:
+                results[i] = {"status_name": statuses[i], "error": "not classified"}
+                continue
+            results[i] = {
+                "status_name": statuses[i],
+                "status_type": item["status_type"],
+                "substatus_type": item.get("substatus_type"),
+                "source": item.get("source") or "llm",
+            }
+
+
+job_store = StatusClassificationJobStore(sync_redis_client)
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import asyncio
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from app.services.status_classification.base import LLMStatusClassifier
+from app.services.status_classification.cache import normalize_status
+
+LOCAL_CLASSIFIER_MODEL_PATH = os.getenv("LOCAL_CLASSIFIER_MODEL_PATH")
+DEFAULT_LABEL = ("Transit", None)
+
+
+class LocalModelNotTrainedError(Exception):
+    """Raised when the local classifier is used before a model is trained."""
+
+    def __init__(self):
+        super().__init__(
+            "The local status classifier has no trained model. "
+            "Set LOCAL_CLASSIFIER_MODEL_PATH to a model trained from classified statuses."
+        )
+
+
+class TfidfNearestCentroidModel:
+    """
+    Character n-gram TF-IDF vectorizer with a nearest-centroid classifier.
+
+    Every (status_type, substatus_type) pair seen in training gets a centroid,
+    the L2-normalized mean of its statuses' TF-IDF vectors. A status is labelled
+    with the centroid of highest cosine similarity, which doubles as its
+    confidence score.
+    """
+
+    def __init__(self, ngram_range: tuple[int, int] = (2, 4)):
+        self.ngram_range = ngram_range
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.labels: List[tuple[str, Optional[str]]] = []
+
+    def _ngrams(self, status: str) -> Iterable[str]:
+        text = f" {normalize_status(status)} "
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                yield text[i : i + n]
+
+    def _transform(self, statuses: List[str]) -> tuple[np.ndarray, ...]:
+        """
+        Vectorize statuses into a sparse COO matrix given as (rows, cols, values)
+        with L2-normalized rows.
+        """
+        rows, cols = [], []
+        for row, status in enumerate(statuses):
+            for gram in self._ngrams(status):
+                col = self.vocabulary.get(gram)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+
+        # Collapse repeated (row, col) entries into counts
+        flat = rows * len(self.vocabulary) + cols
+        flat, counts = np.unique(flat, return_counts=True)
+        rows, cols = np.divmod(flat, max(len(self.vocabulary), 1))
+
+        values = (1 + np.log(counts)).astype(np.float32) * self.idf[cols]
+        norms = np.zeros(len(statuses), dtype=np.float32)
+        np.add.at(norms, rows, values**2)
+        values /= np.sqrt(norms[rows])
+
+        return rows, cols, values
+
+    def fit(
+        self, statuses: List[str], labels: List[tuple[str, Optional[str]]]
+    ) -> "TfidfNearestCentroidModel":
+        documents = [set(self._ngrams(status)) for status in statuses]
+        self.vocabulary = {
+            gram: i for i, gram in enumerate(sorted(set().union(*documents)))
+        }
+
+        document_frequency = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for grams in documents:
+            document_frequency[[self.vocabulary[gram] for gram in grams]] += 1
+        self.idf = np.log((1 + len(statuses)) / (1 + document_frequency)) + 1
+
+        self.labels = sorted(set(labels), key=lambda label: (label[0], label[1] or ""))
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        targets = np.asarray([label_index[label] for label in labels])
+
+        rows, cols, values = self._transform(statuses)
+        self.centroids = np.zeros(
+            (len(self.labels), len(self.vocabulary)), dtype=np.float32
+        )
+        np.add.at(self.centroids, (targets[rows], cols), values)
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self.centroids /= np.where(norms == 0, 1, norms)
+
+        return self
+
+    def predict(
+        self,
+        statuses: List[str],
+        allowed_labels: Optional[set] = None,
+    ) -> tuple[List[tuple[str, Optional[str]]], np.ndarray]:
+        """Return the best label and its cosine similarity for each status."""
+        rows, cols, values = self._transform(statuses)
+
+        scores = np.zeros((len(statuses), len(self.labels)), dtype=np.float32)
+        np.add.at(scores, rows, values[:, None] * self.centroids[:, cols].T)
+
+        if allowed_labels is not None:
+            mask = np.asarray([label in allowed_labels for label in self.labels])
+            scores[:, ~mask] = -1
+
+        best = scores.argmax(axis=1)
+        confidences = np.clip(scores[np.arange(len(statuses)), best], 0, 1)
+
+        return [self.labels[i] for i in best], confidences
+
+    def save(self, path: str) -> None:
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path,
+            ngram_range=np.asarray(self.ngram_range),
+            vocabulary=np.asarray(vocabulary, dtype=str),
+            idf=self.idf,
+            centroids=self.centroids,
+            labels=np.asarray([json.dumps(label) for label in self.labels]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfNearestCentroidModel":
+        with np.load(path) as data:
+            model = cls(ngram_range=tuple(int(n) for n in data["ngram_range"]))
+            model.vocabulary = {
+                str(gram): i for i, gram in enumerate(data["vocabulary"])
+            }
+            model.idf = data["idf"]
+            model.centroids = data["centroids"]
+            model.labels = [tuple(json.loads(label)) for label in data["labels"]]
+        return model
+
+
+class LocalStatusClassifier(LLMStatusClassifier):
+    """
+    Classifies statuses fully in-process with a model trained from previously
+    classified statuses. No network calls and no tokens are spent.
+    """
+
+    def __init__(self, model: Optional[TfidfNearestCentroidModel] = None):
+        if model is None and LOCAL_CLASSIFIER_MODEL_PATH:
+            model = TfidfNearestCentroidModel.load(LOCAL_CLASSIFIER_MODEL_PATH)
+        self.model = model
+
+    def classify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        if self.model is None:
+            raise LocalModelNotTrainedError()
+
+        allowed_labels = {
+            (status_type, substatus_type)
+            for status_type, substatus_types in kwargs["status_categories_dict"].items()
+            for substatus_type in substatus_types
+        }
+        labels, confidences = self.model.predict(statuses, allowed_labels)
+
+        classified_statuses = []
+        for status, label, confidence in zip(statuses, labels, confidences):
+            # Nothing in common with any known status: use the same default
+            # pair the LLM prompts fall back to
+            if confidence == 0 and DEFAULT_LABEL in allowed_labels:
+                label = DEFAULT_LABEL
+
+            classified_statuses.append(
+                {
+                    "status_name": status,
+                    "status_type": label[0],
+                    "substatus_type": label[1],
+                    "confidence": round(float(confidence), 4),
+                }
+            )
+
+        return classified_statuses, {}
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        # Vectorizing is CPU bound, so keep it off the event loop
+        return await asyncio.to_thread(self.classify, statuses, **kwargs)
+
+
+def train_from_jsonl(training_path: str, model_path: str) -> TfidfNearestCentroidModel:
+    """
+    Train a model from a JSON lines file of classified statuses, i.e. objects
+    with `status_name`, `status_type` and `substatus_type`, and save it.
+    """
+    statuses, labels = [], []
+    with open(training_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            statuses.append(row["status_name"])
+            labels.append((row["status_type"], row.get("substatus_type")))
+
+    model = TfidfNearestCentroidModel().fit(statuses, labels)
+    model.save(model_path)
+    return model
+
+
+if __name__ == "__main__":
+    # python -m app.services.status_classification.local <training.jsonl> <model.npz>
+    train_from_jsonl(sys.argv[1], sys.argv[2])
@@ -0,0 +1,349 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+import httpx
+import openai
+import anthropic
+
+LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY_MS = float(os.getenv("LLM_RETRY_BASE_DELAY_MS", "500"))
+LLM_RETRY_MAX_DELAY_MS = float(os.getenv("LLM_RETRY_MAX_DELAY_MS", "8000"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+# Longest a call may wait for rate limit capacity before it is rejected
+LLM_RATE_LIMIT_MAX_WAIT_MS = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT_MS", "2000"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(
+            f"Provider '{provider}' is unavailable after repeated failures. "
+            f"Retry in {retry_after:.0f}s."
+        )
+
+
+class ProviderRateLimitedError(Exception):
+    """Raised when the rate limit of a provider leaves no capacity for a call."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(
+            f"Rate limit of provider '{provider}' reached. "
+            f"Retry in {retry_after:.0f}s."
+        )
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an OpenAI, Anthropic or Gemini SDK error, if it has one."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and isinstance(getattr(error, "code", None), int):
+        status_code = error.code
+    return status_code
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(
+        error, (openai.APIConnectionError, anthropic.APIConnectionError)
+    ) or isinstance(error, httpx.TransportError):
+        return True
+    return get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait in its `Retry-After` header."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate_per_minute`, holding at most one
+    minute worth of capacity.
+
+    `reserve` takes the capacity up front, even into debt, and returns how long
+    the caller has to wait before using it. That way sync and async callers
+    share one bucket and queue up fairly.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self._available = float(rate_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        """Reserve `amount` and return the wait in seconds, or None if over `max_wait`."""
+        # A call larger than the bucket would otherwise never fit
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(
+                self.capacity, self._available + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+
+            wait = max(0.0, (amount - self._available) / self.rate)
+            if wait > max_wait:
+                return None
+
+            self._available -= amount
+            return wait
+
+    def adjust(self, amount: float) -> None:
+        """Take (or give back, if negative) capacity after the fact."""
+        with self._lock:
+            self._available = min(self.capacity, self._available - amount)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. Then a single trial call is let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> Optional[float]:
+        """Return None if a call may go ahead, else the seconds until it may."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return None
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return None
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Let another trial call through after one ended without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ProviderResilience:
+    """
+    Wraps the calls to one LLM provider with rate limiting (requests and tokens
+    per minute), bounded retries with full-jitter exponential backoff on
+    retryable errors, and a circuit breaker.
+
+    The SDK clients are built with their own retries disabled so that this is
+    the only retry layer.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_attempts: int = LLM_RETRY_MAX_ATTEMPTS,
+        base_delay: float = LLM_RETRY_BASE_DELAY_MS / 1000,
+        max_delay: float = LLM_RETRY_MAX_DELAY_MS / 1000,
+        max_wait: float = LLM_RATE_LIMIT_MAX_WAIT_MS / 1000,
+        failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = LLM_CIRCUIT_RESET_SECONDS,
+    ):
+        self.provider = provider
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # At least the call itself, or `call` would return None without trying
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def call(
+        self,
+        create: Callable[..., Any],
+        request: Dict,
+        count_tokens: Optional[Callable[[Any], int]] = None,
+    ) -> Any:
+        """Call `create(**request)` with rate limiting, retries and the breaker."""
+        for attempt in range(self.max_attempts):
+            time.sleep(self._before_call(request))
+            try:
+                response = create(**request)
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.circuit_breaker.release_trial()
+                raise
+
+            self._after_success(request, response, count_tokens)
+            return response
+
+    async def acall(
+        self,
+        create: Callable[..., Any],
+        request: Dict,
+        count_tokens: Optional[Callable[[Any], int]] = None,
+    ) -> Any:
+        """Async counterpart of `call` for coroutine `create` functions."""
+        for attempt in range(self.max_attempts):
+            await asyncio.sleep(self._before_call(request))
+            try:
+                response = await create(**request)
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # e.g. a hedged call that lost the race
+                self.circuit_breaker.release_trial()
+                raise
+
+            self._after_success(request, response, count_tokens)
+            return response
+
+    def _before_call(self, request: Dict) -> float:
+        """Check the breaker and reserve rate limit capacity, returning the wait."""
+        retry_after = self.circuit_breaker.allow()
+        if retry_after is not None:
+            raise ProviderUnavailableError(self.provider, retry_after)
+
+        waits = []
+        for bucket, amount in (
+            (self.requests, 1),
+            (self.tokens, self._estimate_tokens(request)),
+        ):
+            if bucket is None:
+                continue
+            wait = bucket.reserve(amount, self.max_wait)
+            if wait is None:
+                # Give back what was already reserved for this call
+                if bucket is self.tokens and self.requests is not None:
+                    self.requests.adjust(-1)
+                raise ProviderRateLimitedError(self.provider, self.max_wait)
+            waits.append(wait)
+
+        return max(waits, default=0.0)
+
+    def _after_success(
+        self, request: Dict, response: Any, count_tokens: Optional[Callable]
+    ) -> None:
+        self.circuit_breaker.record_success()
+        if self.tokens is not None and count_tokens is not None:
+            # Settle the estimate against the tokens the provider reports
+            self.tokens.adjust(count_tokens(response) - self._estimate_tokens(request))
+
+    def _after_failure(self, error: Exception, attempt: int) -> float:
+        """Re-raise `error` unless it should be retried, else return the backoff."""
+        if not is_retryable(error):
+            # The provider answered, the request itself was wrong
+            self.circuit_breaker.record_success()
+            raise error
+
+        self.circuit_breaker.record_failure()
+        retry_after = get_retry_after(error)
+        # A Retry-After longer than our own backoff would hold the caller (often
+        # a request handler) for as long, so give up and pass it on instead
+        if attempt + 1 >= self.max_attempts or (retry_after or 0.0) > self.max_delay:
+            if get_status_code(error) == 429:
+                raise ProviderRateLimitedError(
+                    self.provider, retry_after or self.max_delay
+                ) from error
+            raise error
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        delay = max(delay, retry_after or 0.0)
+        logger.warning(
+            "Retrying %s in %.2fs after attempt %d failed: %s",
+            self.provider,
+            delay,
+            attempt + 1,
+            error,
+        )
+        return delay
+
+    def _estimate_tokens(self, request: Dict) -> int:
+        # Roughly four characters per token, counting the prompt only
+        return (
+            sum(
+                len(str(value))
+                for name, value in request.items()
+                if name in ("messages", "system", "contents", "tools")
+            )
+            // 4
+        )
+
+
+_providers: Dict[str, ProviderResilience] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider_resilience(provider: str) -> ProviderResilience:
+    """
+    Shared resilience policy of a provider ("openai", "anthropic" or "gemini"),
+    so that every classifier using it draws on the same limits and breaker.
+    Limits come from `<PROVIDER>_RATE_LIMIT_RPM` and `<PROVIDER>_RATE_LIMIT_TPM`,
+    where 0 (the default) means no limit.
+    """
+    with _providers_lock:
+        if provider not in _providers:
+            prefix = provider.upper()
+            _providers[provider] = ProviderResilience(
+                provider,
+                requests_per_minute=float(os.getenv(f"{prefix}_RATE_LIMIT_RPM", "0")),
+                tokens_per_minute=float(os.getenv(f"{prefix}_RATE_LIMIT_TPM", "0")),
+            )
+        return _providers[provider]
+
+
+def reset_provider_resilience() -> None:
+    """Forget the shared policies, e.g. between tests."""
+    with _providers_lock:
+        _providers.clear()
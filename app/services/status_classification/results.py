@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import Session
+from app.models.status_classification_record import StatusClassificationRecord
+from app.services.status_classification.cache import normalize_status
+
+logger = logging.getLogger(__name__)
+
+
+def hash_cache_key(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class StatusClassificationResultStore:
+    """
+    Durable store of classification results in the `status_classifications`
+    table, looked up when a status is in neither the rules nor the cache.
+
+    Rows are keyed by the hash of the classification cache key, so results are
+    scoped by model and category set like cached ones. Database errors are
+    logged and treated as misses, as with the Redis tier of the cache.
+    """
+
+    def __init__(self, session_factory=Session):
+        self.session_factory = session_factory
+
+    async def get_many(
+        self, keys: Iterable[str]
+    ) -> Dict[str, Dict[str, Optional[str]]]:
+        """Return the stored results of the given cache keys, skipping misses."""
+        hashes = {hash_cache_key(key): key for key in keys}
+        if not hashes:
+            return {}
+
+        try:
+            rows = await asyncio.to_thread(self._select, list(hashes))
+        except SQLAlchemyError:
+            logger.warning("Reading stored classifications failed", exc_info=True)
+            return {}
+
+        return {
+            hashes[row.hash]: {
+                "status_type": row.status_type,
+                "substatus_type": row.substatus_type,
+            }
+            for row in rows
+        }
+
+    async def set_many(
+        self,
+        results: Dict[str, Dict[str, Optional[str]]],
+        statuses: Dict[str, str],
+        model: str,
+        taxonomy_hash: str,
+    ) -> None:
+        """Upsert the results of the given cache keys, whose statuses are in `statuses`."""
+        rows = [
+            {
+                "hash": hash_cache_key(key),
+                "status": normalize_status(statuses[key]),
+                "status_type": result["status_type"],
+                "substatus_type": result.get("substatus_type"),
+                "model": model,
+                "taxonomy_hash": taxonomy_hash,
+            }
+            for key, result in results.items()
+        ]
+        if not rows:
+            return
+
+        try:
+            await asyncio.to_thread(self._upsert, rows)
+        except SQLAlchemyError:
+            logger.warning("Storing classifications failed", exc_info=True)
+
+    def _select(self, hashes: list[str]):
+        with self.session_factory() as db:
+            return db.execute(
+                select(
+                    StatusClassificationRecord.hash,
+                    StatusClassificationRecord.status_type,
+                    StatusClassificationRecord.substatus_type,
+                ).where(StatusClassificationRecord.hash.in_(hashes))
+            ).all()
+
+    def _upsert(self, rows: list[Dict]) -> None:
+        statement = insert(StatusClassificationRecord).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[StatusClassificationRecord.hash],
+            set_={
+                "status_type": statement.excluded.status_type,
+                "substatus_type": statement.excluded.substatus_type,
+                "updated_at": func.now(),
+            },
+        )
+
+        with self.session_factory() as db:
+            db.execute(statement)
+            db.commit()
+
+
+result_store = StatusClassificationResultStore()
@@ -0,0 +1,222 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, List, Optional
+from app.services.status_classification.base import LLMStatusClassifier
+
+ROUTING_PROVIDERS = os.getenv("ROUTING_PROVIDERS", "gpt,claude,gemini")
+ROUTING_HEDGE_PERCENTILE = float(os.getenv("ROUTING_HEDGE_PERCENTILE", "0.95"))
+# Hedge delay used until a provider has enough latency samples of its own
+ROUTING_DEFAULT_HEDGE_DELAY_MS = float(
+    os.getenv("ROUTING_DEFAULT_HEDGE_DELAY_MS", "3000")
+)
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "20"))
+# How long a backend ranks last after a failed call, unless the error asks for
+# longer (e.g. the `retry_after` of an open circuit)
+ROUTING_FAILURE_COOLDOWN_SECONDS = float(
+    os.getenv("ROUTING_FAILURE_COOLDOWN_SECONDS", "30")
+)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe latency histogram with exponentially growing buckets from 10ms
+    to about 2 minutes.
+
+    Counts are halved every `decay_every` observations so that percentiles
+    follow the recent behaviour of a provider rather than its whole history.
+    """
+
+    def __init__(
+        self,
+        min_seconds: float = 0.01,
+        growth: float = 1.25,
+        bucket_count: int = 43,
+        decay_every: int = 200,
+    ):
+        self.bounds = [min_seconds * growth**i for i in range(bucket_count)]
+        self.counts = [0.0] * (bucket_count + 1)
+        self.decay_every = decay_every
+        self._observations = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if seconds <= bound),
+            len(self.bounds),
+        )
+        with self._lock:
+            self.counts[index] += 1
+            self._observations += 1
+            if self._observations % self.decay_every == 0:
+                self.counts = [count / 2 for count in self.counts]
+
+    @property
+    def count(self) -> float:
+        return sum(self.counts)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile, or None if empty."""
+        with self._lock:
+            total = sum(self.counts)
+            if not total:
+                return None
+
+            cumulative = 0.0
+            for i, count in enumerate(self.counts[:-1]):
+                cumulative += count
+                if cumulative >= percentile * total:
+                    return self.bounds[i]
+
+        # Slower than the last bucket
+        return self.bounds[-1]
+
+
+class RoutingStatusClassifier(LLMStatusClassifier):
+    """
+    Sends each request to the backend with the lowest recent median latency.
+
+    If that backend has not answered by its own p95 latency, the same request
+    is hedged to the next fastest backend and whichever answer arrives first
+    wins; the other call is cancelled. A failed call is retried on the next
+    backend straight away.
+
+    Backends without latency samples rank first, so new or recovered providers
+    are measured before they are trusted or avoided. Only answered or cancelled
+    calls are latency samples: a failure can be instant (e.g. an open circuit)
+    and would make a broken backend look fastest. Instead a failed backend
+    ranks last until its cooldown has passed or it answers again.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, LLMStatusClassifier],
+        hedge_percentile: float = ROUTING_HEDGE_PERCENTILE,
+        default_hedge_delay: float = ROUTING_DEFAULT_HEDGE_DELAY_MS / 1000,
+        min_samples: int = ROUTING_MIN_SAMPLES,
+        failure_cooldown: float = ROUTING_FAILURE_COOLDOWN_SECONDS,
+    ):
+        if not backends:
+            raise ValueError("The routing classifier needs at least one backend")
+
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.failure_cooldown = failure_cooldown
+        self.latencies = {name: LatencyHistogram() for name in backends}
+        # Monotonic time until which each failed backend ranks last
+        self.failed_until: Dict[str, float] = {}
+        self.supports_batching = all(
+            backend.supports_batching for backend in backends.values()
+        )
+
+    def classify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        ranked = self.rank_backends()
+        for name in ranked:
+            started = time.monotonic()
+            try:
+                result = self.backends[name].classify(statuses, **kwargs)
+            except Exception as e:
+                self.record_failure(name, e)
+                if name == ranked[-1]:
+                    raise
+                continue
+
+            self.record_success(name, time.monotonic() - started)
+            return result
+
+    async def aclassify(
+        self, statuses: List[str], **kwargs
+    ) -> tuple[List[Dict[str, str]], Dict[str, int]]:
+        ranked = self.rank_backends()
+        pending: Dict[asyncio.Task, str] = {}
+
+        def start(name: str) -> None:
+            task = asyncio.ensure_future(
+                self.__timed_aclassify(name, statuses, **kwargs)
+            )
+            pending[task] = name
+
+        start(ranked.pop(0))
+        try:
+            while True:
+                hedge_delay = (
+                    self.get_hedge_delay(next(iter(pending.values())))
+                    if ranked and len(pending) == 1
+                    else None
+                )
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # The primary is slower than usual, so hedge
+                    start(ranked.pop(0))
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+                # Fail over to the next backend once nothing is left in flight
+                if not pending:
+                    if not ranked:
+                        raise error
+                    start(ranked.pop(0))
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        # The backends are shared through the factory, which closes them
+        pass
+
+    def rank_backends(self) -> List[str]:
+        """
+        Backend names from fastest to slowest by their recent median latency,
+        with the backends that recently failed last.
+        """
+        now = time.monotonic()
+
+        def rank(name: str) -> tuple[bool, float]:
+            failing = self.failed_until.get(name, 0.0) > now
+            if self.latencies[name].count < self.min_samples:
+                return failing, -1.0
+            return failing, self.latencies[name].percentile(0.5)
+
+        return sorted(self.backends, key=rank)
+
+    def record_success(self, name: str, seconds: float) -> None:
+        self.latencies[name].observe(seconds)
+        self.failed_until.pop(name, None)
+
+    def record_failure(self, name: str, error: Exception) -> None:
+        cooldown = max(self.failure_cooldown, getattr(error, "retry_after", 0.0) or 0.0)
+        self.failed_until[name] = time.monotonic() + cooldown
+
+    def get_hedge_delay(self, name: str) -> float:
+        """Seconds to wait for `name` before hedging to the next backend."""
+        if self.latencies[name].count < self.min_samples:
+            return self.default_hedge_delay
+        return self.latencies[name].percentile(self.hedge_percentile)
+
+    async def __timed_aclassify(self, name: str, statuses: List[str], **kwargs):
+        started = time.monotonic()
+        try:
+            result = await self.backends[name].aclassify(statuses, **kwargs)
+        except asyncio.CancelledError:
+            # A cancelled call still proves the backend was at least this slow
+            self.latencies[name].observe(time.monotonic() - started)
+            raise
+        except Exception as e:
+            self.record_failure(name, e)
+            raise
+
+        self.record_success(name, time.monotonic() - started)
+        return result
@@ -0,0 +1,90 @@
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+STATUS_RULES_PATH = os.getenv("STATUS_RULES_PATH")
+
+# Optional subject and tense around the event, e.g. "package has been"
+_SUBJECT = r"(?:(?:the )?(?:shipment|package|parcel|order|item) )?"
+_TENSE = r"(?:(?:has been|was|is) )?"
+
+# (pattern, status_type, substatus_type), matched in order against the
+# normalized status text. Keep these unambiguous: anything a rule matches never
+# reaches the LLM, and its answer is cached and stored. So the event rules match
+# the whole status, and texts with any other wording ("delivered to wrong
+# address", "will be delivered", "returned to sender - delivered to shipper")
+# are left to the LLM.
+DEFAULT_STATUS_RULES: List[tuple[str, str, Optional[str]]] = [
+    (r"^[\d\s]+$", "Info", None),
+    (
+        rf"^{_SUBJECT}{_TENSE}delivered(?: to (?:recipient|customer|consignee))?\.?$",
+        "Transit",
+        "Delivered",
+    ),
+    (rf"^{_SUBJECT}{_TENSE}cancell?ed\.?$", "Exception", "Cancelled"),
+    (
+        rf"^{_SUBJECT}{_TENSE}returned to (?:sender|shipper|origin)\.?$",
+        "Exception",
+        "Returned",
+    ),
+    (
+        rf"^(?:{_SUBJECT}{_TENSE}picked up(?: by carrier)?|pick ?up confirmed)\.?$",
+        "Transit",
+        "Pick Up Confirmed",
+    ),
+]
+
+
+def load_status_rules(path: Optional[str] = STATUS_RULES_PATH):
+    """
+    Load the rule table from a JSON file of `{"pattern", "status_type",
+    "substatus_type"}` objects, or fall back to the default table.
+    """
+    if not path:
+        return DEFAULT_STATUS_RULES
+
+    with open(path) as f:
+        return [
+            (rule["pattern"], rule["status_type"], rule.get("substatus_type"))
+            for rule in json.load(f)
+        ]
+
+
+class StatusRuleEngine:
+    """
+    Classifies statuses locally with a precompiled pattern table.
+
+    All rules are compiled into a single alternation with one named group per
+    rule, so a status is matched in one regex pass. The leftmost match wins and
+    ties go to the rule listed first.
+    """
+
+    def __init__(self, rules: List[tuple[str, str, Optional[str]]]):
+        self.rules = rules
+        self._pattern = re.compile(
+            "|".join(
+                f"(?P<rule{i}>{pattern})" for i, (pattern, _, _) in enumerate(rules)
+            ),
+            re.IGNORECASE,
+        )
+
+    def match(
+        self, status: str, status_categories_dict: Dict[str, List[Optional[str]]]
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Return the classification of the first rule matching the status, if its
+        pair is valid in the given category dictionary.
+        """
+        match = self._pattern.search(status) if self.rules else None
+        if match is None:
+            return None
+
+        _, status_type, substatus_type = self.rules[int(match.lastgroup[4:])]
+        if substatus_type not in status_categories_dict.get(status_type, []):
+            return None
+
+        return {"status_type": status_type, "substatus_type": substatus_type}
+
+
+status_rule_engine = StatusRuleEngine(load_status_rules())
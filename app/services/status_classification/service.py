@@ -0,0 +1,367 @@
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from app.models.status_classification import (
+    StatusClassificationAPIResponse,
+    StatusClassificationStreamItem,
+)
+from app.services.cache import TwoTierCache
+from app.services.status_classification.base import (
+    DEFAULT_STATUS_PAIR,
+    LLMStatusClassifier,
+    align_classified_statuses,
+)
+from app.services.status_classification.batching import (
+    STATUS_MICRO_BATCH_WAIT_MS,
+    MicroBatcher,
+)
+from app.services.status_classification.cache import (
+    build_cache_key,
+    classification_cache,
+    normalize_status,
+)
+from app.services.status_classification.categories import (
+    get_status_categories_hash,
+)
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.results import (
+    StatusClassificationResultStore,
+    result_store,
+)
+from app.services.status_classification.rules import (
+    StatusRuleEngine,
+    status_rule_engine,
+)
+
+
+class StatusClassificationService:
+    """
+    Classifies statuses through the local rule engine, the cache and the stored
+    results first, and only sends what is left to the requested LLM. New LLM
+    results are written to both the cache and the result store.
+
+    Identical misses are single-flighted: while a (status, llm, category set)
+    is being classified, other requests for it wait on the same upstream call
+    instead of starting their own. Misses of concurrent requests to a batching
+    LLM are micro-batched into a single upstream call.
+    """
+
+    def __init__(
+        self,
+        cache: TwoTierCache,
+        rule_engine: StatusRuleEngine,
+        micro_batch_wait_ms: float = STATUS_MICRO_BATCH_WAIT_MS,
+        result_store: Optional[StatusClassificationResultStore] = None,
+    ):
+        self.cache = cache
+        self.rule_engine = rule_engine
+        self.result_store = result_store
+        self.micro_batch_wait_ms = micro_batch_wait_ms
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # One batcher per LLM, with the hash of the category set it batches for
+        self._batchers: Dict[str, tuple[str, MicroBatcher]] = {}
+
+    async def classify(
+        self,
+        statuses: List[str],
+        llm: str,
+        status_categories_dict: Dict[str, List[Optional[str]]],
+    ) -> StatusClassificationAPIResponse:
+        classifier = LLMStatusClassifierFactory.get_classifier(llm)
+        categories_hash = get_status_categories_hash(status_categories_dict)
+
+        keys = [build_cache_key(status, llm, categories_hash) for status in statuses]
+        ruled = {
+            key: result
+            for status, key in zip(statuses, keys)
+            if (
+                result := self.rule_engine.match(
+                    normalize_status(status), status_categories_dict
+                )
+            )
+        }
+        cached = await self.cache.get_many(key for key in keys if key not in ruled)
+        stored = await self._get_stored(
+            key for key in keys if key not in ruled and key not in cached
+        )
+
+        # Each distinct miss is classified once, by this request or by another
+        # request that is already waiting on the model for it
+        owned = {}
+        waiting = {}
+        for status, key in zip(statuses, keys):
+            if (
+                key in ruled
+                or key in cached
+                or key in stored
+                or key in owned
+                or key in waiting
+            ):
+                continue
+            if key in self._in_flight:
+                waiting[key] = self._in_flight[key]
+            else:
+                self._in_flight[key] = asyncio.get_running_loop().create_future()
+                owned[key] = status
+
+        tokens_used = {}
+        classified = {}
+        if owned:
+            batcher = self._get_batcher(
+                llm, classifier, categories_hash, status_categories_dict
+            )
+            classify_misses = (
+                batcher.aclassify
+                if batcher is not None
+                else partial(
+                    classifier.aclassify,
+                    status_categories_dict=status_categories_dict,
+                )
+            )
+            classified, tokens_used = await self._classify_owned(classify_misses, owned)
+            if self.result_store is not None:
+                await self.result_store.set_many(
+                    classified, owned, llm, categories_hash
+                )
+
+        if waiting:
+            shared = await asyncio.gather(*waiting.values())
+            classified = {
+                **classified,
+                **{
+                    key: result
+                    for key, result in zip(waiting, shared)
+                    if result is not None
+                },
+            }
+
+        stats = {"hits": 0, "coalesced": 0, "misses": 0}
+        results = []
+        for status, key in zip(statuses, keys):
+            if key in ruled:
+                results.append({"status_name": status, **ruled[key], "source": "rules"})
+                continue
+
+            if key in owned:
+                stats["misses"] += 1
+            elif key in waiting:
+                stats["coalesced"] += 1
+            else:
+                stats["hits"] += 1
+
+            if key in cached:
+                results.append(
+                    {"status_name": status, **cached[key], "source": "cache"}
+                )
+            elif key in stored:
+                results.append(
+                    {"status_name": status, **stored[key], "source": "database"}
+                )
+            elif key in classified:
+                results.append(
+                    {"status_name": status, "source": "llm", **classified[key]}
+                )
+            else:
+                results.append(self._default_result(status))
+
+        return StatusClassificationAPIResponse(
+            classified_statuses=results,
+            tokens_used=tokens_used,
+            cache_stats=stats,
+        )
+
+    def _get_batcher(
+        self,
+        llm: str,
+        classifier: LLMStatusClassifier,
+        categories_hash: str,
+        status_categories_dict: Dict[str, List[Optional[str]]],
+    ) -> Optional[MicroBatcher]:
+        if self.micro_batch_wait_ms <= 0 or not classifier.supports_batching:
+            return None
+
+        batcher_hash, batcher = self._batchers.get(llm, (None, None))
+        # Replace the batcher when the factory hands out a new classifier or the
+        # taxonomy changes. The old one still flushes what it has pending, as
+        # its timer keeps it alive, and is then dropped
+        if (
+            batcher is None
+            or batcher.classifier is not classifier
+            or batcher_hash != categories_hash
+        ):
+            batcher = MicroBatcher(
+                classifier,
+                status_categories_dict,
+                max_wait=self.micro_batch_wait_ms / 1000,
+            )
+            self._batchers[llm] = (categories_hash, batcher)
+        return batcher
+
+    async def classify_stream(
+        self,
+        statuses: List[str],
+        llm: str,
+        status_categories_dict: Dict[str, List[Optional[str]]],
+    ) -> AsyncIterator[StatusClassificationStreamItem | Dict]:
+        """
+        Yield each classified status as soon as it is known: rule matches and
+        cache hits first, then the LLM results as the model returns them. The
+        last item is a summary dict with `tokens_used` and `cache_stats`.
+
+        Streaming trades micro-batching and coalescing for time-to-first-result,
+        so every distinct miss is sent to the model by this request.
+        """
+        classifier = LLMStatusClassifierFactory.get_classifier(llm)
+        categories_hash = get_status_categories_hash(status_categories_dict)
+
+        keys = [build_cache_key(status, llm, categories_hash) for status in statuses]
+        cached = await self.cache.get_many(keys)
+        stored = await self._get_stored(key for key in keys if key not in cached)
+
+        pending: Dict[str, List[int]] = {}
+        stats = {"hits": 0, "coalesced": 0, "misses": 0}
+        for i, (status, key) in enumerate(zip(statuses, keys)):
+            ruled = self.rule_engine.match(
+                normalize_status(status), status_categories_dict
+            )
+            if ruled:
+                yield StatusClassificationStreamItem(
+                    index=i, status_name=status, **ruled, source="rules"
+                )
+            elif key in cached:
+                stats["hits"] += 1
+                yield StatusClassificationStreamItem(
+                    index=i, status_name=status, **{**cached[key], "source": "cache"}
+                )
+            elif key in stored:
+                stats["hits"] += 1
+                yield StatusClassificationStreamItem(
+                    index=i, status_name=status, **stored[key], source="database"
+                )
+            else:
+                stats["misses"] += 1
+                pending.setdefault(key, []).append(i)
+
+        tokens_used = {}
+        if pending:
+            pending_keys = list(pending)
+            async for j, item, usage in classifier.aclassify_stream(
+                [statuses[pending[key][0]] for key in pending_keys],
+                status_categories_dict=status_categories_dict,
+            ):
+                for name, value in usage.items():
+                    tokens_used[name] = tokens_used.get(name, 0) + value
+                if j is None:
+                    continue
+
+                key = pending_keys[j]
+                result = self._to_cache_entry(item)
+                await self.cache.set_many({key: result})
+                if self.result_store is not None:
+                    await self.result_store.set_many(
+                        {key: result},
+                        {key: statuses[pending[key][0]]},
+                        llm,
+                        categories_hash,
+                    )
+                for i in pending.pop(key):
+                    yield StatusClassificationStreamItem(
+                        index=i,
+                        status_name=statuses[i],
+                        **{"source": "llm", **result},
+                    )
+
+        # Whatever is still pending was left out by the model
+        for indices in pending.values():
+            for i in indices:
+                yield StatusClassificationStreamItem(
+                    index=i, **self._default_result(statuses[i])
+                )
+
+        yield {"tokens_used": tokens_used, "cache_stats": stats}
+
+    def _default_result(self, status: str) -> Dict[str, Optional[str]]:
+        """
+        Placeholder for a status the model left out even after the retry, so
+        that every status gets a row. It is not cached, so the next request
+        asks the model again.
+        """
+        status_type, substatus_type = DEFAULT_STATUS_PAIR
+        return {
+            "status_name": status,
+            "status_type": status_type,
+            "substatus_type": substatus_type,
+            "source": "default",
+        }
+
+    async def _get_stored(
+        self, keys: Iterable[str]
+    ) -> Dict[str, Dict[str, Optional[str]]]:
+        """Look the keys up in the result store and promote hits to the cache."""
+        keys = list(keys)
+        if self.result_store is None or not keys:
+            return {}
+
+        stored = await self.result_store.get_many(keys)
+        await self.cache.set_many(stored)
+        return stored
+
+    async def _classify_owned(
+        self,
+        classify_misses: Callable[[List[str]], Awaitable[tuple[List, Dict]]],
+        owned: Dict[str, str],
+    ) -> tuple[Dict[str, Dict[str, Optional[str]]], Dict[str, int]]:
+        """Classify the misses this request owns and publish them to waiters."""
+        try:
+            classified_statuses, tokens_used = await classify_misses(
+                list(owned.values())
+            )
+            classified = self._match_results(owned, classified_statuses)
+            await self.cache.set_many(classified)
+        except BaseException as e:
+            for key in owned:
+                future = self._in_flight.pop(key)
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                    # Avoid "exception was never retrieved" when nobody waits
+                    future.add_done_callback(lambda f: f.exception())
+                else:
+                    future.cancel()
+            raise
+
+        for key in owned:
+            self._in_flight.pop(key).set_result(classified.get(key))
+
+        return classified, tokens_used
+
+    def _match_results(
+        self, misses: Dict[str, str], classified_statuses: List
+    ) -> Dict[str, Dict[str, Optional[str]]]:
+        """Map the model output back to the cache keys of the statuses sent."""
+        aligned = align_classified_statuses(list(misses.values()), classified_statuses)
+
+        return {
+            key: self._to_cache_entry(item)
+            for key, item in zip(misses, aligned)
+            if item is not None
+        }
+
+    def _to_cache_entry(self, item: Dict) -> Dict[str, Optional[str]]:
+        if hasattr(item, "model_dump"):
+            item = item.model_dump()
+
+        return {
+            "status_type": item["status_type"],
+            "substatus_type": item.get("substatus_type"),
+            # Optional details some classifiers add, e.g. the cascade
+            **{
+                field: item[field]
+                for field in ("source", "confidence")
+                if item.get(field) is not None
+            },
+        }
+
+
+status_classification_service = StatusClassificationService(
+    classification_cache, status_rule_engine, result_store=result_store
+)
@@ -0,0 +1,131 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import Session
+from app.models.status_taxonomy import StatusTaxonomyEntry, StatusTaxonomyVersion
+from app.services.status_classification.categories import STATUS_CATEGORIES_DICT
+
+STATUS_TAXONOMY_REFRESH_SECONDS = float(
+    os.getenv("STATUS_TAXONOMY_REFRESH_SECONDS", "30")
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StatusTaxonomyStore:
+    """
+    In-memory snapshot of the latest status taxonomy version in Postgres.
+
+    Requests read the snapshot without touching the database. At most once per
+    `refresh_interval` seconds, a single `max(version)` query checks whether a
+    new version was published, and only then are its entries loaded.
+
+    Prompts, cache keys and micro-batches are all scoped by the hash of the
+    category dict, so they move to the new taxonomy as soon as it is loaded.
+    Until a version is published, or while Postgres cannot be reached, the
+    built-in `STATUS_CATEGORIES_DICT` (or the last loaded version) is used.
+    """
+
+    def __init__(
+        self,
+        session_factory=Session,
+        refresh_interval: float = STATUS_TAXONOMY_REFRESH_SECONDS,
+        default_categories: Dict[str, List[Optional[str]]] = STATUS_CATEGORIES_DICT,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.default_categories = default_categories
+        self.version: Optional[int] = None
+        self._categories = default_categories
+        self._checked_at = -math.inf
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def get(self) -> Dict[str, List[Optional[str]]]:
+        """Return the current category dict. It is shared and must not be mutated."""
+        if self._is_stale():
+            self.refresh()
+        return self._categories
+
+    async def aget(self) -> Dict[str, List[Optional[str]]]:
+        """Async counterpart of `get` that runs the version check off the event loop."""
+        if self._is_stale():
+            await asyncio.to_thread(self.refresh)
+        return self._categories
+
+    def refresh(self) -> None:
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if not self._is_stale():
+                return
+
+            try:
+                with self.session_factory() as db:
+                    version = db.scalar(select(func.max(StatusTaxonomyVersion.version)))
+                    if version is None:
+                        self._categories = self.default_categories
+                    elif version != self.version:
+                        self._categories = self._load_version(db, version)
+                        logger.info("Loaded status taxonomy version %s", version)
+                    self.version = version
+            except SQLAlchemyError:
+                logger.exception(
+                    "Could not check the status taxonomy, keeping version %s",
+                    self.version,
+                )
+
+            self._checked_at = time.monotonic()
+
+    def _load_version(self, db, version: int) -> Dict[str, List[Optional[str]]]:
+        rows = db.execute(
+            select(StatusTaxonomyEntry.status_type, StatusTaxonomyEntry.substatus_type)
+            .where(StatusTaxonomyEntry.version == version)
+            .order_by(StatusTaxonomyEntry.position)
+        )
+
+        categories = {}
+        for status_type, substatus_type in rows:
+            categories.setdefault(status_type, []).append(substatus_type)
+        return categories
+
+    def publish(self, status_categories_dict: Dict[str, List[Optional[str]]]) -> int:
+        """Store the category dict as a new version and return its number."""
+        with self.session_factory() as db:
+            taxonomy_version = StatusTaxonomyVersion()
+            db.add(taxonomy_version)
+            db.flush()
+
+            db.add_all(
+                StatusTaxonomyEntry(
+                    version=taxonomy_version.version,
+                    position=position,
+                    status_type=status_type,
+                    substatus_type=substatus_type,
+                )
+                for position, (status_type, substatus_type) in enumerate(
+                    (status_type, substatus_type)
+                    for status_type, substatus_types in status_categories_dict.items()
+                    for substatus_type in substatus_types
+                )
+            )
+            db.commit()
+            version = taxonomy_version.version
+
+        # Pick the new version up in this process right away
+        self.invalidate()
+        return version
+
+    def invalidate(self) -> None:
+        """Make the next read check the database for a new version."""
+        self._checked_at = -math.inf
+
+
+taxonomy_store = StatusTaxonomyStore()
@@ -0,0 +1,24 @@
+from typing import AsyncIterator
+from fastapi import Request
+
+
+async def iter_request_lines(request: Request) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Yield the non-empty lines of a line-based request body (JSON lines, CSV)
+    with their line numbers as it streams in, without reading it all first.
+
+    Lines are yielded undecoded, so that callers can report a line that is not
+    valid UTF-8 like any other invalid line.
+    """
+    buffer = b""
+    line_number = 0
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+
+    if buffer.strip():
+        yield line_number + 1, buffer
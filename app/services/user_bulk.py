@@ -0,0 +1,120 @@
+import io
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, Dict, List
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+from app.models.user import User
+
+# Rows fetched per round trip while exporting
+USER_EXPORT_BATCH_SIZE = 1000
+
+# Rows of the upload live in a temporary table that is dropped on commit
+CREATE_STAGING_TABLE = text(
+    """
+    CREATE TEMPORARY TABLE users_import (
+        line integer NOT NULL,
+        username text NOT NULL,
+        email text NOT NULL
+    ) ON COMMIT DROP
+    """
+)
+
+# Only the first row of each username and email in the upload is a candidate.
+# Candidates that clash with existing users are skipped by ON CONFLICT, which
+# covers both the username and the email unique index
+MERGE_STAGING_TABLE = text(
+    """
+    WITH candidates AS (
+        SELECT
+            line,
+            username,
+            row_number() OVER (PARTITION BY username ORDER BY line) = 1
+                AND row_number() OVER (PARTITION BY email ORDER BY line) = 1
+                AS is_first
+        FROM users_import
+    ),
+    inserted AS (
+        INSERT INTO users (username, email)
+        SELECT s.username, s.email
+        FROM users_import s
+        JOIN candidates c ON c.line = s.line
+        WHERE c.is_first
+        ORDER BY s.line
+        ON CONFLICT DO NOTHING
+        RETURNING username
+    )
+    SELECT c.line, c.is_first
+    FROM candidates c
+    WHERE NOT c.is_first
+        OR NOT EXISTS (SELECT 1 FROM inserted i WHERE i.username = c.username)
+    """
+)
+
+
+async def import_users(
+    db: AsyncSession, rows: AsyncIterable[tuple[int, str, str]]
+) -> tuple[int, List[Dict]]:
+    """
+    Load `(line, username, email)` rows with COPY into a staging table and
+    merge them into `users` with a single INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns the number of rows copied and the errors of the rows that were not
+    imported, each with its line number. The caller commits.
+    """
+    await db.execute(CREATE_STAGING_TABLE)
+
+    # COPY is only exposed by the driver connection, which takes the rows as
+    # they stream in rather than one INSERT per row
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    status = await raw_connection.driver_connection.copy_records_to_table(
+        "users_import", records=rows, columns=["line", "username", "email"]
+    )
+    copied = int(status.split()[-1])
+
+    result = await db.execute(MERGE_STAGING_TABLE)
+    errors = [
+        {
+            "line": line,
+            "error": (
+                "Username/Email already exists"
+                if is_first
+                else "Duplicate username/email in the upload"
+            ),
+        }
+        for line, is_first in result
+    ]
+    return copied, errors
+
+
+async def iter_user_export(format: str) -> AsyncIterator[str]:
+    """
+    Yield every user as CSV or JSON lines, in id order, through a server-side
+    cursor so that only one batch of rows is held in memory at a time.
+    """
+    # The response outlives the request's session, so the export has its own
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(User.id, User.username, User.email)
+            .order_by(User.id)
+            .execution_options(yield_per=USER_EXPORT_BATCH_SIZE)
+        )
+
+        if format == "csv":
+            yield _to_csv([("id", "username", "email")])
+            async for rows in result.partitions():
+                yield _to_csv(rows)
+        else:
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps({"id": id, "username": username, "email": email}) + "\n"
+                    for id, username, email in rows
+                )
+
+
+def _to_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
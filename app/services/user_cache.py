@@ -0,0 +1,154 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from app.redis import redis_client
+from app.services.cache import TwoTierCache
+
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+# Also bounds how long another worker's in-process tier may serve a user
+# after it was changed elsewhere
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+
+LOOKUP_FIELDS = ("id", "username", "email")
+
+
+class UserCache:
+    """
+    Read-through cache of `UserResponse` dicts by id, username and email.
+
+    Users are cached under `id:<id>`. The username and email keys only point to
+    the id, and a hit through them counts only if the user found still has that
+    username or email. So a write only has to refresh or drop the id entry, and
+    stale pointers left behind by a rename simply miss.
+
+    A miss is loaded by one request per key at a time; others wait on the key's
+    lock and read what it cached. Writes cache their row under the lock of the
+    id key, and loads only cache a row read while holding that lock, so a slow
+    load cannot put an old version of a user back in the cache after it was
+    changed in this process. A load by username or email only learns the id
+    from its first read, so it reads the row again once it holds the id lock.
+    """
+
+    def __init__(self, cache: TwoTierCache):
+        self.cache = cache
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def get(
+        self,
+        field: str,
+        value,
+        load: Callable[[], Awaitable[Optional[Dict]]],
+    ) -> Optional[Dict]:
+        """Return the user whose `field` is `value`, calling `load` on a miss."""
+        key = f"{field}:{value}"
+        user = await self._get_cached(field, value)
+        if user is not None:
+            self.stats["hits"] += 1
+            return user
+
+        async with self._lock(key):
+            # Another request may have loaded it while this one waited
+            user = await self._get_cached(field, value)
+            if user is not None:
+                self.stats["coalesced"] += 1
+                return user
+
+            self.stats["misses"] += 1
+            user = await load()
+            if user is None:
+                return None
+
+            # Cached before the lock is released, so waiters find it
+            if field == "id":
+                await self._set(user)
+                return user
+
+            user_id = user["id"]
+            async with self._lock(f"id:{user_id}"):
+                # A write may have committed and cached a newer row since the
+                # first read, which must not be overwritten with that read
+                user = await load()
+                if user is not None and user["id"] == user_id:
+                    await self._set(user)
+        return user
+
+    async def set(self, user: Dict) -> None:
+        """Cache a user that was just written."""
+        async with self._lock(f"id:{user['id']}"):
+            await self._set(user)
+
+    async def invalidate(self, user: Dict) -> None:
+        """Drop a deleted user."""
+        async with self._lock(f"id:{user['id']}"):
+            await self.cache.delete_many(self._keys(user).values())
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["coalesced"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": (
+                (self.stats["hits"] + self.stats["coalesced"]) / lookups
+                if lookups
+                else None
+            ),
+        }
+
+    def clear(self) -> None:
+        """Forget the in-process tier and the metrics, e.g. between tests."""
+        self.cache.clear_local()
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    async def _get_cached(self, field: str, value) -> Optional[Dict]:
+        if field != "id":
+            pointer = f"{field}:{value}"
+            user_id = (await self.cache.get_many([pointer])).get(pointer)
+            if user_id is None:
+                return None
+        else:
+            user_id = value
+
+        key = f"id:{user_id}"
+        user = (await self.cache.get_many([key])).get(key)
+        if user is None or user[field] != value:
+            return None
+        return user
+
+    async def _set(self, user: Dict) -> None:
+        keys = self._keys(user)
+        await self.cache.set_many(
+            {
+                keys["id"]: user,
+                keys["username"]: user["id"],
+                keys["email"]: user["id"],
+            }
+        )
+
+    def _keys(self, user: Dict) -> Dict[str, str]:
+        return {field: f"{field}:{user[field]}" for field in LOOKUP_FIELDS}
+
+    @asynccontextmanager
+    async def _lock(self, key: str):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            # Drop the lock once nobody holds or waits for it
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
+
+
+user_cache = UserCache(
+    TwoTierCache(
+        namespace="user",
+        maxsize=USER_CACHE_MAXSIZE,
+        ttl=USER_CACHE_TTL,
+        redis_client=redis_client,
+    )
+)
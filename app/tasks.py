@@ -1,7 +1,15 @@
 import time
 import datetime
+from typing import Optional
 from celery.schedules import crontab
 from app.celery import celery
+from app.services.status_classification.batch_api import (
+    STATUS_BATCH_POLL_SECONDS,
+    collect_job_batch,
+    submit_job_batch,
+)
+from app.services.status_classification.jobs import classify_job_chunk, job_store
+from app.services.status_classification.taxonomy import taxonomy_store
 
 
 @celery.task(name="sample_task")
@@ -28,3 +36,72 @@ def setup_periodic_tasks(sender: celery, **kwargs):
         say_something.s("Uh oh! Hotdog!"),
         name="run every minute schedule",
     )
+
+
+@celery.task(name="classify_status_chunk", bind=True, max_retries=3)
+def classify_status_chunk(
+    self, job_id: str, chunk_index: int, offset: int, statuses: list[str], llm: str
+) -> int:
+    """Classify one chunk of a bulk job and store its results for the job."""
+    # Chunks are queued while the upload is still streaming, so a later invalid
+    # line or an upload over the limit fails the job after they were sent
+    if job_store.get_state(job_id) == "failed":
+        return 0
+
+    try:
+        results = classify_job_chunk(statuses, llm, taxonomy_store.get())
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            # Rate limited or open-circuit providers tell us when to come back
+            countdown = getattr(e, "retry_after", None) or 2**self.request.retries
+            raise self.retry(exc=e, countdown=countdown)
+        job_store.save_chunk_error(job_id, chunk_index, str(e))
+        return 0
+
+    job_store.save_chunk_result(
+        job_id,
+        chunk_index,
+        [{"index": offset + i, **result} for i, result in enumerate(results)],
+    )
+    return len(results)
+
+
+@celery.task(name="submit_status_batch", bind=True, max_retries=3)
+def submit_status_batch(self, job_id: str) -> Optional[str]:
+    """Send the chunks of a batch mode job to the provider's Batch API."""
+    try:
+        batch_id = submit_job_batch(job_id, taxonomy_store.get())
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            countdown = getattr(e, "retry_after", None) or 2**self.request.retries
+            raise self.retry(exc=e, countdown=countdown)
+        job_store.fail_upload(job_id, str(e))
+        return None
+
+    if batch_id is not None:
+        poll_status_batch.apply_async((job_id,), countdown=STATUS_BATCH_POLL_SECONDS)
+    return batch_id
+
+
+# Enough polls to outlast the 24 hour completion window of the providers
+@celery.task(
+    name="poll_status_batch",
+    bind=True,
+    max_retries=26 * 3600 // max(STATUS_BATCH_POLL_SECONDS, 1),
+)
+def poll_status_batch(self, job_id: str) -> int:
+    """Check the provider batch of a job and store its results once it has ended."""
+    try:
+        stored = collect_job_batch(job_id)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=STATUS_BATCH_POLL_SECONDS)
+        job_store.fail_upload(job_id, str(e))
+        return 0
+
+    if stored is None:
+        if self.request.retries >= self.max_retries:
+            job_store.fail_upload(job_id, "The batch did not end in time")
+            return 0
+        raise self.retry(countdown=STATUS_BATCH_POLL_SECONDS)
+    return stored
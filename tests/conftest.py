@@ -0,0 +1,24 @@
+import pytest
+from app.services.status_classification.base import static_request_cache
+from app.services.status_classification.cache import classification_cache
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.resilience import reset_provider_resilience
+from app.services.status_classification.taxonomy import taxonomy_store
+from app.services.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_classifier_factory():
+    """Make sure every test builds its classifiers against its own mocks."""
+    LLMStatusClassifierFactory.clear()
+    classification_cache.clear_local()
+    static_request_cache.clear()
+    reset_provider_resilience()
+    # Ids are reused once a test truncates the users table
+    user_cache.clear()
+    yield
+    LLMStatusClassifierFactory.clear()
+    classification_cache.clear_local()
+    static_request_cache.clear()
+    # Tests may publish a taxonomy of their own
+    taxonomy_store.invalidate()
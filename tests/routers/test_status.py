@@ -1,15 +1,38 @@
 import pytest
 import json
 from fastapi.testclient import TestClient
+from sqlalchemy.sql import text
+from tests.utils import clean_table_after_test
 from app.main import app
+from app.database import get_db
+from app.models.status_classification_record import StatusClassificationRecord
+from app.models.status_taxonomy import StatusTaxonomyVersion
+from app.services.status_classification.base import get_status_pairs
+from app.services.status_classification.cache import classification_cache
+from app.services.status_classification.categories import STATUS_CATEGORIES_DICT
+from app.services.status_classification.resilience import ProviderUnavailableError
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def clean_stored_classifications():
+    """Stored results would otherwise answer the statuses of later tests."""
+    db = next(get_db())
+    try:
+        db.execute(text(f"TRUNCATE TABLE {StatusClassificationRecord.__tablename__};"))
+        db.commit()
+        yield
+        db.execute(text(f"TRUNCATE TABLE {StatusClassificationRecord.__tablename__};"))
+        db.commit()
+    finally:
+        db.close()
+
+
 @pytest.fixture
 # Mock client specific for OpenAI for now
 def mock_llm_client(mocker):
-    mock_openai = mocker.patch("app.services.status_classification.gpt.OpenAI")
+    mock_openai = mocker.patch("app.services.status_classification.gpt.AsyncOpenAI")
 
     mock_client = mock_openai.return_value
     mock_response = mocker.MagicMock()
@@ -22,16 +45,14 @@ def mock_llm_client(mocker):
                         function=mocker.MagicMock(
                             arguments=json.dumps(
                                 {
+                                    # Only "package is in transit" is left
+                                    # for the model after the rules
                                     "classified_statuses": [
                                         {
-                                            "status_name": "shipment has been cancelled",
-                                            "status_type": "Exception",
-                                            "substatus_type": "Cancelled",
-                                        },
-                                        {
-                                            "status_name": "package is in transit",
-                                            "status_type": "Transit",
-                                            "substatus_type": None,
+                                            "i": 0,
+                                            "c": get_status_pairs(
+                                                STATUS_CATEGORIES_DICT
+                                            ).index(("Transit", None)),
                                         },
                                     ]
                                 }
@@ -46,8 +67,9 @@ def mock_llm_client(mocker):
     mock_response.usage.prompt_tokens = 15
     mock_response.usage.completion_tokens = 10
     mock_response.usage.total_tokens = 25
+    mock_response.usage.prompt_tokens_details.cached_tokens = 0
 
-    mock_client.chat.completions.create.return_value = mock_response
+    mock_client.chat.completions.create = mocker.AsyncMock(return_value=mock_response)
     return mock_openai
 
 
@@ -68,19 +90,164 @@ def test_classify(mock_llm_client):
                 "status_name": "shipment has been cancelled",
                 "status_type": "Exception",
                 "substatus_type": "Cancelled",
+                "source": "rules",
+                "confidence": None,
             },
             {
                 "status_name": "package is in transit",
                 "status_type": "Transit",
                 "substatus_type": None,
+                "source": "llm",
+                "confidence": None,
             },
         ],
         "tokens_used": {
             "prompt_tokens": 15,
             "completion_tokens": 10,
             "total_tokens": 25,
+            "cached_tokens": 0,
         },
+        "cache_stats": {"hits": 0, "coalesced": 0, "misses": 1},
+    }
+
+
+def test_classify_serves_repeated_statuses_from_cache(mock_llm_client):
+    """Test that repeated statuses are answered from the cache."""
+    payload = {
+        "statuses": ["shipment has been cancelled", "package is in transit"],
+        "llm": "gpt",
+    }
+    client.post("/status/classify", json=payload)
+
+    payload["statuses"] = ["Package  is in TRANSIT"]
+    response = client.post("/status/classify", json=payload)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "classified_statuses": [
+            {
+                "status_name": "Package  is in TRANSIT",
+                "status_type": "Transit",
+                "substatus_type": None,
+                "source": "cache",
+                "confidence": None,
+            },
+        ],
+        "tokens_used": {},
+        "cache_stats": {"hits": 1, "coalesced": 0, "misses": 0},
     }
+    create = mock_llm_client.return_value.chat.completions.create
+    assert create.await_count == 1
+
+
+def test_classify_stream(mock_llm_client):
+    """Test that the streaming endpoint sends one JSON line per status and a summary."""
+    response = client.post(
+        "/status/classify/stream",
+        json={
+            "statuses": ["shipment has been cancelled", "package is in transit"],
+            "llm": "gpt",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {
+            "index": 0,
+            "status_name": "shipment has been cancelled",
+            "status_type": "Exception",
+            "substatus_type": "Cancelled",
+            "source": "rules",
+            "confidence": None,
+        },
+        {
+            "index": 1,
+            "status_name": "package is in transit",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "source": "llm",
+            "confidence": None,
+        },
+        {
+            "tokens_used": {
+                "prompt_tokens": 15,
+                "completion_tokens": 10,
+                "total_tokens": 25,
+                "cached_tokens": 0,
+            },
+            "cache_stats": {"hits": 0, "coalesced": 0, "misses": 1},
+        },
+    ]
+
+
+def test_classify_stream_server_sent_events(mock_llm_client):
+    """Test that the streaming endpoint speaks SSE when the client asks for it."""
+    response = client.post(
+        "/status/classify/stream",
+        json={"statuses": ["package is in transit"], "llm": "gpt"},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [
+        line.split(": ", 1)[1]
+        for line in response.text.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events == ["result", "summary"]
+
+
+def test_classify_stream_unsupported_llm():
+    """Test that an unsupported LLM is rejected before the stream starts."""
+    response = client.post(
+        "/status/classify/stream",
+        json={"statuses": ["package is in transit"], "llm": "unsupported_model"},
+    )
+    assert response.status_code == 400
+
+
+def test_classify_serves_repeated_statuses_from_database(mock_llm_client):
+    """Test that stored results answer repeated statuses once the cache is cold."""
+    payload = {
+        "statuses": ["shipment has been cancelled", "package is in transit"],
+        "llm": "gpt",
+    }
+    client.post("/status/classify", json=payload)
+    classification_cache.clear_local()
+
+    payload["statuses"] = ["Package is in transit"]
+    response = client.post("/status/classify", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["classified_statuses"] == [
+        {
+            "status_name": "Package is in transit",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "source": "database",
+            "confidence": None,
+        },
+    ]
+    assert response.json()["cache_stats"] == {"hits": 1, "coalesced": 0, "misses": 0}
+    create = mock_llm_client.return_value.chat.completions.create
+    assert create.await_count == 1
+
+
+def test_classify_provider_unavailable(mocker):
+    """Test that an open circuit breaker is reported as 503 with Retry-After."""
+    mocker.patch(
+        "app.routers.status.status_classification_service.classify",
+        side_effect=ProviderUnavailableError("openai", retry_after=12.5),
+    )
+    response = client.post(
+        "/status/classify", json={"statuses": ["package is in transit"], "llm": "gpt"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "13"
 
 
 def test_classify_statuses_invalid_input():
@@ -99,3 +266,151 @@ def test_classify_statuses_unsupported_llm():
     assert response.json() == {
         "detail": "LLM 'unsupported_model' is not implemented for status classification. Please use a supported model."
     }
+
+
+@clean_table_after_test(StatusTaxonomyVersion.__tablename__)
+def test_update_status_taxonomy():
+    """Test that a published taxonomy is used right away."""
+    categories = {"Transit": [None, "Delayed"], "Info": [None]}
+    response = client.put("/status/taxonomy", json={"status_categories": categories})
+
+    assert response.status_code == 200
+    version = response.json()["version"]
+    assert response.json() == {"version": version, "status_categories": categories}
+    assert client.get("/status/taxonomy").json() == response.json()
+
+
+def test_update_status_taxonomy_requires_default_pair():
+    """Test that a taxonomy without the ('Transit', None) fallback is rejected."""
+    response = client.put(
+        "/status/taxonomy", json={"status_categories": {"Transit": ["Delayed"]}}
+    )
+    assert response.status_code == 422
+
+
+def test_create_classification_job(mocker):
+    """Test that a JSON lines upload is chunked into Celery tasks."""
+    mocker.patch("app.routers.status.STATUS_JOB_CHUNK_SIZE", 2)
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+    mock_job_store.create_job.return_value = "job"
+    mock_job_store.get_job.return_value = {
+        "job_id": "job",
+        "llm": "gpt",
+        "state": "running",
+        "total_statuses": 3,
+        "processed_statuses": 0,
+        "total_chunks": 2,
+        "completed_chunks": 0,
+        "failed_chunks": 0,
+    }
+    mock_delay = mocker.patch("app.routers.status.classify_status_chunk.delay")
+
+    response = client.post(
+        "/status/jobs?llm=gpt",
+        content='"in transit"\n{"status": "delivered"}\n\n"held at customs"\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "job"
+    assert [c.args for c in mock_delay.call_args_list] == [
+        ("job", 0, 0, ["in transit", "delivered"], "gpt"),
+        ("job", 1, 2, ["held at customs"], "gpt"),
+    ]
+    mock_job_store.finish_upload.assert_called_once_with("job", 2, 3)
+
+
+def test_create_classification_job_batch_mode(mocker):
+    """Test that a batch mode upload is kept and submitted as one batch."""
+    mocker.patch("app.routers.status.STATUS_JOB_CHUNK_SIZE", 2)
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+    mock_job_store.create_job.return_value = "job"
+    mock_job_store.get_job.return_value = {
+        "job_id": "job",
+        "llm": "claude",
+        "mode": "batch",
+        "state": "running",
+        "total_statuses": 3,
+        "processed_statuses": 0,
+        "total_chunks": 2,
+        "completed_chunks": 0,
+        "failed_chunks": 0,
+    }
+    mock_chunk_delay = mocker.patch("app.routers.status.classify_status_chunk.delay")
+    mock_batch_delay = mocker.patch("app.routers.status.submit_status_batch.delay")
+
+    response = client.post(
+        "/status/jobs?llm=claude&mode=batch", content='"a"\n"b"\n"c"\n'
+    )
+
+    assert response.status_code == 202
+    assert response.json()["mode"] == "batch"
+    mock_job_store.create_job.assert_called_once_with("claude", "batch")
+    assert [c.args for c in mock_job_store.save_chunk_input.call_args_list] == [
+        ("job", 0, 0, ["a", "b"]),
+        ("job", 1, 2, ["c"]),
+    ]
+    mock_chunk_delay.assert_not_called()
+    mock_batch_delay.assert_called_once_with("job")
+
+
+def test_create_classification_job_batch_mode_unsupported_llm(mocker):
+    """Test that batch mode is rejected for LLMs without a Batch API."""
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+
+    response = client.post("/status/jobs?llm=gemini&mode=batch", content='"a"\n')
+
+    assert response.status_code == 400
+    mock_job_store.create_job.assert_not_called()
+
+
+def test_create_classification_job_invalid_line(mocker):
+    """Test that an invalid line fails the job with its line number."""
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+    mock_job_store.create_job.return_value = "job"
+    mocker.patch("app.routers.status.classify_status_chunk.delay")
+
+    response = client.post("/status/jobs?llm=gpt", content='"ok"\n[1, 2]\n')
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid status on line 2")
+    mock_job_store.fail_upload.assert_called_once()
+
+
+def test_create_classification_job_invalid_utf8(mocker):
+    """Test that a line that is not UTF-8 fails the job like any invalid line."""
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+    mock_job_store.create_job.return_value = "job"
+    mocker.patch("app.routers.status.classify_status_chunk.delay")
+
+    response = client.post("/status/jobs?llm=gpt", content=b'"ok"\n"\xff"\n')
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid status on line 2")
+    mock_job_store.fail_upload.assert_called_once()
+
+
+def test_read_classification_job_results(mocker):
+    """Test streaming job results as JSON lines."""
+    mock_job_store = mocker.patch("app.routers.status.job_store")
+    mock_job_store.get_job.return_value = {"job_id": "job", "total_chunks": 1}
+    mock_job_store.iter_results.return_value = iter(
+        [{"index": 0, "status_name": "a"}, {"index": 1, "status_name": "b"}]
+    )
+
+    response = client.get("/status/jobs/job/results")
+
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"index": 0, "status_name": "a"},
+        {"index": 1, "status_name": "b"},
+    ]
+
+
+def test_read_classification_job_not_found(mocker):
+    """Test that an unknown job id returns 404."""
+    mocker.patch("app.routers.status.job_store").get_job.return_value = None
+
+    response = client.get("/status/jobs/unknown")
+
+    assert response.status_code == 404
@@ -1,3 +1,4 @@
+import json
 import pytest
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
@@ -5,11 +6,15 @@ from tests.utils import clean_table_after_test
 from app.models.user import User
 from app.main import app
 from app.database import get_db
+from app.services.pagination import encode_cursor
 
 
 @pytest.fixture
 def client():
-    return TestClient(app)
+    # Entering the client runs the lifespan, which disposes of the async engine
+    # pool so that no connection outlives the event loop of this test
+    with TestClient(app) as client:
+        yield client
 
 
 def __create_test_user(usernum: int = 1):
@@ -68,6 +73,73 @@ def test_read_users(client: TestClient):
     assert len(data) == 2
 
 
+@clean_table_after_test(User.__tablename__)
+def test_read_users_with_cursor(client: TestClient):
+    """Test paging through users with the next page cursor"""
+    for usernum in range(5):
+        __create_test_user(usernum)
+
+    pages = []
+    response = client.get("/users/?limit=2")
+    while True:
+        assert response.status_code == 200
+        pages.append([user["username"] for user in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/users/?limit=2&cursor={cursor}")
+
+    assert pages == [
+        ["testuser0", "testuser1"],
+        ["testuser2", "testuser3"],
+        ["testuser4"],
+    ]
+
+
+@clean_table_after_test(User.__tablename__)
+def test_read_users_sorted_by_email_with_cursor(client: TestClient):
+    """Test that cursors seek on the requested sort key"""
+    for usernum in (3, 1, 2):
+        __create_test_user(usernum)
+
+    response = client.get("/users/?limit=2&sort=email")
+    cursor = response.headers["X-Next-Cursor"]
+    next_response = client.get(f"/users/?limit=2&sort=email&cursor={cursor}")
+
+    assert [user["email"] for user in response.json()] == [
+        "test1@example.com",
+        "test2@example.com",
+    ]
+    assert [user["email"] for user in next_response.json()] == ["test3@example.com"]
+    assert "X-Next-Cursor" not in next_response.headers
+
+    # A cursor only works with the sort key it was issued for
+    response = client.get(f"/users/?limit=2&sort=username&cursor={cursor}")
+    assert response.status_code == 400
+
+
+def test_read_users_invalid_cursor(client: TestClient):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/users/?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+@pytest.mark.parametrize(
+    "sort, after",
+    [("id", "x"), ("id", True), ("id", 2**40), ("username", 1), ("email", None)],
+)
+def test_read_users_cursor_with_wrong_type(client: TestClient, sort, after):
+    """Test that a well-formed cursor with the wrong value type is rejected"""
+    cursor = encode_cursor({"sort": sort, "after": after})
+
+    response = client.get(f"/users/?sort={sort}&cursor={cursor}")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"The cursor is not for sort '{sort}'"
+
+
 @clean_table_after_test(User.__tablename__)
 def test_read_user(client: TestClient):
     """Test retrieving a specific user by ID"""
@@ -90,6 +162,28 @@ def test_read_user_not_found(client: TestClient):
     assert data["detail"] == "User not found"
 
 
+@clean_table_after_test(User.__tablename__)
+def test_read_user_is_cached_and_refreshed_on_writes(client: TestClient):
+    """Test that repeated reads are cache hits and writes are visible to them"""
+    existing_user = __create_test_user()
+    user_id = existing_user.id
+
+    client.get(f"/users/{user_id}")
+    client.get(f"/users/search?email={existing_user.email}")
+    stats = client.get("/users/cache/stats").json()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    client.patch(f"/users/{user_id}", json={"username": "renameduser"})
+    response = client.get(f"/users/{user_id}")
+    assert response.json()["username"] == "renameduser"
+    response = client.get(f"/users/search?username={existing_user.username}")
+    assert response.status_code == 404
+
+    client.delete(f"/users/{user_id}")
+    response = client.get(f"/users/search?email={existing_user.email}")
+    assert response.status_code == 404
+
+
 @clean_table_after_test(User.__tablename__)
 def test_search_user_by_username(client: TestClient):
     """Test searching for a user by username"""
@@ -165,6 +259,40 @@ def test_update_user(client: TestClient):
     assert data["email"] == "updated@example.com"
 
 
+@clean_table_after_test(User.__tablename__)
+def test_update_user_conflict(client: TestClient):
+    """Test that taking another user's username or email is a conflict"""
+    existing_user = __create_test_user(1)
+    other_user = __create_test_user(2)
+
+    response = client.put(
+        f"/users/{other_user.id}",
+        json={"username": existing_user.username, "email": "new@example.com"},
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Username/Email already exists"
+
+    response = client.patch(
+        f"/users/{other_user.id}", json={"email": existing_user.email}
+    )
+    assert response.status_code == 409
+
+    # The failed updates left the user untouched
+    response = client.get(f"/users/{other_user.id}")
+    assert response.json()["email"] == other_user.email
+
+
+@clean_table_after_test(User.__tablename__)
+def test_partial_update_user_without_changes(client: TestClient):
+    """Test that an empty partial update returns the user as it is"""
+    existing_user = __create_test_user()
+
+    response = client.patch(f"/users/{existing_user.id}", json={})
+
+    assert response.status_code == 200
+    assert response.json()["username"] == existing_user.username
+
+
 def test_update_user_not_found(client: TestClient):
     """Test updating a non-existent user"""
     response = client.put(
@@ -201,3 +329,119 @@ def test_delete_user_not_found(client: TestClient):
 
     assert response.status_code == 404
     assert data["detail"] == "User not found"
+
+
+@clean_table_after_test(User.__tablename__)
+def test_import_users_from_csv(client: TestClient):
+    """Test bulk importing users from CSV with a per-row error report"""
+    __create_test_user(1)
+
+    response = client.post(
+        "/users/import",
+        content=(
+            "username,email\n"
+            "alice,alice@example.com\n"
+            "testuser1,other@example.com\n"
+            "bob,alice@example.com\n"
+            "carol\n"
+            "dave,dave@example.com\n"
+        ),
+        headers={"Content-Type": "text/csv"},
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data == {
+        "total_rows": 5,
+        "imported": 2,
+        "errors": [
+            {"line": 3, "error": "Username/Email already exists"},
+            {"line": 4, "error": "Duplicate username/email in the upload"},
+            {"line": 5, "error": "expected 2 columns, got 1"},
+        ],
+    }
+
+    usernames = [user["username"] for user in client.get("/users/?limit=10").json()]
+    assert usernames == ["testuser1", "alice", "dave"]
+
+
+@clean_table_after_test(User.__tablename__)
+def test_import_users_from_json_lines(client: TestClient):
+    """Test bulk importing users from JSON lines"""
+    response = client.post(
+        "/users/import",
+        content=(
+            '{"username": "alice", "email": "alice@example.com"}\n'
+            '{"username": "bob"}\n'
+            "not json\n"
+        ),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["total_rows"] == 3
+    assert data["imported"] == 1
+    assert [error["line"] for error in data["errors"]] == [2, 3]
+    assert data["errors"][0]["error"] == "email: Field required"
+
+
+@clean_table_after_test(User.__tablename__)
+def test_import_users_reports_undecodable_and_nul_rows(client: TestClient):
+    """Test that rows Postgres or UTF-8 cannot take are reported, not fatal"""
+    response = client.post(
+        "/users/import",
+        content=(
+            b'{"username": "alice", "email": "alice@example.com"}\n'
+            b'{"username": "\xff", "email": "bad@example.com"}\n'
+            b'{"username": "bo\\u0000b", "email": "bob@example.com"}\n'
+        ),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["imported"] == 1
+    assert [error["line"] for error in data["errors"]] == [2, 3]
+    assert "utf-8" in data["errors"][0]["error"]
+    assert data["errors"][1]["error"] == (
+        "username: Value error, must not contain NUL characters"
+    )
+
+
+def test_import_users_requires_csv_header(client: TestClient):
+    """Test that a CSV upload without the expected header is rejected"""
+    response = client.post(
+        "/users/import",
+        content="alice,alice@example.com\n",
+        headers={"Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 400
+
+
+@clean_table_after_test(User.__tablename__)
+def test_export_users(client: TestClient):
+    """Test streaming every user as CSV and as JSON lines"""
+    for usernum in range(3):
+        __create_test_user(usernum)
+
+    response = client.get("/users/export?format=csv")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,username,email"
+    assert [line.split(",")[1] for line in lines[1:]] == [
+        "testuser0",
+        "testuser1",
+        "testuser2",
+    ]
+
+    response = client.get("/users/export")
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["email"] for user in users] == [
+        "test0@example.com",
+        "test1@example.com",
+        "test2@example.com",
+    ]
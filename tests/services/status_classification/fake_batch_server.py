@@ -0,0 +1,256 @@
+import json
+import uuid
+from typing import Callable, Dict, List
+import httpx
+
+
+def parse_numbered_statuses(content: str) -> List[str]:
+    """Statuses of a numbered user prompt, in order."""
+    lines = content.split("```")[1].strip().splitlines()
+    return [json.loads(line.split(". ", 1)[1]) for line in lines]
+
+
+class FakeBatchServer:
+    """
+    In-memory stand-in for the OpenAI and Anthropic Batch APIs, mounted on the
+    SDK clients through an httpx mock transport.
+
+    A batch stays in progress for `polls_until_done` retrievals and is then
+    answered by `pair_code(status)` for every numbered status of each request.
+    Statuses in `skipped` are left out of the answers, and requests whose
+    `custom_id` is in `failed_ids` come back as errors.
+    """
+
+    def __init__(
+        self,
+        pair_code: Callable[[str], int] = lambda status: 0,
+        polls_until_done: int = 1,
+    ):
+        self.pair_code = pair_code
+        self.polls_until_done = polls_until_done
+        self.skipped = set()
+        self.failed_ids = set()
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict] = {}
+        self.transport = httpx.MockTransport(self.handle)
+
+    def client(self) -> httpx.Client:
+        return httpx.Client(transport=self.transport)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1")
+        parts = path.strip("/").split("/")
+
+        if parts == ["files"] and request.method == "POST":
+            return self.__create_file(request)
+        if parts[0] == "files" and parts[-1] == "content":
+            return httpx.Response(200, content=self.files[parts[1]].encode())
+        if parts == ["batches"] and request.method == "POST":
+            return self.__create_openai_batch(request)
+        if parts[0] == "batches":
+            return self.__retrieve_openai_batch(parts[1])
+        if parts == ["messages", "batches"] and request.method == "POST":
+            return self.__create_anthropic_batch(request)
+        if parts[:2] == ["messages", "batches"] and parts[-1] == "results":
+            return httpx.Response(200, content=self.batches[parts[2]]["results"])
+        if parts[:2] == ["messages", "batches"]:
+            return self.__retrieve_anthropic_batch(request, parts[2])
+
+        return httpx.Response(404, json={"error": {"message": "Not found"}})
+
+    def answer(self, statuses: List[str]) -> List[Dict]:
+        return [
+            {"i": i, "c": self.pair_code(status)}
+            for i, status in enumerate(statuses)
+            if status not in self.skipped
+        ]
+
+    def __create_file(self, request: httpx.Request) -> httpx.Response:
+        # The JSON lines of the upload are the only lines of the multipart body
+        # that start with `{`
+        body = request.read().decode()
+        content = "".join(
+            line + "\n" for line in body.splitlines() if line.startswith("{")
+        )
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        return httpx.Response(
+            200,
+            json={
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": 0,
+                "filename": "statuses.jsonl",
+                "purpose": "batch",
+                "status": "processed",
+            },
+        )
+
+    def __create_openai_batch(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.read())
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {
+            "requests": [
+                json.loads(line)
+                for line in self.files[payload["input_file_id"]].splitlines()
+            ],
+            "polls": 0,
+            "payload": payload,
+        }
+        return httpx.Response(200, json=self.__openai_batch(batch_id))
+
+    def __retrieve_openai_batch(self, batch_id: str) -> httpx.Response:
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] >= self.polls_until_done and "output_file_id" not in batch:
+            output = []
+            for line in batch["requests"]:
+                if line["custom_id"] in self.failed_ids:
+                    output.append(
+                        {
+                            "custom_id": line["custom_id"],
+                            "response": None,
+                            "error": {"code": "server_error", "message": "failed"},
+                        }
+                    )
+                    continue
+                statuses = parse_numbered_statuses(
+                    line["body"]["messages"][-1]["content"]
+                )
+                output.append(
+                    {
+                        "custom_id": line["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": self.__chat_completion(statuses),
+                        },
+                        "error": None,
+                    }
+                )
+
+            batch["output_file_id"] = f"file-{uuid.uuid4().hex}"
+            self.files[batch["output_file_id"]] = "".join(
+                json.dumps(line) + "\n" for line in output
+            )
+
+        return httpx.Response(200, json=self.__openai_batch(batch_id))
+
+    def __openai_batch(self, batch_id: str) -> Dict:
+        batch = self.batches[batch_id]
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": batch["payload"]["endpoint"],
+            "input_file_id": batch["payload"]["input_file_id"],
+            "completion_window": batch["payload"]["completion_window"],
+            "status": "completed" if "output_file_id" in batch else "in_progress",
+            "created_at": 0,
+            "output_file_id": batch.get("output_file_id"),
+            "error_file_id": None,
+        }
+
+    def __chat_completion(self, statuses: List[str]) -> Dict:
+        return {
+            "id": "chatcmpl",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call",
+                                "type": "function",
+                                "function": {
+                                    "name": "classify_statuses",
+                                    "arguments": json.dumps(
+                                        {"classified_statuses": self.answer(statuses)}
+                                    ),
+                                },
+                            }
+                        ],
+                    },
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+
+    def __create_anthropic_batch(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.read())
+        batch_id = f"msgbatch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {"requests": payload["requests"], "polls": 0}
+        return httpx.Response(200, json=self.__anthropic_batch(request, batch_id))
+
+    def __retrieve_anthropic_batch(
+        self, request: httpx.Request, batch_id: str
+    ) -> httpx.Response:
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] >= self.polls_until_done and "results" not in batch:
+            output = []
+            for line in batch["requests"]:
+                if line["custom_id"] in self.failed_ids:
+                    result = {
+                        "type": "errored",
+                        "error": {"type": "api_error", "message": "failed"},
+                    }
+                else:
+                    statuses = parse_numbered_statuses(
+                        line["params"]["messages"][-1]["content"]
+                    )
+                    result = {"type": "succeeded", "message": self.__message(statuses)}
+                output.append({"custom_id": line["custom_id"], "result": result})
+
+            batch["results"] = "".join(json.dumps(line) + "\n" for line in output)
+
+        return httpx.Response(200, json=self.__anthropic_batch(request, batch_id))
+
+    def __anthropic_batch(self, request: httpx.Request, batch_id: str) -> Dict:
+        ended = "results" in self.batches[batch_id]
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0,
+                "succeeded": 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": "2026-01-01T00:00:00Z",
+            "expires_at": "2026-01-02T00:00:00Z",
+            "results_url": (
+                str(
+                    request.url.copy_with(
+                        path=f"/v1/messages/batches/{batch_id}/results"
+                    )
+                )
+                if ended
+                else None
+            ),
+        }
+
+    def __message(self, statuses: List[str]) -> Dict:
+        return {
+            "id": "msg",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude-3-5-haiku-20241022",
+            "stop_reason": "tool_use",
+            "content": [
+                {
+                    "type": "tool_use",
+                    "id": "toolu",
+                    "name": "classify_statuses",
+                    "input": {"classified_statuses": self.answer(statuses)},
+                }
+            ],
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+        }
@@ -0,0 +1,109 @@
+import pytest
+from app.services.status_classification.batch_api import (
+    UnsupportedBatchLLMError,
+    collect_job_batch,
+    get_batch_provider,
+    submit_job_batch,
+)
+from tests.services.status_classification.fake_batch_server import FakeBatchServer
+
+STATUS_CATEGORIES_DICT = {"Exception": ["Cancelled"], "Transit": [None]}
+
+
+@pytest.fixture
+def fake_batch_server(mocker):
+    server = FakeBatchServer(pair_code=lambda status: 1, polls_until_done=2)
+    for module in ("gpt", "claude"):
+        mocker.patch(
+            f"app.services.status_classification.{module}.build_http_client",
+            side_effect=server.client,
+        )
+    return server
+
+
+def mock_job_store(mocker, llm: str):
+    store = mocker.MagicMock()
+    inputs = {
+        0: {"offset": 0, "statuses": ["order cancelled", "in transit", "In Transit"]},
+        1: {"offset": 3, "statuses": ["held at customs", "unknown"]},
+        2: {"offset": 5, "statuses": ["order cancelled"]},
+    }
+    store.get_job.return_value = {"llm": llm, "total_chunks": 3}
+    store.get_chunk_input.side_effect = lambda job_id, chunk_index: inputs[chunk_index]
+    store.get_batch.side_effect = lambda job_id: store.save_batch.call_args.args[1]
+    return store
+
+
+def test_openai_batch_job(mocker, fake_batch_server):
+    """Test that a job is submitted as one batch and its results stored once it ends."""
+    fake_batch_server.skipped = {"unknown"}
+    store = mock_job_store(mocker, "gpt")
+    results_store = mocker.MagicMock(set_many=mocker.AsyncMock())
+
+    batch_id = submit_job_batch("job", STATUS_CATEGORIES_DICT, store=store)
+
+    # The chunk answered by the rules alone is not sent
+    requests = fake_batch_server.batches[batch_id]["requests"]
+    assert [line["custom_id"] for line in requests] == ["0", "1"]
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert requests[0]["body"]["tools"][0]["function"]["name"] == "classify_statuses"
+    store.save_chunk_result.assert_called_once_with(
+        "job",
+        2,
+        [
+            {
+                "index": 5,
+                "status_name": "order cancelled",
+                "status_type": "Exception",
+                "substatus_type": "Cancelled",
+                "source": "rules",
+            }
+        ],
+    )
+
+    assert collect_job_batch("job", store=store, results_store=results_store) is None
+    assert collect_job_batch("job", store=store, results_store=results_store) == 5
+
+    saved = {
+        call.args[1]: call.args[2] for call in store.save_chunk_result.call_args_list
+    }
+    assert [result["index"] for result in saved[0]] == [0, 1, 2]
+    assert [result["source"] for result in saved[0]] == ["rules", "llm", "llm"]
+    assert saved[1] == [
+        {
+            "index": 3,
+            "status_name": "held at customs",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "source": "llm",
+        },
+        {"index": 4, "status_name": "unknown", "error": "not classified"},
+    ]
+    # Both spellings of "in transit" share one stored result
+    stored_statuses = [call.args[1] for call in results_store.set_many.call_args_list]
+    assert [list(statuses.values()) for statuses in stored_statuses] == [
+        ["In Transit"],
+        ["held at customs"],
+    ]
+
+
+def test_anthropic_batch_job_reports_failed_requests(mocker, fake_batch_server):
+    """Test that requests the batch could not answer fail their chunk only."""
+    fake_batch_server.polls_until_done = 1
+    fake_batch_server.failed_ids = {"1"}
+    store = mock_job_store(mocker, "claude")
+
+    batch_id = submit_job_batch("job", STATUS_CATEGORIES_DICT, store=store)
+    stored = collect_job_batch("job", store=store, results_store=None)
+
+    assert batch_id.startswith("msgbatch_")
+    assert stored == 3
+    assert [call.args[1] for call in store.save_chunk_result.call_args_list] == [2, 0]
+    store.save_chunk_error.assert_called_once()
+    assert store.save_chunk_error.call_args.args[:2] == ("job", 1)
+
+
+def test_get_batch_provider_rejects_unsupported_llm():
+    """Test that batch mode is limited to providers with a Batch API."""
+    with pytest.raises(UnsupportedBatchLLMError):
+        get_batch_provider("gemini")
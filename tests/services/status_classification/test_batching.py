@@ -0,0 +1,62 @@
+import pytest
+import asyncio
+from app.services.status_classification.batching import MicroBatcher
+
+
+@pytest.fixture
+def mock_classifier(mocker):
+    async def aclassify(statuses, **kwargs):
+        return (
+            [{"status_name": s, "status_type": "Transit"} for s in statuses],
+            {"total_tokens": 100},
+        )
+
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(side_effect=aclassify)
+    return mock_classifier
+
+
+def test_aclassify_batches_concurrent_callers(mock_classifier):
+    """Test that concurrent callers share one upstream call."""
+    batcher = MicroBatcher(mock_classifier, {}, max_wait=0.01, max_size=50)
+
+    async def classify_concurrently():
+        return await asyncio.gather(
+            batcher.aclassify(["a"]), batcher.aclassify(["b", "c", "d"])
+        )
+
+    first, second = asyncio.run(classify_concurrently())
+
+    mock_classifier.aclassify.assert_awaited_once_with(
+        ["a", "b", "c", "d"], status_categories_dict={}
+    )
+    assert [s["status_name"] for s in first[0]] == ["a"]
+    assert [s["status_name"] for s in second[0]] == ["b", "c", "d"]
+    assert first[1] == {"total_tokens": 25}
+    assert second[1] == {"total_tokens": 75}
+
+
+def test_aclassify_flushes_at_max_size(mock_classifier):
+    """Test that a full batch is sent without waiting for the timer."""
+    batcher = MicroBatcher(mock_classifier, {}, max_wait=60, max_size=2)
+
+    result = asyncio.run(asyncio.wait_for(batcher.aclassify(["a", "b"]), 1))
+
+    assert len(result[0]) == 2
+
+
+def test_aclassify_propagates_errors(mock_classifier):
+    """Test that an upstream failure is raised to every caller of the batch."""
+    mock_classifier.aclassify.side_effect = RuntimeError("provider down")
+    batcher = MicroBatcher(mock_classifier, {}, max_wait=0.01, max_size=50)
+
+    async def classify_concurrently():
+        return await asyncio.gather(
+            batcher.aclassify(["a"]),
+            batcher.aclassify(["b"]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(classify_concurrently())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+from app.services.status_classification.cascade import CascadeStatusClassifier
+from app.services.status_classification.factory import (
+    LLMStatusClassifierFactory,
+    UnsupportedLLMError,
+)
+from app.services.status_classification.local import LocalModelNotTrainedError
+
+
+@pytest.fixture
+def mock_local_classifier(mocker):
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(
+        return_value=(
+            [
+                {
+                    "status_name": "shipment delivered",
+                    "status_type": "Transit",
+                    "substatus_type": "Delivered",
+                    "confidence": 0.9,
+                },
+                {
+                    "status_name": "weird status",
+                    "status_type": "Transit",
+                    "substatus_type": None,
+                    "confidence": 0.2,
+                },
+            ],
+            {},
+        )
+    )
+    return mock_classifier
+
+
+@pytest.fixture
+def mock_llm_classifier(mocker):
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(
+        return_value=(
+            [
+                {
+                    "status_name": "weird status",
+                    "status_type": "Exception",
+                    "substatus_type": "Other Delays",
+                }
+            ],
+            {"total_tokens": 25},
+        )
+    )
+    return mock_classifier
+
+
+def test_aclassify_sends_only_uncertain_statuses(
+    mock_local_classifier, mock_llm_classifier
+):
+    """Test that only low-confidence statuses are sent to the LLM."""
+    classifier = CascadeStatusClassifier(
+        mock_local_classifier, mock_llm_classifier, threshold=0.6
+    )
+    classified_statuses, tokens_used = asyncio.run(
+        classifier.aclassify(
+            ["shipment delivered", "weird status"], status_categories_dict={}
+        )
+    )
+
+    mock_llm_classifier.aclassify.assert_awaited_once_with(
+        ["weird status"], status_categories_dict={}
+    )
+    assert [s["status_type"] for s in classified_statuses] == ["Transit", "Exception"]
+    assert classified_statuses[0]["source"] == "local"
+    assert "source" not in classified_statuses[1]
+    assert tokens_used == {"total_tokens": 25}
+
+
+def test_aclassify_without_local_model_uses_llm(
+    mocker, mock_local_classifier, mock_llm_classifier
+):
+    """Test that an untrained local model sends every status to the LLM."""
+    mock_local_classifier.aclassify.side_effect = LocalModelNotTrainedError()
+    classifier = CascadeStatusClassifier(mock_local_classifier, mock_llm_classifier)
+
+    classified_statuses, _ = asyncio.run(
+        classifier.aclassify(["weird status"], status_categories_dict={})
+    )
+
+    mock_llm_classifier.aclassify.assert_awaited_once_with(
+        ["weird status"], status_categories_dict={}
+    )
+    assert classified_statuses[0]["status_type"] == "Exception"
+
+
+def test_factory_builds_cascade():
+    """Test that cascade-<llm> wraps the local classifier and the given LLM."""
+    classifier = LLMStatusClassifierFactory.get_classifier("cascade-gpt")
+
+    assert isinstance(classifier, CascadeStatusClassifier)
+    assert classifier.llm_classifier is LLMStatusClassifierFactory.get_classifier("gpt")
+    with pytest.raises(UnsupportedLLMError):
+        LLMStatusClassifierFactory.get_classifier("cascade-local")
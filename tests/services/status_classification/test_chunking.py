@@ -0,0 +1,84 @@
+import json
+import asyncio
+from app.services.status_classification.chunking import (
+    OUTPUT_TOKENS_PER_STATUS,
+    count_tokens,
+    split_by_token_budget,
+)
+from app.services.status_classification.gpt import GPTStatusClassifier
+from tests.services.status_classification.fake_batch_server import (
+    parse_numbered_statuses,
+)
+
+
+def test_split_by_token_budget_keeps_order():
+    """Test that chunks are filled in order up to the output token budget."""
+    statuses = [f"status {i}" for i in range(10)]
+    # Room for three statuses per chunk at the default 80% budget
+    chunks = split_by_token_budget(
+        statuses, int(OUTPUT_TOKENS_PER_STATUS * 3 / 0.8) + 1
+    )
+
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+
+
+def test_split_by_token_budget_never_returns_empty_chunks():
+    """Test that a status larger than the budget still gets a chunk of its own."""
+    assert split_by_token_budget(["x" * 1000, "y"], max_output_tokens=10) == [[0], [1]]
+    assert split_by_token_budget([], max_output_tokens=10) == []
+
+
+def test_split_by_token_budget_limits_status_text():
+    """Test that long statuses are split by the input token budget."""
+    statuses = ["x" * 300, "y" * 300, "z"]
+    max_input_tokens = count_tokens("x" * 300) + 10
+
+    assert split_by_token_budget(
+        statuses, max_output_tokens=10_000, max_input_tokens=max_input_tokens
+    ) == [[0], [1, 2]]
+
+
+def test_aclassify_chunks_and_retries_missing_statuses(mocker):
+    """Test that large inputs are split and left-out statuses are sent again."""
+    mock_async_openai = mocker.patch(
+        "app.services.status_classification.gpt.AsyncOpenAI"
+    )
+    requests = []
+
+    async def create(**kwargs):
+        statuses = parse_numbered_statuses(kwargs["messages"][-1]["content"])
+        requests.append(statuses)
+
+        # The model leaves "status 4" out and gives "status 7" an unknown code
+        # the first time it sees them
+        items = [
+            {"i": i, "c": 99 if status == "status 7" and len(requests) <= 4 else 0}
+            for i, status in enumerate(statuses)
+            if status != "status 4" or len(requests) > 4
+        ]
+
+        response = mocker.MagicMock()
+        response.choices[0].message.tool_calls[0].function.arguments = json.dumps(
+            {"classified_statuses": items}
+        )
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 5
+        response.usage.total_tokens = 15
+        response.usage.prompt_tokens_details.cached_tokens = 0
+        return response
+
+    mock_async_openai.return_value.chat.completions.create = create
+
+    classifier = GPTStatusClassifier()
+    classifier.max_output_tokens = int(OUTPUT_TOKENS_PER_STATUS * 3 / 0.8) + 1
+
+    statuses = [f"status {i}" for i in range(10)]
+    classified_statuses, tokens_used = asyncio.run(
+        classifier.aclassify(statuses, status_categories_dict={"Transit": [None]})
+    )
+
+    assert [s["status_name"] for s in classified_statuses] == statuses
+    assert all(s["status_type"] == "Transit" for s in classified_statuses)
+    assert sorted(map(len, requests)) == [1, 2, 3, 3, 3]
+    assert requests[-1] == ["status 4", "status 7"]
+    assert tokens_used["total_tokens"] == 75
@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from app.services.status_classification.claude import ClaudeStatusClassifier
 from app.services.status_classification.factory import LLMStatusClassifierFactory
 
@@ -20,7 +21,17 @@ def mock_classified_statuses():
 
 
 @pytest.fixture
-def mock_llm_client(mocker, mock_classified_statuses):
+def status_categories_dict():
+    return {"Exception": ["Cancelled"], "Transit": [None]}
+
+
+@pytest.fixture
+def mock_pair_codes():
+    return [{"i": 0, "c": 0}, {"i": 1, "c": 1}]
+
+
+@pytest.fixture
+def mock_llm_client(mocker, mock_pair_codes):
     mock_anthropic = mocker.patch("app.services.status_classification.claude.Anthropic")
     mock_client = mock_anthropic.return_value
     mock_response = mocker.MagicMock()
@@ -28,12 +39,14 @@ def mock_llm_client(mocker, mock_classified_statuses):
     mock_response.content = [
         mocker.MagicMock(
             type="tool_use",
-            input={"classified_statuses": mock_classified_statuses},
+            input={"classified_statuses": mock_pair_codes},
         )
     ]
 
     mock_response.usage.input_tokens = 15
     mock_response.usage.output_tokens = 10
+    mock_response.usage.cache_creation_input_tokens = None
+    mock_response.usage.cache_read_input_tokens = 1_000
 
     mock_response.usage.total_tokens = (
         mock_response.usage.input_tokens + mock_response.usage.output_tokens
@@ -44,15 +57,77 @@ def mock_llm_client(mocker, mock_classified_statuses):
     return mock_client
 
 
-def test_classify(mock_llm_client, mock_classified_statuses):
+def test_classify(mock_llm_client, mock_classified_statuses, status_categories_dict):
     """Test classify function of ClaudeStatusClassifier."""
     classifier = LLMStatusClassifierFactory.get_classifier("claude")
     result = classifier.classify(
         ["shipment has been cancelled", "package is in transit"],
-        status_categories_dict={},
+        status_categories_dict=status_categories_dict,
     )
 
-    expected_tokens = {"input_tokens": 15, "output_tokens": 10, "total_tokens": 25}
+    expected_tokens = {
+        "input_tokens": 15,
+        "output_tokens": 10,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 1_000,
+        "total_tokens": 1_025,
+    }
 
     assert isinstance(classifier, ClaudeStatusClassifier)
     assert result == (mock_classified_statuses, expected_tokens)
+
+
+def test_aclassify(
+    mocker, mock_llm_client, mock_classified_statuses, status_categories_dict
+):
+    """Test async classify function of ClaudeStatusClassifier."""
+    mock_async_anthropic = mocker.patch(
+        "app.services.status_classification.claude.AsyncAnthropic"
+    )
+    mock_async_anthropic.return_value.messages.create = mocker.AsyncMock(
+        return_value=mock_llm_client.messages.create.return_value
+    )
+
+    classifier = ClaudeStatusClassifier()
+    result = asyncio.run(
+        classifier.aclassify(
+            ["shipment has been cancelled", "package is in transit"],
+            status_categories_dict=status_categories_dict,
+        )
+    )
+
+    expected_tokens = {
+        "input_tokens": 15,
+        "output_tokens": 10,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 1_000,
+        "total_tokens": 1_025,
+    }
+
+    assert result == (mock_classified_statuses, expected_tokens)
+
+
+def test_classify_marks_static_prompt_for_caching(mock_llm_client):
+    """Test that the system prompt and tool schema carry cache breakpoints."""
+    ClaudeStatusClassifier().classify(
+        ["package is in transit"], status_categories_dict={"Transit": [None]}
+    )
+
+    request = mock_llm_client.messages.create.call_args.kwargs
+    assert request["system"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert request["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_reordered_categories_do_not_share_a_static_prompt(mock_llm_client):
+    """Test that pair codes in the prompt follow the order of the categories."""
+    classifier = ClaudeStatusClassifier()
+    for status_categories_dict in (
+        {"Exception": ["Cancelled"], "Transit": [None]},
+        {"Transit": [None], "Exception": ["Cancelled"]},
+    ):
+        classifier.classify(
+            ["package is in transit"], status_categories_dict=status_categories_dict
+        )
+
+    first, second = mock_llm_client.messages.create.call_args_list
+    assert first.kwargs["system"][0]["text"] != second.kwargs["system"][0]["text"]
@@ -0,0 +1,31 @@
+import pytest
+import asyncio
+from app.services.status_classification.factory import (
+    LLMStatusClassifierFactory,
+    UnsupportedLLMError,
+)
+
+
+def test_get_classifier_reuses_instance():
+    """Test that the factory keeps one classifier per LLM key."""
+    classifier = LLMStatusClassifierFactory.get_classifier("gpt")
+
+    assert LLMStatusClassifierFactory.get_classifier("GPT") is classifier
+    assert LLMStatusClassifierFactory.get_classifier("claude") is not classifier
+
+
+def test_get_classifier_unsupported_llm():
+    """Test that an unknown LLM key raises UnsupportedLLMError."""
+    with pytest.raises(UnsupportedLLMError):
+        LLMStatusClassifierFactory.get_classifier("unsupported_model")
+
+
+def test_shutdown_closes_classifiers(mocker):
+    """Test that shutdown closes and forgets every cached classifier."""
+    classifier = LLMStatusClassifierFactory.get_classifier("gpt")
+    mock_aclose = mocker.patch.object(classifier, "aclose")
+
+    asyncio.run(LLMStatusClassifierFactory.shutdown())
+
+    mock_aclose.assert_awaited_once()
+    assert LLMStatusClassifierFactory.get_classifier("gpt") is not classifier
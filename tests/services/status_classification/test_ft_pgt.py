@@ -1,5 +1,6 @@
 import pytest
 import json
+import asyncio
 from app.services.status_classification.ft_gpt import FTGPTStatusClassifier
 from app.services.status_classification.factory import LLMStatusClassifierFactory
 
@@ -26,6 +27,7 @@ def mock_openai_client(mocker, mock_classified_status):
     mock_response.usage.prompt_tokens = 10
     mock_response.usage.completion_tokens = 5
     mock_response.usage.total_tokens = 15
+    mock_response.usage.prompt_tokens_details.cached_tokens = 0
 
     mock_client.chat.completions.create.return_value = mock_response
     return mock_client
@@ -43,7 +45,145 @@ def test_classify(mock_openai_client, mock_classified_status):
         "prompt_tokens": 10,
         "completion_tokens": 5,
         "total_tokens": 15,
+        "cached_tokens": 0,
     }
 
     assert isinstance(classifier, FTGPTStatusClassifier)
     assert result == ([mock_classified_status], expected_tokens)
+
+
+def test_classify_multiple_statuses_keeps_order(mocker, mock_openai_client):
+    """Test that concurrent per-status calls keep input order and sum tokens."""
+
+    def create_response(**kwargs):
+        status = kwargs["messages"][-1]["content"].split("`")[1]
+        response = mocker.MagicMock()
+        response.choices[0].message.tool_calls[0].function.arguments = json.dumps(
+            {"status_name": status, "status_type": "Transit", "substatus_type": None}
+        )
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 5
+        response.usage.total_tokens = 15
+        response.usage.prompt_tokens_details.cached_tokens = 8
+        return response
+
+    mock_openai_client.chat.completions.create.side_effect = create_response
+
+    statuses = [f"status {i}" for i in range(10)]
+    classifier = FTGPTStatusClassifier(max_concurrency=4)
+    classified_statuses, tokens_used = classifier.classify(
+        statuses, status_categories_dict={"Transit": [None]}
+    )
+
+    assert [s["status_name"] for s in classified_statuses] == statuses
+    assert tokens_used == {
+        "prompt_tokens": 100,
+        "completion_tokens": 50,
+        "total_tokens": 150,
+        "cached_tokens": 80,
+    }
+    assert mock_openai_client.chat.completions.create.call_count == 10
+
+
+def test_aclassify(mocker, mock_classified_status):
+    """Test async classify function of FTGPTStatusClassifier."""
+    mock_async_openai = mocker.patch(
+        "app.services.status_classification.ft_gpt.AsyncOpenAI"
+    )
+    mock_response = mocker.MagicMock()
+    mock_response.choices[0].message.tool_calls[0].function.arguments = json.dumps(
+        mock_classified_status
+    )
+    mock_response.usage.prompt_tokens = 10
+    mock_response.usage.completion_tokens = 5
+    mock_response.usage.total_tokens = 15
+    mock_response.usage.prompt_tokens_details.cached_tokens = 0
+    mock_async_openai.return_value.chat.completions.create = mocker.AsyncMock(
+        return_value=mock_response
+    )
+
+    classifier = FTGPTStatusClassifier()
+    result = asyncio.run(
+        classifier.aclassify(
+            ["shipment has been cancelled", "shipment has been cancelled"],
+            status_categories_dict={"Exception": ["Cancelled"]},
+        )
+    )
+
+    expected_tokens = {
+        "prompt_tokens": 20,
+        "completion_tokens": 10,
+        "total_tokens": 30,
+        "cached_tokens": 0,
+    }
+
+    assert result == ([mock_classified_status] * 2, expected_tokens)
+
+
+def test_aclassify_stream_yields_results_as_they_complete(mocker):
+    """Test that streamed statuses arrive as soon as their own call returns."""
+    mock_async_openai = mocker.patch(
+        "app.services.status_classification.ft_gpt.AsyncOpenAI"
+    )
+
+    async def create_response(**kwargs):
+        status = kwargs["messages"][-1]["content"].split("`")[1]
+        # The first status is the slowest one
+        await asyncio.sleep(0.05 if status == "status 0" else 0)
+        response = mocker.MagicMock()
+        response.choices[0].message.tool_calls[0].function.arguments = json.dumps(
+            {"status_name": status, "status_type": "Transit", "substatus_type": None}
+        )
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 5
+        response.usage.total_tokens = 15
+        response.usage.prompt_tokens_details.cached_tokens = 8
+        return response
+
+    mock_async_openai.return_value.chat.completions.create = create_response
+
+    async def collect():
+        classifier = FTGPTStatusClassifier()
+        return [
+            (index, item["status_name"], tokens)
+            async for index, item, tokens in classifier.aclassify_stream(
+                ["status 0", "status 1"], status_categories_dict={"Transit": [None]}
+            )
+        ]
+
+    tokens = {
+        "prompt_tokens": 10,
+        "completion_tokens": 5,
+        "total_tokens": 15,
+        "cached_tokens": 8,
+    }
+    assert asyncio.run(collect()) == [
+        (1, "status 1", tokens),
+        (0, "status 0", tokens),
+    ]
+
+
+def test_static_request_is_built_once_per_category_set(mocker, mock_openai_client):
+    """Test that the system prompt and tool schema are reused across calls."""
+    generate_system_prompt = mocker.spy(
+        FTGPTStatusClassifier, "_generate_system_prompt"
+    )
+    classifier = FTGPTStatusClassifier()
+
+    classifier.classify(
+        ["status 0", "status 1"], status_categories_dict={"Transit": [None]}
+    )
+    classifier.classify(["status 2"], status_categories_dict={"Transit": [None]})
+    assert generate_system_prompt.call_count == 1
+
+    classifier.classify(
+        ["status 3"], status_categories_dict={"Transit": [None, "Delayed"]}
+    )
+    assert generate_system_prompt.call_count == 2
+
+    requests = mock_openai_client.chat.completions.create.call_args_list
+    assert requests[0].kwargs["tools"] is requests[2].kwargs["tools"]
+    assert (
+        requests[-1].kwargs["messages"][-1]["content"]
+        == "Classify the status: `status 3`"
+    )
@@ -1,4 +1,6 @@
+import json
 import pytest
+import asyncio
 
 from app.services.status_classification.factory import LLMStatusClassifierFactory
 from app.services.status_classification.gemini import GeminiStatusClassifier
@@ -21,37 +23,74 @@ def mock_classified_statuses():
 
 
 @pytest.fixture
-def mock_llm_client(mocker, mock_classified_statuses):
+def status_categories_dict():
+    return {"Exception": ["Cancelled"], "Transit": [None]}
+
+
+@pytest.fixture
+def mock_pair_codes():
+    return [{"i": 0, "c": 0}, {"i": 1, "c": 1}]
+
+
+@pytest.fixture
+def mock_llm_client(mocker, mock_pair_codes):
     mock_genai = mocker.patch("app.services.status_classification.gemini.genai.Client")
     mock_client = mock_genai.return_value
     mock_response = mocker.MagicMock()
 
-    mock_response.parsed = mock_classified_statuses
+    mock_response.text = json.dumps({"classified_statuses": mock_pair_codes})
     mock_response.usage_metadata.candidates_token_count = 10
     mock_response.usage_metadata.prompt_token_count = 20
     mock_response.usage_metadata.total_token_count = 30
+    mock_response.usage_metadata.cached_content_token_count = None
 
     mock_client.models.generate_content.return_value = mock_response
 
     return mock_client
 
 
-def test_classify(mock_llm_client, mock_classified_statuses):
+def test_classify(mock_llm_client, mock_classified_statuses, status_categories_dict):
     """Test successful classification with mocked Gemini client."""
 
     test_statuses = ["shipment has been cancelled", "package is in transit"]
-    test_status_categories_dict = {}
 
     classifier = LLMStatusClassifierFactory.get_classifier("gemini")
     result = classifier.classify(
-        test_statuses, status_categories_dict=test_status_categories_dict
+        test_statuses, status_categories_dict=status_categories_dict
     )
 
     expected_tokens = {
         "candidates_token_count": 10,
         "prompt_token_count": 20,
         "total_token_count": 30,
+        "cached_content_token_count": 0,
     }
 
     assert isinstance(classifier, GeminiStatusClassifier)
     assert result == (mock_classified_statuses, expected_tokens)
+
+
+def test_aclassify(
+    mocker, mock_llm_client, mock_classified_statuses, status_categories_dict
+):
+    """Test async classification with mocked Gemini client."""
+    mock_llm_client.aio.models.generate_content = mocker.AsyncMock(
+        return_value=mock_llm_client.models.generate_content.return_value
+    )
+
+    classifier = GeminiStatusClassifier()
+    result = asyncio.run(
+        classifier.aclassify(
+            ["shipment has been cancelled", "package is in transit"],
+            status_categories_dict=status_categories_dict,
+        )
+    )
+
+    expected_tokens = {
+        "candidates_token_count": 10,
+        "prompt_token_count": 20,
+        "total_token_count": 30,
+        "cached_content_token_count": 0,
+    }
+
+    assert result == (mock_classified_statuses, expected_tokens)
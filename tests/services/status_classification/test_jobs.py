@@ -0,0 +1,103 @@
+import json
+from app.services.status_classification.jobs import (
+    StatusClassificationJobStore,
+    classify_job_chunk,
+)
+
+STATUS_CATEGORIES_DICT = {"Exception": ["Cancelled"], "Transit": [None]}
+
+
+def test_classify_job_chunk(mocker):
+    """Test that rule matches skip the LLM and duplicates are sent once."""
+    mock_classifier = mocker.patch(
+        "app.services.status_classification.jobs.LLMStatusClassifierFactory"
+    ).get_classifier.return_value
+    mock_classifier.classify.return_value = (
+        [{"status_name": "in transit", "status_type": "Transit"}],
+        {"total_tokens": 10},
+    )
+
+    results = classify_job_chunk(
+        ["order cancelled", "in transit", "In Transit", "unknown"],
+        "gpt",
+        STATUS_CATEGORIES_DICT,
+    )
+
+    mock_classifier.classify.assert_called_once_with(
+        ["in transit", "unknown"], status_categories_dict=STATUS_CATEGORIES_DICT
+    )
+    assert results == [
+        {
+            "status_name": "order cancelled",
+            "status_type": "Exception",
+            "substatus_type": "Cancelled",
+            "source": "rules",
+        },
+        {
+            "status_name": "in transit",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "source": "llm",
+        },
+        {
+            "status_name": "In Transit",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "source": "llm",
+        },
+        {"status_name": "unknown", "error": "not classified"},
+    ]
+
+
+def test_get_job_reports_completion(mocker):
+    """Test that a running job is completed once every chunk has finished."""
+    mock_redis = mocker.MagicMock()
+    mock_redis.hgetall.return_value = {
+        b"llm": b"gpt",
+        b"state": b"running",
+        b"created_at": b"0",
+        b"total_statuses": b"150",
+        b"total_chunks": b"2",
+        b"processed_statuses": b"150",
+        b"completed_chunks": b"2",
+        b"failed_chunks": b"0",
+    }
+
+    job = StatusClassificationJobStore(mock_redis).get_job("job")
+
+    assert job["state"] == "completed"
+    assert job["processed_statuses"] == 150
+
+
+def test_iter_results_skips_unfinished_chunks(mocker):
+    """Test that results are streamed in chunk order and pending chunks skipped."""
+    mock_redis = mocker.MagicMock()
+    mock_redis.get.side_effect = [
+        json.dumps([{"index": 0}, {"index": 1}]),
+        None,
+        json.dumps({"error": "provider down"}),
+    ]
+
+    results = list(StatusClassificationJobStore(mock_redis).iter_results("job", 3))
+
+    assert results == [
+        {"index": 0},
+        {"index": 1},
+        {"chunk": 2, "error": "provider down"},
+    ]
+
+
+def test_save_chunk_result_counts_a_chunk_once(mocker):
+    """Test that a chunk that already has an outcome is not counted again."""
+    mock_redis = mocker.MagicMock()
+    save_chunk = mock_redis.register_script.return_value
+    save_chunk.side_effect = [1, 0]
+    store = StatusClassificationJobStore(mock_redis)
+
+    assert store.save_chunk_result("job", 3, [{"index": 0}, {"index": 1}])
+    assert not store.save_chunk_result("job", 3, [{"index": 0}, {"index": 1}])
+
+    save_chunk.assert_called_with(
+        keys=["status_job:job:chunk:3", "status_job:job"],
+        args=['[{"index": 0}, {"index": 1}]', store.ttl, "completed_chunks", 2],
+    )
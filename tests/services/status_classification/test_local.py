@@ -0,0 +1,105 @@
+import json
+import pytest
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.local import (
+    LocalModelNotTrainedError,
+    LocalStatusClassifier,
+    TfidfNearestCentroidModel,
+    train_from_jsonl,
+)
+
+STATUS_CATEGORIES_DICT = {
+    "Exception": ["Cancelled", "Customs/Tax Delays"],
+    "Transit": [None, "Delivered"],
+}
+
+
+@pytest.fixture
+def training_data():
+    return [
+        ("shipment delivered", ("Transit", "Delivered")),
+        ("package delivered to recipient", ("Transit", "Delivered")),
+        ("order cancelled by shipper", ("Exception", "Cancelled")),
+        ("shipment cancelled", ("Exception", "Cancelled")),
+        ("in transit to destination", ("Transit", None)),
+        ("arrived at sorting facility", ("Transit", None)),
+        ("customs clearance delayed", ("Exception", "Customs/Tax Delays")),
+        ("held by customs", ("Exception", "Customs/Tax Delays")),
+    ]
+
+
+@pytest.fixture
+def model(training_data):
+    statuses, labels = zip(*training_data)
+    return TfidfNearestCentroidModel().fit(list(statuses), list(labels))
+
+
+def test_classify(model):
+    """Test that statuses are labelled with the nearest centroid."""
+    classifier = LocalStatusClassifier(model)
+    classified_statuses, tokens_used = classifier.classify(
+        ["Delivered to front door", "customs hold", "departed sorting facility"],
+        status_categories_dict=STATUS_CATEGORIES_DICT,
+    )
+
+    assert [(s["status_type"], s["substatus_type"]) for s in classified_statuses] == [
+        ("Transit", "Delivered"),
+        ("Exception", "Customs/Tax Delays"),
+        ("Transit", None),
+    ]
+    assert all(0 < s["confidence"] <= 1 for s in classified_statuses)
+    assert tokens_used == {}
+
+
+def test_classify_unknown_status_defaults_to_transit(model):
+    """Test that a status sharing nothing with the training data gets the default."""
+    classifier = LocalStatusClassifier(model)
+    classified_statuses, _ = classifier.classify(
+        ["xyz"], status_categories_dict=STATUS_CATEGORIES_DICT
+    )
+
+    assert classified_statuses == [
+        {
+            "status_name": "xyz",
+            "status_type": "Transit",
+            "substatus_type": None,
+            "confidence": 0.0,
+        }
+    ]
+
+
+def test_classify_only_returns_allowed_pairs(model):
+    """Test that pairs missing from the category set are never returned."""
+    classifier = LocalStatusClassifier(model)
+    classified_statuses, _ = classifier.classify(
+        ["shipment delivered"], status_categories_dict={"Transit": [None]}
+    )
+
+    assert classified_statuses[0]["substatus_type"] is None
+
+
+def test_train_from_jsonl_round_trip(tmp_path, training_data):
+    """Test training from classified statuses and loading the saved model."""
+    training_path = tmp_path / "statuses.jsonl"
+    training_path.write_text(
+        "\n".join(
+            json.dumps({"status_name": s, "status_type": t, "substatus_type": sub})
+            for s, (t, sub) in training_data
+        )
+    )
+    model_path = str(tmp_path / "model.npz")
+
+    model = train_from_jsonl(str(training_path), model_path)
+    loaded = TfidfNearestCentroidModel.load(model_path)
+
+    assert loaded.labels == model.labels
+    assert loaded.predict(["shipment cancelled"])[0] == [("Exception", "Cancelled")]
+
+
+def test_factory_returns_untrained_local_classifier():
+    """Test that the factory registers the local classifier."""
+    classifier = LLMStatusClassifierFactory.get_classifier("local")
+
+    assert isinstance(classifier, LocalStatusClassifier)
+    with pytest.raises(LocalModelNotTrainedError):
+        classifier.classify(["in transit"], status_categories_dict={})
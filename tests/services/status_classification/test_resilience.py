@@ -0,0 +1,126 @@
+import time
+import pytest
+import asyncio
+from app.services.status_classification.resilience import (
+    CircuitBreaker,
+    ProviderRateLimitedError,
+    ProviderResilience,
+    ProviderUnavailableError,
+    TokenBucket,
+)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+        super().__init__(f"HTTP {status_code}")
+
+
+def build_resilience(**kwargs) -> ProviderResilience:
+    return ProviderResilience(
+        "test", base_delay=0.001, max_delay=0.001, **{"max_attempts": 3, **kwargs}
+    )
+
+
+def test_retries_retryable_errors(mocker):
+    """Test that transient errors are retried until the call succeeds."""
+    create = mocker.AsyncMock(
+        side_effect=[ProviderError(503), ProviderError(500), "ok"]
+    )
+
+    assert asyncio.run(build_resilience().acall(create, {"messages": []})) == "ok"
+    assert create.await_count == 3
+
+
+def test_does_not_retry_client_errors(mocker):
+    """Test that a bad request fails on the first attempt."""
+    create = mocker.MagicMock(side_effect=ProviderError(400))
+
+    with pytest.raises(ProviderError):
+        build_resilience().call(create, {"messages": []})
+    assert create.call_count == 1
+
+
+def test_exhausted_rate_limit_retries_raise_rate_limited(mocker):
+    """Test that a provider that keeps answering 429 surfaces as rate limited."""
+    create = mocker.MagicMock(side_effect=ProviderError(429))
+
+    with pytest.raises(ProviderRateLimitedError):
+        build_resilience().call(create, {"messages": []})
+    assert create.call_count == 3
+
+
+def test_calls_at_least_once_without_retries(mocker):
+    """Test that max_attempts below 1 still makes the call once."""
+    create = mocker.MagicMock(return_value="ok")
+
+    assert build_resilience(max_attempts=0).call(create, {"messages": []}) == "ok"
+    assert create.call_count == 1
+
+
+def test_long_retry_after_is_not_waited_for(mocker):
+    """Test that a Retry-After beyond the max backoff is raised instead of slept."""
+    mock_sleep = mocker.patch(
+        "app.services.status_classification.resilience.time.sleep"
+    )
+    create = mocker.MagicMock(side_effect=ProviderError(429, {"retry-after": "60"}))
+
+    with pytest.raises(ProviderRateLimitedError) as error:
+        build_resilience().call(create, {"messages": []})
+
+    assert error.value.retry_after == 60
+    assert create.call_count == 1
+    assert all(call.args[0] <= 0.001 for call in mock_sleep.call_args_list)
+
+
+def test_circuit_breaker_fails_fast_while_open(mocker):
+    """Test that an open circuit rejects calls until the reset timeout passes."""
+    create = mocker.MagicMock(side_effect=ProviderError(503))
+    resilience = build_resilience(
+        max_attempts=1, failure_threshold=2, reset_timeout=0.05
+    )
+
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            resilience.call(create, {})
+    with pytest.raises(ProviderUnavailableError):
+        resilience.call(create, {})
+    assert create.call_count == 2
+
+    time.sleep(0.05)
+    create.side_effect = None
+    create.return_value = "ok"
+    assert resilience.call(create, {}) == "ok"
+    assert resilience.circuit_breaker.state == "closed"
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    """Test that only one trial call is allowed after the reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.allow() is None
+    assert breaker.allow() is not None
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+
+
+def test_token_bucket_queues_then_rejects():
+    """Test that callers wait for refill and are rejected past the max wait."""
+    bucket = TokenBucket(rate_per_minute=60)
+
+    assert bucket.reserve(60, max_wait=0) == 0
+    assert bucket.reserve(1, max_wait=2) == pytest.approx(1, abs=0.05)
+    assert bucket.reserve(5, max_wait=2) is None
+
+
+def test_rate_limit_rejects_calls_without_capacity(mocker):
+    """Test that calls over the requests per minute limit are not sent."""
+    create = mocker.MagicMock(return_value="ok")
+    resilience = build_resilience(requests_per_minute=1, max_wait=0)
+
+    assert resilience.call(create, {}) == "ok"
+    with pytest.raises(ProviderRateLimitedError):
+        resilience.call(create, {})
+    assert create.call_count == 1
@@ -0,0 +1,38 @@
+import asyncio
+from tests.utils import clean_table_after_test
+from app.models.status_classification_record import StatusClassificationRecord
+from app.services.status_classification.results import (
+    StatusClassificationResultStore,
+)
+
+
+@clean_table_after_test(StatusClassificationRecord.__tablename__)
+def test_set_many_upserts_results():
+    """Test that storing a key again replaces its previous result."""
+    store = StatusClassificationResultStore()
+    statuses = {"key-1": "Package delayed", "key-2": "In transit"}
+
+    asyncio.run(
+        store.set_many(
+            {
+                "key-1": {"status_type": "Transit", "substatus_type": None},
+                "key-2": {"status_type": "Transit", "substatus_type": None},
+            },
+            statuses,
+            "gpt",
+            "0123456789abcdef",
+        )
+    )
+    asyncio.run(
+        store.set_many(
+            {"key-1": {"status_type": "Transit", "substatus_type": "Delayed"}},
+            statuses,
+            "gpt",
+            "0123456789abcdef",
+        )
+    )
+
+    assert asyncio.run(store.get_many(["key-1", "key-2", "key-3"])) == {
+        "key-1": {"status_type": "Transit", "substatus_type": "Delayed"},
+        "key-2": {"status_type": "Transit", "substatus_type": None},
+    }
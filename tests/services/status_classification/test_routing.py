@@ -0,0 +1,113 @@
+import pytest
+import asyncio
+from app.services.status_classification.factory import LLMStatusClassifierFactory
+from app.services.status_classification.routing import (
+    LatencyHistogram,
+    RoutingStatusClassifier,
+)
+from app.services.status_classification.resilience import ProviderUnavailableError
+
+
+def build_backend(mocker, name: str, delay: float = 0, error: Exception = None):
+    async def aclassify(statuses, **kwargs):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return [{"status_name": statuses[0], "status_type": name}], {"tokens": 1}
+
+    backend = mocker.MagicMock(supports_batching=True)
+    backend.aclassify = mocker.AsyncMock(side_effect=aclassify)
+    return backend
+
+
+def test_latency_histogram_percentiles():
+    """Test that percentiles report the upper bound of their bucket."""
+    histogram = LatencyHistogram(min_seconds=0.1, growth=2, bucket_count=4)
+    for seconds in [0.05] * 90 + [0.3] * 9 + [5.0]:
+        histogram.observe(seconds)
+
+    assert histogram.percentile(0.5) == 0.1
+    assert histogram.percentile(0.95) == 0.4
+    assert histogram.percentile(1.0) == 0.8
+
+
+def test_routes_to_the_fastest_backend(mocker):
+    """Test that normal traffic goes to the backend with the lowest median latency."""
+    fast, slow = build_backend(mocker, "fast"), build_backend(mocker, "slow")
+    classifier = RoutingStatusClassifier({"slow": slow, "fast": fast}, min_samples=2)
+    for _ in range(2):
+        classifier.latencies["slow"].observe(2.0)
+        classifier.latencies["fast"].observe(0.2)
+
+    result = asyncio.run(classifier.aclassify(["in transit"]))
+
+    assert classifier.rank_backends() == ["fast", "slow"]
+    assert result[0][0]["status_type"] == "fast"
+    slow.aclassify.assert_not_called()
+
+
+def test_hedges_when_the_primary_is_slow(mocker):
+    """Test that a second backend is asked once the primary exceeds its hedge delay."""
+    primary = build_backend(mocker, "primary", delay=1)
+    secondary = build_backend(mocker, "secondary")
+    classifier = RoutingStatusClassifier(
+        {"primary": primary, "secondary": secondary}, default_hedge_delay=0.01
+    )
+
+    result = asyncio.run(classifier.aclassify(["in transit"]))
+
+    assert result[0][0]["status_type"] == "secondary"
+    # The cancelled primary call still counts as a slow sample
+    assert classifier.latencies["primary"].count == 1
+
+
+def test_fails_over_to_the_next_backend(mocker):
+    """Test that an error is retried on the next backend without waiting."""
+    broken = build_backend(mocker, "broken", error=RuntimeError("down"))
+    healthy = build_backend(mocker, "healthy")
+    classifier = RoutingStatusClassifier(
+        {"broken": broken, "healthy": healthy}, default_hedge_delay=10
+    )
+
+    result = asyncio.run(classifier.aclassify(["in transit"]))
+    assert result[0][0]["status_type"] == "healthy"
+
+    healthy.aclassify.side_effect = RuntimeError("down too")
+    with pytest.raises(RuntimeError):
+        asyncio.run(classifier.aclassify(["in transit"]))
+
+
+def test_ranks_failing_backends_last(mocker):
+    """Test that instant failures are not latency samples and rank the backend last."""
+    broken = build_backend(mocker, "broken", error=ProviderUnavailableError("x", 60))
+    healthy = build_backend(mocker, "healthy", delay=0.01)
+    classifier = RoutingStatusClassifier(
+        {"broken": broken, "healthy": healthy}, min_samples=1, failure_cooldown=0
+    )
+
+    for _ in range(3):
+        result = asyncio.run(classifier.aclassify(["in transit"]))
+        assert result[0][0]["status_type"] == "healthy"
+
+    assert broken.aclassify.call_count == 1
+    assert classifier.latencies["broken"].count == 0
+    assert classifier.rank_backends() == ["healthy", "broken"]
+
+    # Once the cooldown has passed, the unmeasured backend is tried first again
+    classifier.failed_until["broken"] = 0
+    assert classifier.rank_backends() == ["broken", "healthy"]
+
+
+def test_factory_builds_routed_classifier(mocker):
+    """Test that "routed" wraps the configured providers."""
+    mocker.patch(
+        "app.services.status_classification.factory.ROUTING_PROVIDERS",
+        "gpt, claude",
+    )
+    classifier = LLMStatusClassifierFactory.get_classifier("routed")
+
+    assert isinstance(classifier, RoutingStatusClassifier)
+    assert list(classifier.backends) == ["gpt", "claude"]
+    assert classifier.backends["gpt"] is LLMStatusClassifierFactory.get_classifier(
+        "gpt"
+    )
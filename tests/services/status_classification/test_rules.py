@@ -0,0 +1,71 @@
+import json
+import pytest
+from app.services.status_classification.rules import (
+    DEFAULT_STATUS_RULES,
+    StatusRuleEngine,
+    load_status_rules,
+)
+
+STATUS_CATEGORIES_DICT = {
+    "Exception": ["Cancelled", "Returned"],
+    "Info": [None],
+    "Transit": [None, "Delivered", "Pick Up Confirmed"],
+}
+
+
+@pytest.mark.parametrize(
+    "status, expected",
+    [
+        ("1234567890", ("Info", None)),
+        ("shipment delivered to recipient", ("Transit", "Delivered")),
+        ("order has been cancelled", ("Exception", "Cancelled")),
+        ("package returned to sender", ("Exception", "Returned")),
+        ("shipment picked up", ("Transit", "Pick Up Confirmed")),
+        ("package not delivered", None),
+        ("undelivered", None),
+        ("in transit to hub", None),
+        ("shipment will be delivered tomorrow", None),
+        ("expected to be delivered on monday", None),
+        ("package scheduled to be delivered", None),
+        ("estimated delivered date: friday", None),
+        ("ready to be picked up", None),
+        ("awaiting pick up confirmed by carrier", None),
+        ("returned to sender - delivered to shipper", None),
+        ("delivered to wrong address", None),
+        ("delivery rescheduled; previously scheduled delivery cancelled", None),
+        ("package damaged and returned to sender", None),
+        ("order has been cancelled.", ("Exception", "Cancelled")),
+        ("pick up confirmed", ("Transit", "Pick Up Confirmed")),
+    ],
+)
+def test_match(status, expected):
+    """Test the default rule table against common carrier statuses."""
+    engine = StatusRuleEngine(DEFAULT_STATUS_RULES)
+    result = engine.match(status, STATUS_CATEGORIES_DICT)
+
+    if expected is None:
+        assert result is None
+    else:
+        assert (result["status_type"], result["substatus_type"]) == expected
+
+
+def test_match_ignores_pairs_missing_from_categories():
+    """Test that a rule is skipped when its pair is not in the category set."""
+    engine = StatusRuleEngine(DEFAULT_STATUS_RULES)
+
+    assert engine.match("shipment delivered", {"Transit": [None]}) is None
+
+
+def test_load_status_rules_from_file(tmp_path):
+    """Test loading a custom rule table from a JSON file."""
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(
+        json.dumps([{"pattern": r"\bheld\b", "status_type": "Transit"}])
+    )
+
+    engine = StatusRuleEngine(load_status_rules(str(rules_path)))
+
+    assert engine.match("held at customs", STATUS_CATEGORIES_DICT) == {
+        "status_type": "Transit",
+        "substatus_type": None,
+    }
@@ -0,0 +1,325 @@
+import asyncio
+from app.services.cache import TwoTierCache
+from app.services.status_classification.rules import (
+    DEFAULT_STATUS_RULES,
+    StatusRuleEngine,
+)
+from app.services.status_classification.service import StatusClassificationService
+
+STATUS_CATEGORIES_DICT = {"Exception": ["Cancelled"], "Transit": [None]}
+
+
+def test_classify_only_sends_cache_misses(mocker):
+    """Test that cached statuses are not sent to the LLM again."""
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(
+        return_value=(
+            [
+                {
+                    "status_name": "package is in transit",
+                    "status_type": "Transit",
+                    "substatus_type": None,
+                }
+            ],
+            {"total_tokens": 10},
+        )
+    )
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+    asyncio.run(
+        service.classify(
+            ["package is in transit"],
+            llm="gpt",
+            status_categories_dict=STATUS_CATEGORIES_DICT,
+        )
+    )
+    response = asyncio.run(
+        service.classify(
+            ["Package is in transit", "package is in transit"],
+            llm="gpt",
+            status_categories_dict=STATUS_CATEGORIES_DICT,
+        )
+    )
+
+    assert mock_classifier.aclassify.await_count == 1
+    assert response.cache_stats == {"hits": 2, "coalesced": 0, "misses": 0}
+    assert [s.status_name for s in response.classified_statuses] == [
+        "Package is in transit",
+        "package is in transit",
+    ]
+
+
+def test_classify_cache_is_scoped_to_categories(mocker):
+    """Test that a different category set does not reuse cached results."""
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(
+        return_value=(
+            [
+                {
+                    "status_name": "held at facility",
+                    "status_type": "Transit",
+                    "substatus_type": None,
+                }
+            ],
+            {"total_tokens": 10},
+        )
+    )
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+    for categories in (STATUS_CATEGORIES_DICT, {"Transit": [None, "Delayed"]}):
+        asyncio.run(
+            service.classify(
+                ["held at facility"], llm="gpt", status_categories_dict=categories
+            )
+        )
+
+    assert mock_classifier.aclassify.await_count == 2
+
+
+def test_classify_coalesces_concurrent_requests(mocker):
+    """Test that concurrent requests for the same status share one LLM call."""
+
+    async def slow_aclassify(statuses, **kwargs):
+        await asyncio.sleep(0.01)
+        return (
+            [{"status_name": s, "status_type": "Transit"} for s in statuses],
+            {"total_tokens": 10},
+        )
+
+    mock_classifier = mocker.MagicMock()
+    mock_classifier.aclassify = mocker.AsyncMock(side_effect=slow_aclassify)
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+
+    async def classify_concurrently():
+        return await asyncio.gather(
+            *(
+                service.classify(
+                    ["in transit", "In Transit"],
+                    llm="gpt",
+                    status_categories_dict=STATUS_CATEGORIES_DICT,
+                )
+                for _ in range(3)
+            )
+        )
+
+    responses = asyncio.run(classify_concurrently())
+
+    mock_classifier.aclassify.assert_awaited_once()
+    assert mock_classifier.aclassify.await_args.args[0] == ["in transit"]
+    assert [r.cache_stats["misses"] for r in responses] == [2, 0, 0]
+    assert [r.cache_stats["coalesced"] for r in responses] == [0, 2, 2]
+    assert all(len(r.classified_statuses) == 2 for r in responses)
+
+
+def test_classify_answers_rule_matches_locally(mocker):
+    """Test that statuses matched by a rule never reach the LLM."""
+    mock_get_classifier = mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+    response = asyncio.run(
+        service.classify(
+            ["Order CANCELLED"],
+            llm="gpt",
+            status_categories_dict=STATUS_CATEGORIES_DICT,
+        )
+    )
+
+    mock_get_classifier.return_value.aclassify.assert_not_called()
+    assert response.classified_statuses[0].model_dump() == {
+        "status_name": "Order CANCELLED",
+        "status_type": "Exception",
+        "substatus_type": "Cancelled",
+        "source": "rules",
+        "confidence": None,
+    }
+    assert response.tokens_used == {}
+
+
+def test_classify_stream_yields_local_answers_first(mocker):
+    """Test that rule and cache answers stream before the LLM results."""
+    mock_classifier = mocker.MagicMock()
+
+    async def aclassify_stream(statuses, **kwargs):
+        yield None, None, {"total_tokens": 10}
+        yield 0, {
+            "status_name": "package is in transit",
+            "status_type": "Transit",
+            "substatus_type": None,
+        }, {}
+
+    mock_classifier.aclassify_stream = aclassify_stream
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+
+    async def collect(statuses):
+        return [
+            item
+            async for item in service.classify_stream(
+                statuses, llm="gpt", status_categories_dict=STATUS_CATEGORIES_DICT
+            )
+        ]
+
+    items = asyncio.run(
+        collect(
+            [
+                "package is in transit",
+                "shipment has been cancelled",
+                "Package is in transit",
+            ]
+        )
+    )
+    assert [(i.index, i.source) for i in items[:-1]] == [
+        (1, "rules"),
+        (0, "llm"),
+        (2, "llm"),
+    ]
+    assert items[-1] == {
+        "tokens_used": {"total_tokens": 10},
+        "cache_stats": {"hits": 0, "coalesced": 0, "misses": 2},
+    }
+
+    items = asyncio.run(collect(["package is in transit"]))
+    assert [(i.index, i.source) for i in items[:-1]] == [(0, "cache")]
+
+
+def test_classify_returns_a_row_for_statuses_the_model_left_out(mocker):
+    """Test that dropped statuses fall back to the default pair and are not cached."""
+    statuses = ["in transit to hub", "arrived at facility", "held at customs"]
+    mock_classifier = mocker.MagicMock(supports_batching=False)
+    mock_classifier.aclassify = mocker.AsyncMock(
+        return_value=(
+            [
+                {
+                    "status_name": "arrived at facility",
+                    "status_type": "Transit",
+                    "substatus_type": None,
+                }
+            ],
+            {"total_tokens": 10},
+        )
+    )
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+    response = asyncio.run(
+        service.classify(
+            statuses, llm="gpt", status_categories_dict=STATUS_CATEGORIES_DICT
+        )
+    )
+
+    assert len(response.classified_statuses) == len(statuses)
+    assert [
+        (s.status_name, s.status_type, s.source) for s in response.classified_statuses
+    ] == [
+        ("in transit to hub", "Transit", "default"),
+        ("arrived at facility", "Transit", "llm"),
+        ("held at customs", "Transit", "default"),
+    ]
+
+    asyncio.run(
+        service.classify(
+            statuses, llm="gpt", status_categories_dict=STATUS_CATEGORIES_DICT
+        )
+    )
+    assert mock_classifier.aclassify.await_args.args[0] == [
+        "in transit to hub",
+        "held at customs",
+    ]
+
+
+def test_classify_stream_returns_a_row_for_statuses_the_model_left_out(mocker):
+    """Test that the stream ends with the default pair for dropped statuses."""
+    mock_classifier = mocker.MagicMock()
+
+    async def aclassify_stream(statuses, **kwargs):
+        yield None, None, {"total_tokens": 10}
+        yield 1, {"status_type": "Transit", "substatus_type": None}, {}
+
+    mock_classifier.aclassify_stream = aclassify_stream
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+    )
+
+    async def collect():
+        return [
+            item
+            async for item in service.classify_stream(
+                ["in transit to hub", "arrived at facility"],
+                llm="gpt",
+                status_categories_dict=STATUS_CATEGORIES_DICT,
+            )
+        ]
+
+    items = asyncio.run(collect())
+    assert [(i.index, i.source) for i in items[:-1]] == [(1, "llm"), (0, "default")]
+
+
+def test_classify_replaces_the_batcher_of_an_old_taxonomy(mocker):
+    """Test that a taxonomy change does not leave the old batcher behind."""
+    mock_classifier = mocker.MagicMock(supports_batching=True)
+    mock_classifier.aclassify = mocker.AsyncMock(return_value=([], {}))
+    mocker.patch(
+        "app.services.status_classification.service.LLMStatusClassifierFactory"
+    ).get_classifier.return_value = mock_classifier
+
+    service = StatusClassificationService(
+        TwoTierCache(namespace="test", maxsize=10, ttl=60),
+        StatusRuleEngine(DEFAULT_STATUS_RULES),
+        micro_batch_wait_ms=1,
+    )
+    new_categories = {**STATUS_CATEGORIES_DICT, "Info": [None]}
+    for status_categories_dict in (STATUS_CATEGORIES_DICT, new_categories):
+        asyncio.run(
+            service.classify(
+                ["in transit to hub"],
+                llm="gpt",
+                status_categories_dict=status_categories_dict,
+            )
+        )
+
+    assert list(service._batchers) == ["gpt"]
+    _, batcher = service._batchers["gpt"]
+    assert batcher.status_categories_dict == new_categories
+    assert mock_classifier.aclassify.await_args.kwargs == {
+        "status_categories_dict": new_categories
+    }
@@ -0,0 +1,49 @@
+from sqlalchemy.exc import OperationalError
+from tests.utils import clean_table_after_test
+from app.models.status_taxonomy import StatusTaxonomyVersion
+from app.services.status_classification.categories import STATUS_CATEGORIES_DICT
+from app.services.status_classification.taxonomy import StatusTaxonomyStore
+
+
+@clean_table_after_test(StatusTaxonomyVersion.__tablename__)
+def test_publish_creates_a_new_version():
+    """Test that a published taxonomy is read back in its original order."""
+    store = StatusTaxonomyStore(refresh_interval=60)
+    categories = {"Transit": [None, "Delayed"], "Exception": ["Cancelled"]}
+
+    version = store.publish(categories)
+
+    assert store.get() == categories
+    assert list(store.get()) == ["Transit", "Exception"]
+    assert store.version == version
+    assert store.publish(STATUS_CATEGORIES_DICT) == version + 1
+
+
+@clean_table_after_test(StatusTaxonomyVersion.__tablename__)
+def test_snapshot_is_only_refreshed_after_the_interval():
+    """Test that other workers keep their snapshot until the next version check."""
+    publisher = StatusTaxonomyStore(refresh_interval=60)
+    reader = StatusTaxonomyStore(refresh_interval=60)
+    publisher.publish({"Transit": [None]})
+    assert reader.get() == {"Transit": [None]}
+
+    publisher.publish({"Transit": [None, "Delayed"]})
+    assert reader.get() == {"Transit": [None]}
+
+    reader.invalidate()
+    assert reader.get() == {"Transit": [None, "Delayed"]}
+
+
+def test_falls_back_to_the_default_taxonomy(mocker):
+    """Test that an unreachable database does not break classification."""
+    session_factory = mocker.MagicMock(
+        side_effect=OperationalError("SELECT 1", {}, Exception("down"))
+    )
+    store = StatusTaxonomyStore(session_factory=session_factory, refresh_interval=60)
+
+    assert store.get() is STATUS_CATEGORIES_DICT
+    assert store.version is None
+
+    # The failed check still counts, so the database is not hit on every request
+    store.get()
+    assert session_factory.call_count == 1
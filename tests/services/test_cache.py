@@ -0,0 +1,42 @@
+import json
+import asyncio
+from app.services.cache import LRUCache, TwoTierCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted first."""
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries(mocker):
+    """Test that entries are dropped once their TTL has passed."""
+    mock_time = mocker.patch("app.services.cache.time")
+    mock_time.monotonic.return_value = 100
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    mock_time.monotonic.return_value = 161
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_two_tier_cache_reads_through_redis(mocker):
+    """Test that Redis hits are returned and promoted to the local tier."""
+    mock_redis = mocker.MagicMock()
+    mock_redis.mget = mocker.AsyncMock(return_value=[json.dumps({"v": 1}), None])
+    cache = TwoTierCache(namespace="test", maxsize=10, ttl=60, redis_client=mock_redis)
+
+    found = asyncio.run(cache.get_many(["a", "b"]))
+
+    assert found == {"a": {"v": 1}}
+    mock_redis.mget.assert_awaited_once_with(["test:a", "test:b"])
+    assert cache.local.get("a") == {"v": 1}
@@ -0,0 +1,101 @@
+import asyncio
+from app.services.cache import TwoTierCache
+from app.services.user_cache import UserCache
+
+USER = {"id": 1, "username": "testuser", "email": "test@example.com"}
+
+
+def __user_cache() -> UserCache:
+    return UserCache(TwoTierCache(namespace="test", maxsize=10, ttl=60))
+
+
+def test_user_cache_coalesces_concurrent_misses():
+    """Test that concurrent lookups of the same user load it only once."""
+    cache = __user_cache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return USER
+
+    async def main():
+        return await asyncio.gather(*(cache.get("id", 1, load) for _ in range(5)))
+
+    assert asyncio.run(main()) == [USER] * 5
+    assert len(loads) == 1
+    assert cache.get_stats() == {
+        "hits": 0,
+        "misses": 1,
+        "coalesced": 4,
+        "hit_rate": 0.8,
+    }
+
+
+def test_user_cache_finds_users_by_username_and_email():
+    """Test that a user loaded by id is then a hit by username and email."""
+    cache = __user_cache()
+
+    async def main():
+        await cache.get("id", 1, lambda: asyncio.sleep(0, USER))
+        return (
+            await cache.get("username", "testuser", None),
+            await cache.get("email", "test@example.com", None),
+        )
+
+    assert asyncio.run(main()) == (USER, USER)
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_user_cache_misses_stale_pointers_after_a_rename():
+    """Test that the old username of a renamed user is no longer a hit."""
+    cache = __user_cache()
+    renamed = {**USER, "username": "renamed"}
+
+    async def main():
+        await cache.set(USER)
+        await cache.set(renamed)
+        return (
+            await cache.get("username", "testuser", lambda: asyncio.sleep(0, None)),
+            await cache.get("username", "renamed", None),
+        )
+
+    assert asyncio.run(main()) == (None, renamed)
+
+
+def test_user_cache_invalidate_drops_every_key():
+    """Test that a deleted user is a miss by id, username and email."""
+    cache = __user_cache()
+    missing = lambda: asyncio.sleep(0, None)  # noqa: E731
+
+    async def main():
+        await cache.set(USER)
+        await cache.invalidate(USER)
+        return [
+            await cache.get(field, USER[field], missing)
+            for field in ("id", "username", "email")
+        ]
+
+    assert asyncio.run(main()) == [None, None, None]
+    assert len(cache.cache.local) == 0
+
+
+def test_user_cache_load_by_username_does_not_overwrite_a_newer_write():
+    """Test that a write during a load by username is not undone by the load."""
+    cache = __user_cache()
+    updated = {**USER, "email": "updated@example.com"}
+    rows = [USER]
+
+    async def load():
+        row = rows[-1]
+        if len(rows) == 1:
+            # The row is updated and cached while this read is in flight
+            rows.append(updated)
+            await cache.set(updated)
+        return row
+
+    async def main():
+        found = await cache.get("username", "testuser", load)
+        return found, await cache.get("id", 1, None)
+
+    assert asyncio.run(main()) == (updated, updated)
@@ -0,0 +1,18 @@
+from app.database import get_async_database_url
+
+
+def test_get_async_database_url_switches_driver():
+    url = get_async_database_url(
+        "postgresql+psycopg2://postgres:password@db:5432/fastapi"
+    )
+
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.password == "password"
+    assert url.host == "db"
+
+
+def test_get_async_database_url_keeps_socket_host():
+    url = get_async_database_url("postgresql://postgres@/fastapi?host=/tmp/pgdata")
+
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.query == {"host": "/tmp/pgdata"}
@@ -1,7 +1,13 @@
 # tests/test_tasks.py
 
 import datetime
-from app.tasks import sample_task, say_something
+from app.tasks import (
+    classify_status_chunk,
+    poll_status_batch,
+    sample_task,
+    say_something,
+    submit_status_batch,
+)
 
 
 def test_sample_task_adds_correctly():
@@ -33,3 +39,83 @@ def test_say_something_prints_default_message(mocker, capsys):
     captured = capsys.readouterr()
 
     assert "2025-03-21 12:00:00 Hello" in captured.out
+
+
+def test_classify_status_chunk_stores_results(mocker):
+    mock_job_store = mocker.patch("app.tasks.job_store")
+    mocker.patch(
+        "app.tasks.classify_job_chunk",
+        return_value=[
+            {"status_name": "a", "status_type": "Transit", "substatus_type": None},
+            {"status_name": "b", "status_type": "Transit", "substatus_type": None},
+        ],
+    )
+
+    result = classify_status_chunk.apply(args=("job", 3, 300, ["a", "b"], "gpt")).get()
+
+    assert result == 2
+    mock_job_store.save_chunk_result.assert_called_once_with(
+        "job",
+        3,
+        [
+            {
+                "index": 300,
+                "status_name": "a",
+                "status_type": "Transit",
+                "substatus_type": None,
+            },
+            {
+                "index": 301,
+                "status_name": "b",
+                "status_type": "Transit",
+                "substatus_type": None,
+            },
+        ],
+    )
+
+
+def test_classify_status_chunk_records_error_after_retries(mocker):
+    mock_job_store = mocker.patch("app.tasks.job_store")
+    mock_classify = mocker.patch(
+        "app.tasks.classify_job_chunk", side_effect=RuntimeError("provider down")
+    )
+
+    classify_status_chunk.apply(args=("job", 0, 0, ["a"], "gpt"))
+
+    assert mock_classify.call_count == 4
+    mock_job_store.save_chunk_error.assert_called_once_with("job", 0, "provider down")
+    mock_job_store.save_chunk_result.assert_not_called()
+
+
+def test_classify_status_chunk_skips_failed_jobs(mocker):
+    mock_job_store = mocker.patch("app.tasks.job_store")
+    mock_job_store.get_state.return_value = "failed"
+    mock_classify = mocker.patch("app.tasks.classify_job_chunk")
+
+    result = classify_status_chunk.apply(args=("job", 0, 0, ["a"], "gpt")).get()
+
+    assert result == 0
+    mock_classify.assert_not_called()
+    mock_job_store.save_chunk_result.assert_not_called()
+
+
+def test_submit_status_batch_schedules_poll(mocker):
+    mocker.patch("app.tasks.submit_job_batch", return_value="batch_1")
+    mock_poll = mocker.patch("app.tasks.poll_status_batch.apply_async")
+
+    result = submit_status_batch.apply(args=("job",)).get()
+
+    assert result == "batch_1"
+    mock_poll.assert_called_once()
+    assert mock_poll.call_args.args == (("job",),)
+
+
+def test_poll_status_batch_polls_until_batch_ends(mocker):
+    mock_collect = mocker.patch(
+        "app.tasks.collect_job_batch", side_effect=[None, None, 4]
+    )
+
+    result = poll_status_batch.apply(args=("job",)).get()
+
+    assert result == 4
+    assert mock_collect.call_count == 3